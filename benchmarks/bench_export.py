@@ -0,0 +1,70 @@
+"""
+Compares export and import wall time of the v1 and v2 formats.
+
+    PYTHONPATH=src python benchmarks/bench_export.py --size-mb 1024 -j 8
+
+The exported tree stands in for the share_folder section of the KDE
+template (see share_tree.py). Export streams it into an archive the way
+`dotctl export` does. Import extracts it into an empty directory with one
+entry per worker, the way `dotctl import` does; OPEN is the part of the
+import spent opening the archive and reading its member list.
+"""
+
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from dotctl import __DEFAULT_JOBS__
+from dotctl.handlers.archive_handler import open_archive, open_archive_writer
+from share_tree import make_share_tree
+
+
+def _extract(archive, dest: Path, jobs: int) -> None:
+    """Extracts one entry per worker, as the importer does."""
+    entries: dict[str, list] = {}
+    for member in archive.members():
+        parts = member.name.split("/")
+        if len(parts) > 2:
+            entries.setdefault("/".join(parts[:2]), []).append(member)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for future in [
+            executor.submit(archive.extract, members, dest)
+            for members in entries.values()
+        ]:
+            future.result()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("-j", "--jobs", type=int, default=__DEFAULT_JOBS__)
+    parser.add_argument("--dir", type=Path, default=None, help="scratch directory")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as scratch:
+        source = Path(scratch) / "share"
+        files = make_share_tree(source, args.size_mb)
+        print(f"{files} files, {args.size_mb} MiB, {args.jobs} jobs")
+        print(f"{'FORMAT':<7} {'EXPORT':>8} {'IMPORT':>8} {'OPEN':>8} {'SIZE':>10}")
+        for archive_format in ("v1", "v2"):
+            path = Path(scratch) / f"{archive_format}.dtsv"
+            start = time.perf_counter()
+            with open_archive_writer(path, archive_format, jobs=args.jobs) as archive:
+                archive.add_tree(source, "share_folder")
+            exported = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with open_archive(path) as archive:
+                opened = time.perf_counter() - start
+                _extract(archive, Path(scratch) / archive_format, args.jobs)
+            imported = time.perf_counter() - start
+            size = path.stat().st_size / 1024 / 1024
+            print(
+                f"{archive_format:<7} {exported:>7.1f}s {imported:>7.1f}s "
+                f"{opened:>7.1f}s {size:>7.0f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
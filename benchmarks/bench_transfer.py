@@ -0,0 +1,57 @@
+"""
+Compares the rsync transfer profiles on a share_folder-sized tree.
+
+    PYTHONPATH=src python benchmarks/bench_transfer.py --size-mb 2048
+
+Each profile copies the tree into an empty destination, then again after
+every source mtime changed while the contents stayed the same (what a git
+checkout of the profile leaves behind). The destination lives next to the
+source, so both runs are local disk to local disk like apply and save.
+"""
+
+import argparse
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from dotctl.handlers.data_handler import LOCAL_TRANSFER, REMOTE_TRANSFER
+from share_tree import make_share_tree, shift_mtimes
+
+
+def _rsync(options: tuple[str, ...], source: Path, dest: Path) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        ["rsync", *options, "--delete", f"{source}/", f"{dest}/"], check=True
+    )
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--dir", type=Path, default=None, help="scratch directory")
+    args = parser.parse_args()
+    if shutil.which("rsync") is None:
+        sys.exit("rsync is not installed")
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as scratch:
+        source = Path(scratch) / "share"
+        files = make_share_tree(source, args.size_mb)
+        print(f"{files} files, {args.size_mb} MiB")
+        print(f"{'PROFILE':<8} {'OPTIONS':<18} {'COLD':>8} {'RESYNC':>8}")
+        for transfer in (REMOTE_TRANSFER, LOCAL_TRANSFER):
+            dest = Path(scratch) / transfer.name
+            cold = _rsync(transfer.options, source, dest)
+            shift_mtimes(source)
+            resync = _rsync(transfer.options, source, dest)
+            print(
+                f"{transfer.name:<8} {' '.join(transfer.options):<18} "
+                f"{cold:>7.1f}s {resync:>7.1f}s"
+            )
+            shutil.rmtree(dest)
+
+
+if __name__ == "__main__":
+    main()
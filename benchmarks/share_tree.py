@@ -0,0 +1,71 @@
+"""
+Builds a synthetic stand-in for the share_folder sections of the KDE template.
+
+The entry names come from src/dotctl/templates/kde.yaml; the contents mimic
+what those directories hold on a themed desktop: many small text files
+(plasma, kwin, color schemes), small already-compressed icons, and fonts
+and wallpapers that make up most of the bytes.
+"""
+
+import os
+import random
+from pathlib import Path
+
+TEMPLATE = Path(__file__).parents[1] / "src" / "dotctl" / "templates" / "kde.yaml"
+# Share of the total size, average file size, suffix and how much of the
+# data compresses
+PROFILES = {
+    "wallpapers": (0.55, 6 * 1024 * 1024, ".jpg", 0.0),
+    "icons": (0.20, 4 * 1024, ".png", 0.0),
+    "fonts": (0.15, 512 * 1024, ".ttf", 0.5),
+    "plasma": (0.05, 8 * 1024, ".qml", 1.0),
+    "kwin": (0.03, 8 * 1024, ".js", 1.0),
+}
+DEFAULT_PROFILE = (0.02, 4 * 1024, "", 1.0)
+WORDS = b"plasma kwin konsole breeze shadow blur opacity 0.85 true false #31363b "
+
+
+def share_entries() -> list[str]:
+    """The entries of the template's share_folder export section."""
+    import yaml
+
+    config = yaml.safe_load(TEMPLATE.read_text())
+    return config["export"]["share_folder"]["entries"]
+
+
+def _content(rng: random.Random, size: int, compressible: float) -> bytes:
+    text = int(size * compressible)
+    return (WORDS * (text // len(WORDS) + 1))[:text] + rng.randbytes(size - text)
+
+
+def make_share_tree(root: Path, total_mb: int, seed: int = 0) -> int:
+    """Fills root with about total_mb MiB of share entries, returns the file count."""
+    rng = random.Random(seed)
+    entries = share_entries()
+    weights = {entry: PROFILES.get(entry, DEFAULT_PROFILE)[0] for entry in entries}
+    scale = sum(weights.values())
+    count = 0
+    for entry in entries:
+        share, average, suffix, compressible = PROFILES.get(entry, DEFAULT_PROFILE)
+        budget = int(total_mb * 1024 * 1024 * share / scale)
+        index = 0
+        while budget > 0:
+            size = min(budget, max(1, int(rng.uniform(0.5, 1.5) * average)))
+            directory = root / entry / f"set{index // 200:03d}"
+            directory.mkdir(parents=True, exist_ok=True)
+            (directory / f"item{index:05d}{suffix}").write_bytes(
+                _content(rng, size, compressible)
+            )
+            budget -= size
+            index += 1
+        count += index
+    return count
+
+
+def shift_mtimes(root: Path, seconds: int = 3600) -> None:
+    """Moves every file mtime forward, as a fresh git checkout of the profile does."""
+    for directory, _, files in os.walk(root):
+        for name in files:
+            path = os.path.join(directory, name)
+            mtime = os.stat(path).st_mtime + seconds
+            os.utime(path, (mtime, mtime))
@@ -1,13 +1,37 @@
-from importlib.metadata import version as pkg_version, PackageNotFoundError
 import os
 
 __APP_NAME__ = "dotctl"
-try:
-    __APP_VERSION__ = pkg_version("dotctl")
-except PackageNotFoundError:
-    __APP_VERSION__ = "0.0.0"
 __BASE_DIR__ = os.path.dirname(os.path.abspath(__file__))
 __DEFAULT_PROFILE__ = "default"
 __EXPORT_EXTENSION__ = ".dtsv"
 __EXPORT_DATA_DIR__ = "._export_"
+__EXPORT_META_FILE__ = "._export_meta_.json"
+__EXPORT_FORMATS__ = ("v1", "v2")
+__EXPORT_FORMAT__ = "v1"
 __COMMANDS_REQ__ = ["sshpass", "rsync", "git"]
+__DEFAULT_JOBS__ = min(8, os.cpu_count() or 1)
+# Fleet runs mostly wait on the network, not on local CPUs
+__FLEET_JOBS__ = 16
+try:
+    __FETCH_TTL__ = int(os.environ.get("DOTCTL_FETCH_TTL", "0"))
+except ValueError:
+    __FETCH_TTL__ = 0
+# Imports prune the local chunk cache back to this size, in MiB
+try:
+    __CHUNK_CACHE_SIZE__ = int(os.environ.get("DOTCTL_CHUNK_CACHE_MB", "1024"))
+except ValueError:
+    __CHUNK_CACHE_SIZE__ = 1024
+
+
+def __getattr__(name: str):
+    # importlib.metadata is slow to import, resolve the version on first use only
+    if name == "__APP_VERSION__":
+        from importlib.metadata import version as pkg_version, PackageNotFoundError
+
+        global __APP_VERSION__
+        try:
+            __APP_VERSION__ = pkg_version("dotctl")
+        except PackageNotFoundError:
+            __APP_VERSION__ = "0.0.0"
+        return __APP_VERSION__
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,18 +1,37 @@
+import threading
 from pathlib import Path
 from dataclasses import dataclass
 from dotctl.utils import log
-from dotctl.handlers.data_handler import copy
+from dotctl.handlers.sync_handler import (
+    SyncTask,
+    section_tasks,
+    sync_entries,
+    sync_sections,
+)
+from dotctl.handlers.plan_handler import (
+    build_plan,
+    show_plan,
+    confirm_plan,
+    planned_tasks,
+)
 from dotctl.paths import app_profile_directory, app_config_file
 from dotctl.handlers.config_handler import conf_reader
-from dotctl.handlers.hooks_handler import run_hooks
+from dotctl.handlers.hooks_handler import (
+    PRE_APPLY,
+    POST_APPLY,
+    run_hooks,
+    section_hook_runner,
+)
 from dotctl.handlers.git_handler import (
     get_repo,
     get_repo_branches,
-    git_fetch,
+    fetch_profile,
+    get_sparse_sections,
     checkout_branch,
     pull_changes,
 )
 from dotctl.exception import exception_handler
+from dotctl import __DEFAULT_JOBS__
 
 
 @dataclass
@@ -25,6 +44,12 @@ class ActivatorProps:
     skip_post_hooks: bool
     ignore_hook_errors: bool
     hooks_timeout: int
+    jobs: int
+    dry_run: bool
+    plan: bool
+    json: bool
+    no_confirm: bool
+    checksum: bool
 
 
 activator_default_props = ActivatorProps(
@@ -36,20 +61,57 @@ activator_default_props = ActivatorProps(
     skip_post_hooks=False,
     ignore_hook_errors=False,
     hooks_timeout=0,
+    jobs=__DEFAULT_JOBS__,
+    dry_run=False,
+    plan=False,
+    json=False,
+    no_confirm=False,
+    checksum=False,
 )
 
 
+def _apply_tasks(
+    profile_dir: Path, create_dirs: bool = True, sections: list[str] | None = None
+) -> list[SyncTask]:
+    config = conf_reader(config_file=Path(app_config_file))
+
+    tasks = []
+    for name, section in config.save.items():
+        if sections is not None and name not in sections:
+            continue
+        source_base_dir = profile_dir / name
+        dest_base_dir = section.path
+        if create_dirs:
+            dest_base_dir.mkdir(exist_ok=True)
+        tasks += section_tasks(name, section.entries, source_base_dir, dest_base_dir)
+    return tasks
+
+
 @exception_handler
 def apply(props: ActivatorProps) -> None:
-    log("Activating profile...")
     profile_dir = Path(app_profile_directory)
     profile = props.profile
     repo = get_repo(profile_dir)
 
+    if props.dry_run:
+        # Planning only reads the working tree: no checkout, pull or hooks
+        _, _, active_profile, _ = get_repo_branches(repo)
+        if profile is not None and active_profile != profile:
+            log(f"❌ Dry run can only plan the active profile ({active_profile}).")
+            return
+        tasks = _apply_tasks(
+            profile_dir, create_dirs=False, sections=get_sparse_sections(repo)
+        )
+        plan = build_plan("apply", tasks)
+        show_plan(plan, as_json=props.json)
+        return
+
+    log("Activating profile...")
     _, _, active_profile, all_profiles = get_repo_branches(repo)
     if profile is not None and active_profile != profile:
         if profile not in all_profiles:
-            git_fetch(repo)
+            fetch_profile(repo, profile)
+            _, _, active_profile, all_profiles = get_repo_branches(repo)
         if profile in all_profiles:
             checkout_branch(repo, profile)
             log(f"Switched to profile: {profile}")
@@ -57,42 +119,80 @@ def apply(props: ActivatorProps) -> None:
             log(f"❌ Profile {profile} is not available.")
             return
 
-    config = conf_reader(config_file=Path(app_config_file))
-
     if pull_changes(repo):
         log("Pulled latest changes from cloud successfully.")
 
+    sparse_sections = get_sparse_sections(repo)
+    tasks = _apply_tasks(profile_dir, sections=sparse_sections)
+    if props.plan:
+        plan = build_plan("apply", tasks)
+        if not confirm_plan(plan, as_json=props.json, no_confirm=props.no_confirm):
+            log("🛑 Apply aborted, no changes were made.")
+            return
+        tasks = planned_tasks(plan, tasks)
+
     if not props.skip_hooks and not props.skip_pre_hooks:
         run_hooks(
             pre_apply_hooks=True,
             ignore_errors=props.ignore_hook_errors,
             timeout=props.hooks_timeout,
+            jobs=props.jobs,
         )
 
-    for name, section in config.save.items():
-        source_base_dir = profile_dir / name
-        dest_base_dir = Path(section.location)
-        dest_base_dir.mkdir(exist_ok=True)
+    for name in dict.fromkeys(task.section for task in tasks):
         log(f'Applying "{name}"...')
-        for entry in section.entries:
-            source = source_base_dir / entry
-            dest = dest_base_dir / entry
-            result = copy(
-                source, dest, skip_sudo=props.skip_sudo, sudo_pass=props.password
-            )
-
-            # Updated props
-            if result is not None:
-                skip_sudo, sudo_pass = result
-                if skip_sudo is not None:
-                    props.skip_sudo = skip_sudo
-                if sudo_pass is not None:
-                    props.password = sudo_pass
+
+    # Sections with hooks of their own are applied as overlapping pipelines
+    before = after = None
+    if not props.skip_hooks:
+        hook_options = {
+            "ignore_errors": props.ignore_hook_errors,
+            "timeout": props.hooks_timeout,
+            "jobs": props.jobs,
+            # One bound on hook processes for every section and phase
+            "slots": threading.BoundedSemaphore(props.jobs),
+        }
+        if not props.skip_pre_hooks:
+            before = section_hook_runner(PRE_APPLY, **hook_options)
+        if not props.skip_post_hooks:
+            after = section_hook_runner(POST_APPLY, **hook_options)
+
+    if before or after:
+        result = sync_sections(
+            tasks,
+            before=before,
+            after=after,
+            skip_sudo=props.skip_sudo,
+            sudo_pass=props.password,
+            jobs=props.jobs,
+            checksum=props.checksum,
+            # Sections without entries still run their hooks
+            sections=[
+                name
+                for name in conf_reader(config_file=Path(app_config_file)).save
+                if sparse_sections is None or name in sparse_sections
+            ],
+        )
+    else:
+        result = sync_entries(
+            tasks,
+            skip_sudo=props.skip_sudo,
+            sudo_pass=props.password,
+            jobs=props.jobs,
+            checksum=props.checksum,
+        )
+
+    # Updated props
+    if result is not None:
+        props.skip_sudo = result.skip_sudo
+        if result.sudo_pass is not None:
+            props.password = result.sudo_pass
 
     if not props.skip_hooks and not props.skip_post_hooks:
         run_hooks(
             post_apply_hooks=True,
             ignore_errors=props.ignore_hook_errors,
             timeout=props.hooks_timeout,
+            jobs=props.jobs,
         )
     log("✅ Profile applied successfully!")
@@ -14,7 +14,7 @@ from dotctl.handlers.git_handler import (
     commit_changes,
     get_repo,
     get_repo_branches,
-    git_fetch,
+    fetch_profile,
     create_branch,
     create_empty_branch,
     is_remote_repo,
@@ -49,7 +49,7 @@ def create(props: CreatorProps):
     repo = get_repo(props.profile_dir)
 
     if props.fetch:
-        git_fetch(repo)
+        fetch_profile(repo, props.profile)
 
     _, _, _, all_profiles = get_repo_branches(repo)
     if props.profile in all_profiles:
@@ -77,7 +77,7 @@ def create(props: CreatorProps):
         _, remote_profiles, active_profile, all_profiles = get_repo_branches(repo)
         if is_remote:
             if props.profile not in remote_profiles:
-                git_fetch(repo=repo)
+                fetch_profile(repo=repo, branch=props.profile)
                 _, remote_profiles, active_profile, all_profiles = get_repo_branches(
                     repo
                 )
@@ -0,0 +1,114 @@
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from dotctl.utils import log
+from dotctl.handlers.sync_handler import section_tasks
+from dotctl.handlers.fleet_handler import (
+    TRANSPORTS,
+    parse_inventory,
+    run_fleet,
+    show_fleet_report,
+)
+from dotctl.paths import app_profile_directory, app_config_file, app_hooks_directory
+from dotctl.handlers.config_handler import conf_reader
+from dotctl.handlers.hooks_handler import HOOKS_D_DIR
+from dotctl.handlers.git_handler import (
+    get_repo,
+    get_repo_branches,
+    fetch_profile,
+    get_sparse_sections,
+    checkout_branch,
+    profile_worktree,
+    uses_worktrees,
+)
+from dotctl.exception import exception_handler
+from dotctl import __FLEET_JOBS__
+
+
+@dataclass
+class DeployerProps:
+    inventory: str | None
+    profile: str | None
+    jobs: int
+    transport: str
+    skip_hooks: bool
+
+
+deployer_default_props = DeployerProps(
+    inventory=None,
+    profile=None,
+    jobs=__FLEET_JOBS__,
+    transport="ssh",
+    skip_hooks=False,
+)
+
+
+@exception_handler
+def deploy(props: DeployerProps) -> None:
+    """Applies a profile to every host of an inventory concurrently."""
+    log("Applying profile to fleet...")
+    if not props.inventory:
+        log("❌ No inventory specified")
+        return
+
+    inventory = Path(props.inventory)
+    if not inventory.is_file():
+        log(f"❌ Inventory not found: {inventory}")
+        return
+    hosts = parse_inventory(inventory)
+    if not hosts:
+        log("❌ Inventory has no hosts")
+        return
+
+    profile_dir = Path(app_profile_directory)
+    repo = get_repo(profile_dir)
+    _, remote_profiles, active_profile, all_profiles = get_repo_branches(repo)
+    profile = props.profile or active_profile
+
+    # Ensure the profile is checked out
+    work_dir = profile_dir
+    switched = False
+    if profile != active_profile:
+        if profile not in all_profiles:
+            fetch_profile(repo, profile)
+            _, remote_profiles, active_profile, all_profiles = get_repo_branches(repo)
+
+        if profile not in all_profiles:
+            log(f"❌ Profile '{profile}' not found.")
+            return
+        if uses_worktrees(repo):
+            # Read it from its own worktree, the active profile stays checked out
+            work_dir = Path(profile_worktree(repo, profile).working_tree_dir)
+        else:
+            checkout_branch(repo, profile)
+            switched = True
+            log(f"Switched to profile: {profile}")
+
+    try:
+        config = conf_reader(config_file=work_dir / Path(app_config_file).name)
+        tasks = []
+        sections = get_sparse_sections(repo)
+        for name, section in config.save.items():
+            if sections is not None and name not in sections:
+                continue
+            tasks += section_tasks(name, section.entries, work_dir / name, section.path)
+        tasks = [task for task in tasks if task.source.exists()]
+
+        hooks = None
+        if not props.skip_hooks:
+            hooks_dir = work_dir / Path(app_hooks_directory).name
+            hooks = (hooks_dir / "pre_apply.sh", hooks_dir / "post_apply.sh")
+            if any((hooks_dir / HOOKS_D_DIR).glob("*")):
+                log("⚠️ hooks.d scripts are not run on fleet hosts")
+
+        log(f"Applying '{profile}' to {len(hosts)} hosts, {props.jobs} at a time...")
+        start = time.monotonic()
+        reports = run_fleet(
+            hosts, TRANSPORTS[props.transport](), tasks, props.jobs, hooks=hooks
+        )
+        show_fleet_report(reports, time.monotonic() - start)
+    finally:
+        # Switch back to the original profile if changed
+        if switched:
+            checkout_branch(repo, active_profile)
+            log(f"Switched back to profile: {active_profile}")
@@ -1,19 +1,39 @@
 from dataclasses import dataclass
-import shutil
+from concurrent.futures import ThreadPoolExecutor
 from random import shuffle
 from pathlib import Path
 from dotctl.utils import log
-from dotctl.handlers.data_handler import copy
+from dotctl.handlers.archive_handler import (
+    archive_id,
+    archive_index,
+    collect_members,
+    detect_format,
+    open_archive,
+    open_archive_writer,
+)
+from dotctl.handlers.sync_handler import (
+    SyncTask,
+    section_tasks,
+    resolve_sudo,
+    prompt_sudo,
+)
 from dotctl.paths import app_profile_directory, app_config_file, home_path
 from dotctl.handlers.config_handler import conf_reader
 from dotctl.handlers.git_handler import (
     get_repo,
     get_repo_branches,
-    git_fetch,
+    fetch_profile,
     checkout_branch,
+    profile_worktree,
+    uses_worktrees,
 )
 from dotctl.exception import exception_handler
-from dotctl import __EXPORT_EXTENSION__, __EXPORT_DATA_DIR__
+from dotctl import (
+    __EXPORT_EXTENSION__,
+    __EXPORT_DATA_DIR__,
+    __EXPORT_FORMAT__,
+    __DEFAULT_JOBS__,
+)
 
 
 @dataclass
@@ -21,15 +41,30 @@ class ExporterProps:
     profile: str | None
     skip_sudo: bool
     password: str | None
+    jobs: int
+    archive_format: str
+    store: str | None
+    since: str | None
 
 
 exporter_default_props = ExporterProps(
     profile=None,
     skip_sudo=False,
     password=None,
+    jobs=__DEFAULT_JOBS__,
+    archive_format=__EXPORT_FORMAT__,
+    store=None,
+    since=None,
 )
 
 
+def _collect(task: SyncTask):
+    try:
+        return collect_members(task.source)
+    except PermissionError as e:
+        return e
+
+
 @exception_handler
 def exporter(props: ExporterProps) -> None:
     """Exports a dotfiles profile as a compressed archive."""
@@ -42,82 +77,125 @@ def exporter(props: ExporterProps) -> None:
     _, remote_profiles, active_profile, all_profiles = get_repo_branches(repo)
     profile = props.profile or active_profile
 
-    # Create export path directory with uniqueness
-    export_profile_path = export_base_path / profile
-    if (
-        export_profile_path.exists()
-        or export_profile_path.with_suffix(__EXPORT_EXTENSION__).exists()
-    ):
+    # Create export path with uniqueness
+    export_file = export_base_path / f"{profile}{__EXPORT_EXTENSION__}"
+    if export_file.exists() or export_file.with_suffix("").exists():
         rand_chars = list("abcdefg12345")
         shuffle(rand_chars)
         rand_str = "".join(rand_chars)
-        export_profile_path = export_base_path / f"{profile}_{rand_str}"
-    export_profile_path.mkdir(parents=True, exist_ok=True)
+        export_file = export_base_path / f"{profile}_{rand_str}{__EXPORT_EXTENSION__}"
+
+    store = Path(props.store) if props.store else None
+    meta = {"profile": profile}
+    base_index = None
+    archive_format = props.archive_format
+    if props.since:
+        since_path = Path(props.since)
+        if detect_format(since_path) is None:
+            log(f"❌ Invalid base export: {since_path}")
+            return
+        with open_archive(since_path, store=store) as base_archive:
+            base_profile = base_archive.meta.get("profile", profile)
+            if base_profile != profile:
+                log(f"❌ {since_path.name} is an export of profile '{base_profile}'")
+                return
+            meta["base"] = archive_id(base_archive)
+            base_index = archive_index(base_archive)
+        log(f"Exporting changes since {since_path.name}...")
+        if archive_format == "v1" and store is None:
+            log("Deltas need the v2 format, writing a v2 export")
+            archive_format = "v2"
+
+    # Ensure the profile is checked out
+    work_dir = profile_dir
+    switched = False
+    if profile != active_profile:
+        if profile not in all_profiles:
+            fetch_profile(repo, profile)
+            _, remote_profiles, active_profile, all_profiles = get_repo_branches(repo)
+
+        if profile not in all_profiles:
+            log(f"❌ Profile '{profile}' not found.")
+            return
+        if uses_worktrees(repo):
+            # Read it from its own worktree, the active profile stays checked out
+            work_dir = Path(profile_worktree(repo, profile).working_tree_dir)
+        else:
+            checkout_branch(repo, profile)
+            switched = True
+            log(f"Switched to profile: {profile}")
 
     try:
-        # Ensure the profile is active
-        if profile != active_profile:
-            if profile not in all_profiles:
-                git_fetch(repo)
-                _, remote_profiles, active_profile, all_profiles = get_repo_branches(
-                    repo
-                )
-
-            if profile in all_profiles:
-                checkout_branch(repo, profile)
-                log(f"Switched to profile: {profile}")
-            else:
-                log(f"❌ Profile '{profile}' not found.")
-                return
+        # Read config file
+        config = conf_reader(config_file=work_dir / Path(app_config_file).name)
+        export_data_path = Path(__EXPORT_DATA_DIR__)
 
-        # Copy profile files
-        copy(
-            profile_dir,
-            export_profile_path,
+        tasks = []
+        for name, section in config.export.items():
+            tasks += section_tasks(
+                name, section.entries, section.path, export_data_path / name
+            )
+
+        result = resolve_sudo(
+            tasks,
             skip_sudo=props.skip_sudo,
             sudo_pass=props.password,
+            check_dest=False,
         )
 
-        # Read config file
-        config = conf_reader(config_file=Path(app_config_file))
-        export_data_path = export_profile_path / __EXPORT_DATA_DIR__
-
-        for name, section in config.export.items():
-            source_base_dir = Path(section.location)
-            dest_base_dir = export_data_path / name
-            dest_base_dir.mkdir(parents=True, exist_ok=True)
-
-            log(f'Exporting "{name}"...')
-            for entry in section.entries:
-                source = source_base_dir / entry
-                dest = dest_base_dir / entry
-                result = copy(
-                    source, dest, skip_sudo=props.skip_sudo, sudo_pass=props.password
-                )
-
-                # Update props based on the result
-                if result is not None:
-                    skip_sudo, sudo_pass = result
-                    if skip_sudo is not None:
-                        props.skip_sudo = skip_sudo
-                    if sudo_pass is not None:
-                        props.password = sudo_pass
+        # Walk the unprivileged entries in parallel, the archive is written serially
+        readable = [task for task in result.synced if not task.sudo_pass]
+        with ThreadPoolExecutor(max_workers=props.jobs) as executor:
+            members = dict(zip(map(id, readable), executor.map(_collect, readable)))
 
+        log("Creating archive...")
+        with open_archive_writer(
+            export_file,
+            archive_format,
+            jobs=props.jobs,
+            meta=meta,
+            store=store,
+            base=base_index,
+        ) as archive:
+            archive.add_tree(work_dir, "")
+
+            section = None
+            for task in result.synced:
+                if task.section != section:
+                    section = task.section
+                    log(f'Exporting "{section}"...')
+                arcname = task.dest.as_posix()
+                task_members = members.get(id(task))
+
+                if isinstance(task_members, PermissionError):
+                    log(f"PermissionError: {task.source} requires sudo access.")
+                    task.sudo_pass = prompt_sudo(task.source, result)
+                    if not task.sudo_pass:
+                        log(f"Skipping {task.source}")
+                        result.skipped.append(task)
+                        continue
+
+                try:
+                    if task.sudo_pass:
+                        archive.add_privileged(task.source, arcname, task.sudo_pass)
+                    else:
+                        archive.add_members(arcname, task_members)
+                except (OSError, RuntimeError) as e:
+                    log(f"Failed to export {task.source}: {e}")
+                    result.failed.append(task)
+
+            # A delta must not turn entries it could not read into tombstones
+            for task in result.skipped + result.failed:
+                archive.keep(task.dest.as_posix())
+
+        # Update props based on the result
+        props.skip_sudo = result.skip_sudo
+        if result.sudo_pass is not None:
+            props.password = result.sudo_pass
+
+        log(f"✅ Successfully exported to {export_file}")
+    finally:
         # Switch back to the original profile if changed
-        if profile != active_profile:
+        if switched:
             checkout_branch(repo, active_profile)
             log(f"Switched back to profile: {active_profile}")
-
-        # Create archive and clean up
-        log("Creating archive...")
-        archive_file = shutil.make_archive(
-            str(export_profile_path), "zip", root_dir=export_profile_path
-        )
-
-        shutil.move(archive_file, export_profile_path.with_suffix(__EXPORT_EXTENSION__))
-
-        log(
-            f"✅ Successfully exported to {export_profile_path.with_suffix(__EXPORT_EXTENSION__)}"
-        )
-    finally:
-        shutil.rmtree(export_profile_path, ignore_errors=True)
@@ -1,12 +1,25 @@
-import shutil
 import socket
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from zipfile import is_zipfile, ZipFile
 from dotctl.utils import log
-from dotctl.handlers.data_handler import copy
-from dotctl.paths import app_profile_directory, app_home_directory, app_config_file
+from dotctl.handlers.data_handler import run_command
+from dotctl.handlers.archive_handler import (
+    ArchiveMember,
+    ArchiveReader,
+    detect_format,
+    open_archive_chain,
+)
+from dotctl.handlers.fs_handler import list_directory, prune_tree
+from dotctl.handlers.sync_handler import (
+    SyncResult,
+    SyncTask,
+    section_tasks,
+    is_writable,
+    prompt_sudo,
+)
+from dotctl.paths import app_profile_directory, app_config_file
 from dotctl.handlers.config_handler import conf_reader
 from dotctl.handlers.git_handler import (
     commit_changes,
@@ -17,25 +30,71 @@ from dotctl.handlers.git_handler import (
     add_changes,
     is_remote_repo,
     push_new_branch,
+    profile_worktree,
+    uses_worktrees,
 )
 from dotctl.exception import exception_handler
-from dotctl import __EXPORT_EXTENSION__, __EXPORT_DATA_DIR__
+from dotctl import __EXPORT_EXTENSION__, __EXPORT_DATA_DIR__, __DEFAULT_JOBS__
 
 
 @dataclass
 class ImporterProps:
-    profile: Path | None
+    profile: list[Path] | None
     skip_sudo: bool
     password: str | None
+    jobs: int
+    store: str | None
 
 
 importer_default_props = ImporterProps(
     profile=None,
     skip_sudo=False,
     password=None,
+    jobs=__DEFAULT_JOBS__,
+    store=None,
 )
 
 
+def _member_names(members: list[ArchiveMember], strip: str = "") -> set[str]:
+    """Relative paths of the members, including their parent directories."""
+    names = set()
+    for member in members:
+        parts = member.name.removeprefix(strip).strip("/").split("/")
+        names.update("/".join(parts[: i + 1]) for i in range(len(parts)))
+    return names
+
+
+def _member_lister(members: list[ArchiveMember]):
+    """Lists archive directories the way list_directory lists real ones."""
+    children: dict[str, set[str]] = {}
+    for member in members:
+        parts = member.name.split("/")
+        for i in range(1, len(parts)):
+            children.setdefault("/".join(parts[:i]), set()).add(parts[i])
+    return lambda directory: sorted(children.get(directory.as_posix(), ()))
+
+
+def _import_entry(archive: ArchiveReader, task: SyncTask, members: list[ArchiveMember]):
+    section_prefix = f"{__EXPORT_DATA_DIR__}/{task.section}/"
+    task.dest_root.mkdir(parents=True, exist_ok=True)
+    archive.extract(members, task.dest_root, strip=section_prefix)
+    # Mirror the entry: drop whatever the archive no longer contains
+    entry_prefix = f"{section_prefix}{task.entry.strip('/')}/"
+    prune_tree(task.dest, _member_names(members, entry_prefix))
+
+
+def _import_privileged(
+    archive: ArchiveReader, task: SyncTask, members: list[ArchiveMember]
+) -> None:
+    run_command(f"mkdir -p {task.dest_root}", task.sudo_pass)
+    archive.extract_privileged(
+        members,
+        task.dest_root,
+        task.sudo_pass,
+        strip=f"{__EXPORT_DATA_DIR__}/{task.section}/",
+    )
+
+
 @exception_handler
 def importer(props: ImporterProps) -> None:
     log("Importing profile...")
@@ -43,21 +102,22 @@ def importer(props: ImporterProps) -> None:
         log("❌ No profile specified")
         return
 
-    profile_path = Path(props.profile)
-
-    if not is_zipfile(profile_path):
-        log("❌ Invalid Profile file")
-        return
+    # A full export, optionally followed by the deltas exported on top of it
+    profile_paths = [Path(path) for path in props.profile]
+    for profile_path in profile_paths:
+        if detect_format(profile_path) is None:
+            log(f"❌ Invalid Profile file: {profile_path}")
+            return
 
-    if profile_path.suffix != __EXPORT_EXTENSION__:
-        log("❌ Unsupported Profile file")
-        return
+        if profile_path.suffix != __EXPORT_EXTENSION__:
+            log(f"❌ Unsupported Profile file: {profile_path}")
+            return
 
     # Setup variables
     profile_dir = Path(app_profile_directory)
     repo = get_repo(profile_dir)
-    profile_name = profile_path.stem
-    temp_profile_dir = Path(app_home_directory) / profile_name
+    profile_name = profile_paths[0].stem
+    export_prefix = f"{__EXPORT_DATA_DIR__}/"
 
     # Create profile branch
     _, remote_profiles, active_profile, all_profiles = get_repo_branches(repo)
@@ -65,69 +125,120 @@ def importer(props: ImporterProps) -> None:
         log(f"❌ Profile '{profile_name}' already exists")
         return
 
-    create_branch(repo=repo, branch=profile_name)
-    log(f"Profile '{profile_name}' created and activated successfully.")
-
-    # Extract profile
-    log("Extracting profile...")
-    temp_profile_dir.mkdir(parents=True, exist_ok=True)
-
-    with ZipFile(profile_path, "r") as zip_file:
-        zip_file.extractall(temp_profile_dir)
-
+    store = Path(props.store) if props.store else None
     try:
-        # Copy the profile
-        copy(
-            temp_profile_dir,
-            profile_dir,
-            skip_sudo=props.skip_sudo,
-            sudo_pass=props.password,
-        )
+        archive = open_archive_chain(profile_paths, store=store)
+    except ValueError as e:
+        log(f"❌ {e}")
+        return
+
+    if uses_worktrees(repo):
+        # Import into a worktree of its own, the active profile stays checked out
+        work_repo = profile_worktree(repo, profile_name, create=True)
+        log(f"Profile '{profile_name}' created successfully.")
+    else:
+        create_branch(repo=repo, branch=profile_name)
+        work_repo = repo
+        log(f"Profile '{profile_name}' created and activated successfully.")
+    work_dir = Path(work_repo.working_tree_dir)
+
+    with archive:
+        members = archive.members()
+
+        # Extract the profile straight into the repo working tree
+        log("Extracting profile...")
+        repo_members = [
+            member
+            for member in members
+            if member.name.split("/")[0] != __EXPORT_DATA_DIR__
+        ]
+        archive.extract(repo_members, work_dir)
+        prune_tree(work_dir, _member_names(repo_members))
 
         # Read the config file
-        config = conf_reader(config_file=Path(app_config_file))
+        config = conf_reader(config_file=work_dir / Path(app_config_file).name)
 
-        # Import "Exported Data"
+        # Route "Exported Data" members to their section location
+        list_names = _member_lister(members)
+        imports: list[tuple[SyncTask, list[ArchiveMember]]] = []
         for name, section in config.export.items():
-            source_base_dir = profile_dir / __EXPORT_DATA_DIR__ / name
-            dest_base_dir = Path(section.location)
-            dest_base_dir.mkdir(parents=True, exist_ok=True)
-
             log(f'Importing "{name}"...')
-            for entry in section.entries:
-                source = source_base_dir / entry
-                dest = dest_base_dir / entry
-                result = copy(
-                    source, dest, skip_sudo=props.skip_sudo, sudo_pass=props.password
+            section_prefix = f"{export_prefix}{name}"
+            for task in section_tasks(
+                name,
+                section.entries,
+                Path(section_prefix),
+                section.path,
+                list_names=list_names,
+            ):
+                entry_prefix = f"{section_prefix}/{task.entry.strip('/')}"
+                entry_members = [
+                    member
+                    for member in members
+                    if member.name == entry_prefix
+                    or member.name.startswith(f"{entry_prefix}/")
+                ]
+                if entry_members:
+                    imports.append((task, entry_members))
+
+        result = SyncResult(skip_sudo=props.skip_sudo, sudo_pass=props.password)
+        writable = [item for item in imports if is_writable(item[0].dest)]
+        privileged = [item for item in imports if item not in writable]
+
+        # Entries are extracted concurrently: v1 reads through ZipFile's lock,
+        # v2 reads member byte ranges with pread and chunks are separate files
+        with ThreadPoolExecutor(max_workers=props.jobs) as executor:
+            futures = {
+                executor.submit(_import_entry, archive, task, entry_members): (
+                    task,
+                    entry_members,
                 )
-
-                # Updated props
-                if result is not None:
-                    skip_sudo, sudo_pass = result
-                    if skip_sudo is not None:
-                        props.skip_sudo = skip_sudo
-                    if sudo_pass is not None:
-                        props.password = sudo_pass
-
-        # Cleanup extracted data after import
-        shutil.rmtree(profile_dir / __EXPORT_DATA_DIR__)
-
-        # Saving changes
-        add_changes(repo=repo)
-        hostname = socket.gethostname()
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        full_message = f"{hostname} | Imported profile: {profile_name} | {timestamp}"
-        commit_changes(repo=repo, message=full_message)
-
-        is_remote, _ = is_remote_repo(repo=repo)
-        if is_remote:
-            push_new_branch(repo=repo)
-        log("Profile Saved successfully!")
-
+                for task, entry_members in writable
+            }
+            for future, item in futures.items():
+                try:
+                    future.result()
+                    result.synced.append(item[0])
+                except PermissionError:
+                    privileged.append(item)
+                except Exception as e:
+                    log(f"Failed to import {item[0].dest}: {e}")
+                    result.failed.append(item[0])
+
+        for task, entry_members in privileged:
+            log(f"PermissionError: {task.dest} requires sudo access.")
+            task.sudo_pass = prompt_sudo(task.dest, result)
+            if not task.sudo_pass:
+                log(f"Skipping {task.dest}")
+                result.skipped.append(task)
+                continue
+            try:
+                _import_privileged(archive, task, entry_members)
+                result.synced.append(task)
+            except Exception as e:
+                log(f"Failed to import {task.dest}: {e}")
+                result.failed.append(task)
+    list_directory.cache_clear()
+
+    # Updated props
+    props.skip_sudo = result.skip_sudo
+    if result.sudo_pass is not None:
+        props.password = result.sudo_pass
+
+    # Saving changes
+    add_changes(repo=work_repo)
+    hostname = socket.gethostname()
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    full_message = f"{hostname} | Imported profile: {profile_name} | {timestamp}"
+    commit_changes(repo=work_repo, message=full_message)
+
+    is_remote, _ = is_remote_repo(repo=work_repo)
+    if is_remote:
+        push_new_branch(repo=work_repo)
+    log("Profile Saved successfully!")
+
+    if work_repo is repo:
         checkout_branch(repo, active_profile)
         log(f"Switched back to profile: {active_profile}")
 
-        log("✅ Profile Imported successfully!")
-
-    finally:
-        shutil.rmtree(temp_profile_dir, ignore_errors=True)
+    log("✅ Profile Imported successfully!")
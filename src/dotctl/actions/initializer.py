@@ -10,7 +10,7 @@ from dotctl.handlers.git_handler import (
     add_changes,
     commit_changes,
     get_repo_branches,
-    git_fetch,
+    fetch_profile,
     is_git_repo,
     clone_repo,
     create_local_repo,
@@ -19,6 +19,8 @@ from dotctl.handlers.git_handler import (
     is_repo_changed,
     push_existing_branch,
     push_new_branch,
+    set_sparse_sections,
+    set_worktrees,
 )
 from dotctl.exception import exception_handler
 from dotctl import __DEFAULT_PROFILE__
@@ -31,6 +33,10 @@ class InitializerProps:
     profile: str | None
     env: str | None
     dest: Path
+    depth: int | None
+    filter: str | None
+    sections: list[str] | None
+    worktrees: bool
 
 
 initializer_default_props = InitializerProps(
@@ -39,6 +45,10 @@ initializer_default_props = InitializerProps(
     profile=None,
     env=None,
     dest=Path(app_profile_directory),
+    depth=None,
+    filter=None,
+    sections=None,
+    worktrees=False,
 )
 
 
@@ -50,20 +60,37 @@ def initialise(props: InitializerProps):
         log("❌ Repository already initialized.")
         return
 
+    if (props.depth or props.filter) and not props.git_url:
+        log("❌ --depth and --filter require a repository URL.")
+        return
+
     if props.git_url:
         # Clone the repository
         log(f"Cloning repository from {props.git_url} to {props.dest}...")
-        repo = clone_repo(props.git_url, props.dest)
+        repo = clone_repo(
+            props.git_url,
+            props.dest,
+            branch=props.profile,
+            depth=props.depth,
+            filter_spec=props.filter,
+            sections=props.sections,
+        )
 
     else:
         # Initialize a new local Git repository
         log(f"Creating a new Git repository at {props.dest}...")
         repo = create_local_repo(props.dest)
+        if repo is not None and props.sections is not None:
+            set_sparse_sections(repo, props.sections)
 
     # Checkout to the provided branch if `profile` is specified
 
     if repo is None:
         raise Exception(f"Failed to initialize profile repo at {props.dest}. ")
+    if props.worktrees:
+        set_worktrees(repo, True)
+        log("Profiles other than the active one will use worktrees of their own.")
+
     if props.profile:
         checkout_branch(repo, props.profile)
         log(f"Switching to Profile `{props.profile}`.")
@@ -90,7 +117,7 @@ def initialise(props: InitializerProps):
         _, remote_profiles, active_profile, all_profiles = get_repo_branches(repo)
         if is_remote:
             if props.profile not in remote_profiles:
-                git_fetch(repo=repo)
+                fetch_profile(repo=repo, branch=props.profile)
                 _, remote_profiles, active_profile, all_profiles = get_repo_branches(
                     repo
                 )
@@ -10,6 +10,9 @@ from dotctl.handlers.git_handler import (
     get_repo_branches,
     git_fetch,
     get_repo_meta,
+    get_tracking_status,
+    is_single_branch,
+    list_remote_profiles,
 )
 
 
@@ -116,12 +119,17 @@ class Profile:
 
 @exception_handler
 def determine_profile_status(
-    repo: Repo, profile: str, local_profiles: set, remote_profiles: set
+    repo: Repo,
+    profile: str,
+    local_profiles: set,
+    remote_profiles: set,
+    tracking: dict[str, tuple[int, int]] | None = None,
 ) -> ProfileStatus:
     try:
         if profile in local_profiles and profile in remote_profiles:
-            ahead = int(repo.git.rev_list(f"origin/{profile}..{profile}", count=True))
-            behind = int(repo.git.rev_list(f"{profile}..origin/{profile}", count=True))
+            if tracking is None:
+                tracking = get_tracking_status(repo)
+            ahead, behind = tracking.get(profile, (0, 0))
 
             if ahead > 0:
                 return ProfileStatus.ahead_remote
@@ -157,6 +165,11 @@ def get_profile_list(props: ListerProps):
         local_profiles, remote_profiles, active_profile, all_profiles = (
             get_repo_branches(repo)
         )
+        if props.fetch and is_single_branch(repo):
+            # Profiles a single-branch clone has not fetched yet
+            remote_profiles |= list_remote_profiles(repo)
+            all_profiles |= remote_profiles
+        tracking = get_tracking_status(repo) if local_profiles & remote_profiles else {}
 
         profile_list = [
             Profile(
@@ -166,6 +179,7 @@ def get_profile_list(props: ListerProps):
                     profile=profile,
                     local_profiles=local_profiles,
                     remote_profiles=remote_profiles,
+                    tracking=tracking,
                 ),
                 active_status=(
                     ProfileActiveStatus.active
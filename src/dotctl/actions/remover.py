@@ -8,7 +8,7 @@ from dotctl.exception import exception_handler
 from dotctl.handlers.git_handler import (
     get_repo,
     get_repo_branches,
-    git_fetch,
+    fetch_profile,
     delete_local_branch,
     delete_remote_branch,
     is_remote_repo,
@@ -43,7 +43,7 @@ def remove(props: RemoverProps):
             return
 
         if props.fetch:
-            git_fetch(repo)
+            fetch_profile(repo, props.profile)
 
         local_profiles, remote_profiles, active_profile, all_profiles = (
             get_repo_branches(repo)
@@ -3,13 +3,21 @@ import socket
 from datetime import datetime
 from pathlib import Path
 from dotctl.utils import log
-from dotctl.handlers.data_handler import copy
+from dotctl.handlers.sync_handler import SyncTask, section_tasks, sync_entries
+from dotctl.handlers.manifest_handler import SaveManifest
+from dotctl.handlers.plan_handler import (
+    build_plan,
+    show_plan,
+    confirm_plan,
+    planned_tasks,
+)
 from dotctl.paths import app_profile_directory, app_config_file
 from dotctl.handlers.config_handler import conf_reader
 from dotctl.handlers.git_handler import (
     get_repo,
     get_repo_branches,
-    git_fetch,
+    fetch_profile,
+    get_sparse_sections,
     pull_changes,
     checkout_branch,
     create_branch,
@@ -21,6 +29,7 @@ from dotctl.handlers.git_handler import (
     push_new_branch,
 )
 from dotctl.exception import exception_handler
+from dotctl import __DEFAULT_JOBS__
 
 
 @dataclass
@@ -28,26 +37,67 @@ class SaverProps:
     skip_sudo: bool
     password: str | None
     profile: str | None
+    jobs: int
+    dry_run: bool
+    plan: bool
+    json: bool
+    no_confirm: bool
 
 
 saver_default_props = SaverProps(
     skip_sudo=False,
     password=None,
     profile=None,
+    jobs=__DEFAULT_JOBS__,
+    dry_run=False,
+    plan=False,
+    json=False,
+    no_confirm=False,
 )
 
 
+def _save_tasks(
+    profile_dir: Path, create_dirs: bool = True, sections: list[str] | None = None
+) -> list[SyncTask]:
+    config = conf_reader(config_file=Path(app_config_file))
+
+    tasks = []
+    for name, section in config.save.items():
+        # Sections outside the sparse-checkout stay as committed
+        if sections is not None and name not in sections:
+            continue
+        source_base_dir = section.path
+        dest_base_dir = profile_dir / name
+        if create_dirs:
+            dest_base_dir.mkdir(exist_ok=True)
+        tasks += section_tasks(name, section.entries, source_base_dir, dest_base_dir)
+    return tasks
+
+
 @exception_handler
 def save(props: SaverProps) -> None:
-    log("Saving profile...")
     profile_dir = Path(app_profile_directory)
     profile = props.profile
     repo = get_repo(profile_dir)
 
+    if props.dry_run:
+        # Planning only reads the working tree: no switch, pull or commit
+        _, _, active_profile, _ = get_repo_branches(repo)
+        if profile is not None and active_profile != profile:
+            log(f"❌ Dry run can only plan the active profile ({active_profile}).")
+            return
+        tasks = _save_tasks(
+            profile_dir, create_dirs=False, sections=get_sparse_sections(repo)
+        )
+        plan = build_plan("save", tasks)
+        show_plan(plan, as_json=props.json)
+        return
+
+    log("Saving profile...")
     _, remote_profiles, active_profile, all_profiles = get_repo_branches(repo)
     if profile is not None and active_profile != profile:
         if profile not in all_profiles:
-            git_fetch(repo)
+            fetch_profile(repo, profile)
             _, remote_profiles, active_profile, all_profiles = get_repo_branches(repo)
         if profile in all_profiles:
             checkout_branch(repo, profile)
@@ -55,30 +105,52 @@ def save(props: SaverProps) -> None:
         else:
             create_branch(repo=repo, branch=profile)
             log(f"Profile '{profile}' created and activated successfully.")
+
+    manifest = SaveManifest(profile or active_profile)
+    sections = get_sparse_sections(repo)
     if pull_changes(repo):
         log("Pulled latest changes from cloud successfully.")
+    tasks = _save_tasks(profile_dir, sections=sections)
+    changed = manifest.changed_tasks(tasks)
 
-    config = conf_reader(config_file=Path(app_config_file))
+    # Nothing touched since the last save: skip rsync and the commit
+    if manifest.repo_unchanged() and not changed:
+        # Files touched without a content change get their new signature,
+        # so the next save does not hash them again
+        for task in tasks:
+            manifest.record(task)
+        manifest.save()
+        log("ℹ️ No changes detected!")
+        return
 
-    for name, section in config.save.items():
-        source_base_dir = Path(section.location)
-        dest_base_dir = profile_dir / name
-        dest_base_dir.mkdir(exist_ok=True)
+    if props.plan:
+        plan = build_plan("save", changed)
+        if not confirm_plan(plan, as_json=props.json, no_confirm=props.no_confirm):
+            log("🛑 Save aborted, no changes were made.")
+            return
+        # Entries left out of the plan already match, so they are recorded as-is
+        tasks, changed = changed, planned_tasks(plan, changed)
+
+    for name in dict.fromkeys(task.section for task in tasks):
         log(f'Saving "{name}"...')
-        for entry in section.entries:
-            source = source_base_dir / entry
-            dest = dest_base_dir / entry
-            result = copy(
-                source, dest, skip_sudo=props.skip_sudo, sudo_pass=props.password
-            )
-
-            # Updated props
-            if result is not None:
-                skip_sudo, sudo_pass = result
-                if skip_sudo is not None:
-                    props.skip_sudo = skip_sudo
-                if sudo_pass is not None:
-                    props.password = sudo_pass
+
+    result = sync_entries(
+        changed,
+        skip_sudo=props.skip_sudo,
+        sudo_pass=props.password,
+        jobs=props.jobs,
+        # The profile repo is only read by git, after the sync
+        inplace=True,
+    )
+
+    # Updated props
+    if result is not None:
+        props.skip_sudo = result.skip_sudo
+        if result.sudo_pass is not None:
+            props.password = result.sudo_pass
+        for task in tasks:
+            if task not in result.failed and task not in result.skipped:
+                manifest.record(task)
 
     add_changes(repo=repo)
     if is_repo_changed(repo=repo):
@@ -90,7 +162,8 @@ def save(props: SaverProps) -> None:
         profile = active_profile if not profile else profile
         if is_remote:
             if profile not in remote_profiles:
-                git_fetch(repo=repo)
+                fetch_profile(repo=repo, branch=profile)
+                _, remote_profiles, _, _ = get_repo_branches(repo)
             if not profile in remote_profiles:
                 push_new_branch(repo=repo)
             else:
@@ -98,3 +171,4 @@ def save(props: SaverProps) -> None:
         log("✅ Profile saved successfully!")
     else:
         log("ℹ️ No changes detected!")
+    manifest.save()
@@ -0,0 +1,55 @@
+from dataclasses import dataclass
+from pathlib import Path
+from dotctl.paths import app_profile_directory, app_config_file
+from dotctl.utils import log
+from dotctl.exception import exception_handler
+from dotctl.handlers.config_handler import conf_reader
+from dotctl.handlers.git_handler import (
+    get_repo,
+    get_sparse_sections,
+    set_sparse_sections,
+)
+
+
+@dataclass
+class SelectorProps:
+    sections: list[str] | None
+    disable: bool
+    profile_dir: Path
+
+
+selector_default_props = SelectorProps(
+    sections=None,
+    disable=False,
+    profile_dir=Path(app_profile_directory),
+)
+
+
+@exception_handler
+def select_sections(props: SelectorProps) -> None:
+    """Limits the sections checked out, applied and saved on this host."""
+    repo = get_repo(props.profile_dir)
+
+    if props.disable:
+        set_sparse_sections(repo, None)
+        log("✅ Every section is checked out again.")
+        return
+
+    if not props.sections:
+        sections = get_sparse_sections(repo)
+        if sections is None:
+            log("ℹ️ Every section is checked out.")
+        else:
+            print("Sections:\n" + "\n".join(f"  {name}" for name in sections))
+        return
+
+    # Other profiles may define sections the active one does not
+    config = conf_reader(config_file=Path(app_config_file))
+    unknown = [name for name in props.sections if name not in config.save]
+    if unknown:
+        log(f"⚠️ Not in the active profile: {', '.join(unknown)}")
+
+    sections = list(dict.fromkeys(props.sections))
+    log("Updating sparse-checkout...")
+    set_sparse_sections(repo, sections)
+    log(f"✅ Checked out sections: {', '.join(sections)}")
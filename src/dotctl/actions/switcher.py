@@ -9,7 +9,7 @@ from dotctl.exception import exception_handler
 from dotctl.handlers.git_handler import (
     get_repo,
     get_repo_branches,
-    git_fetch,
+    fetch_profile,
     checkout_branch,
 )
 from dotctl import __APP_NAME__, __DEFAULT_PROFILE__
@@ -55,12 +55,12 @@ def switch(props: SwitcherProps):
         log(f"ℹ️ Already on the current profile: {profile_name}")
         return
 
-    # Fetch remote branches if requested
-    if props.fetch:
-        git_fetch(repo)
-
-    if profile_name not in all_profiles:
-        git_fetch(repo)
+    # Fetch the profile if requested or not known yet
+    if props.fetch or profile_name not in all_profiles:
+        fetch_profile(repo, profile_name)
+        local_profiles, remote_profiles, active_profile, all_profiles = (
+            get_repo_branches(repo)
+        )
     if profile_name in local_profiles:
         # Checkout local branch
         checkout_branch(repo, profile_name)
@@ -2,7 +2,7 @@ import shutil
 from pathlib import Path
 from datetime import datetime
 from dataclasses import dataclass
-from dotctl.paths import app_profile_directory
+from dotctl.paths import app_profile_directory, app_worktree_directory
 from dotctl.utils import log
 from dotctl.exception import exception_handler
 from dotctl.handlers.git_handler import get_repo
@@ -13,11 +13,13 @@ from dotctl import __APP_NAME__, __DEFAULT_PROFILE__
 class WiperProps:
     no_confirm: bool
     profile_dir: Path
+    worktree_dir: Path
 
 
 wiper_default_props = WiperProps(
     no_confirm=False,
     profile_dir=Path(app_profile_directory),
+    worktree_dir=Path(app_worktree_directory),
 )
 
 
@@ -29,6 +31,7 @@ def wipe(props: WiperProps):
     try:
         if props.no_confirm:
             shutil.rmtree(props.profile_dir)
+            shutil.rmtree(props.worktree_dir, ignore_errors=True)
             log(f"🗑️ Profile directory '{props.profile_dir}' removed successfully.")
             return
         else:
@@ -44,6 +47,7 @@ def wipe(props: WiperProps):
                     shutil.copytree(props.profile_dir, backup_dir)
                     log(f"💾 Backup directory '{backup_dir}' created successfully.")
                 shutil.rmtree(props.profile_dir)
+                shutil.rmtree(props.worktree_dir, ignore_errors=True)
                 log(f"🗑️  Profile directory '{props.profile_dir}' removed successfully.")
                 return
             else:
@@ -1,6 +1,17 @@
 import argparse
-from dotctl import __APP_NAME__, __APP_VERSION__
-from dotctl.validators import valid_git_url, valid_config_file
+from dotctl import (
+    __APP_NAME__,
+    __DEFAULT_JOBS__,
+    __FLEET_JOBS__,
+    __EXPORT_FORMATS__,
+    __EXPORT_FORMAT__,
+)
+from dotctl.validators import (
+    valid_git_url,
+    valid_config_file,
+    valid_jobs,
+    valid_depth,
+)
 
 
 def get_parser() -> argparse.ArgumentParser:
@@ -53,6 +64,38 @@ def get_parser() -> argparse.ArgumentParser:
         default=None,
     )
 
+    init_parser.add_argument(
+        "--depth",
+        type=valid_depth,
+        help="Clone only the last <n> commits of the profile.",
+        metavar="<n>",
+        default=None,
+    )
+
+    init_parser.add_argument(
+        "--filter",
+        type=str,
+        help="Partial clone filter, e.g. blob:none to download file contents on demand.",
+        metavar="<filter-spec>",
+        default=None,
+    )
+
+    init_parser.add_argument(
+        "--sections",
+        nargs="+",
+        type=str,
+        help="Check out only these sections of the profile (see `sparse`).",
+        metavar="<section>",
+        default=None,
+    )
+
+    init_parser.add_argument(
+        "--worktrees",
+        required=False,
+        action="store_true",
+        help="Give profiles other than the active one worktrees of their own.",
+    )
+
     # Save Parser
     save_parser = subparsers.add_parser("save", help="Save current config in a profile")
 
@@ -77,6 +120,40 @@ def get_parser() -> argparse.ArgumentParser:
         help="Profile to save to",
         default=None,
     )
+    save_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=valid_jobs,
+        help=f"Number of entries to sync in parallel (default: {__DEFAULT_JOBS__})",
+        metavar="<jobs>",
+        default=None,
+    )
+    save_parser.add_argument(
+        "--dry-run",
+        required=False,
+        action="store_true",
+        help="Show what save would change without changing anything",
+    )
+    save_parser.add_argument(
+        "--plan",
+        required=False,
+        action="store_true",
+        help="Show what save would change and ask before executing it",
+    )
+    save_parser.add_argument(
+        "--json",
+        required=False,
+        action="store_true",
+        help="Print the plan as JSON",
+    )
+    save_parser.add_argument(
+        "-y",
+        "--no-confirm",
+        required=False,
+        action="store_true",
+        help="Execute the plan without confirmation",
+        default=False,
+    )
 
     # List Parser
     list_parser = subparsers.add_parser(
@@ -227,6 +304,46 @@ def get_parser() -> argparse.ArgumentParser:
         metavar="<timeout>",
         default=0,
     )
+    apply_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=valid_jobs,
+        help=f"Number of entries to sync in parallel (default: {__DEFAULT_JOBS__})",
+        metavar="<jobs>",
+        default=None,
+    )
+    apply_parser.add_argument(
+        "--dry-run",
+        required=False,
+        action="store_true",
+        help="Show what apply would change without changing anything",
+    )
+    apply_parser.add_argument(
+        "--plan",
+        required=False,
+        action="store_true",
+        help="Show what apply would change and ask before executing it",
+    )
+    apply_parser.add_argument(
+        "--json",
+        required=False,
+        action="store_true",
+        help="Print the plan as JSON",
+    )
+    apply_parser.add_argument(
+        "-y",
+        "--no-confirm",
+        required=False,
+        action="store_true",
+        help="Execute the plan without confirmation",
+        default=False,
+    )
+    apply_parser.add_argument(
+        "--checksum",
+        required=False,
+        action="store_true",
+        help="Compare files by content and only write the ones that differ",
+    )
 
     # Export Parser
     export_parser = subparsers.add_parser("export", help="Export profile")
@@ -252,13 +369,43 @@ def get_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Skip all sudo operations",
     )
+    export_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=valid_jobs,
+        help=f"Number of entries to sync in parallel (default: {__DEFAULT_JOBS__})",
+        metavar="<jobs>",
+        default=None,
+    )
+    export_parser.add_argument(
+        "--format",
+        dest="archive_format",
+        choices=__EXPORT_FORMATS__,
+        help=f"Archive format, v2 is a multi-core tar (default: {__EXPORT_FORMAT__})",
+        default=None,
+    )
+    export_parser.add_argument(
+        "--store",
+        type=str,
+        help="Write a deduplicated chunked export, keeping the chunks in this directory",
+        metavar="<dir>",
+        default=None,
+    )
+    export_parser.add_argument(
+        "--since",
+        type=str,
+        help="Only export what changed since this earlier export of the profile",
+        metavar="<file.dtsv>",
+        default=None,
+    )
     # Import Parser
     import_parser = subparsers.add_parser("import", help="Import profile")
 
     import_parser.add_argument(
         "profile",
+        nargs="+",
         type=str,
-        help="Path of dtsv dot profile file to import",
+        help="Path of dtsv dot profile file to import, followed by its deltas in order",
     )
     import_parser.add_argument(
         "-p",
@@ -274,11 +421,81 @@ def get_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Skip all sudo operations",
     )
+    import_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=valid_jobs,
+        help=f"Number of entries to sync in parallel (default: {__DEFAULT_JOBS__})",
+        metavar="<jobs>",
+        default=None,
+    )
+    import_parser.add_argument(
+        "--store",
+        type=str,
+        help="Chunk store of a chunked export (default: the one recorded at export)",
+        metavar="<dir>",
+        default=None,
+    )
     # Pull Parser
     pull_parser = subparsers.add_parser(
         "pull", help="Pull the latest changes from the dotfiles repository"
     )
 
+    # Fleet Parser
+    fleet_parser = subparsers.add_parser(
+        "fleet", help="Apply a profile to many hosts concurrently"
+    )
+    fleet_parser.add_argument(
+        "inventory",
+        type=str,
+        help="File listing the hosts, one ssh destination per line",
+    )
+    fleet_parser.add_argument(
+        "profile",
+        nargs="?",  # Makes positional argument optional
+        type=str,
+        help="Profile to apply (default: active profile)",
+        default=None,
+    )
+    fleet_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=valid_jobs,
+        help=f"Number of hosts to apply to in parallel (default: {__FLEET_JOBS__})",
+        metavar="<jobs>",
+        default=None,
+    )
+    fleet_parser.add_argument(
+        "--transport",
+        choices=("ssh", "local"),
+        help="ssh, or local to treat every host as a local directory (default: ssh)",
+        default=None,
+    )
+    fleet_parser.add_argument(
+        "--skip-hooks",
+        required=False,
+        action="store_true",
+        help="Skip the pre/post apply hooks on the hosts",
+    )
+
+    # Sparse Parser
+    sparse_parser = subparsers.add_parser(
+        "sparse", help="Check out only the sections this host needs"
+    )
+    sparse_parser.add_argument(
+        "sections",
+        nargs="*",
+        type=str,
+        help="Sections to check out (default: show the current selection)",
+        metavar="<section>",
+    )
+    sparse_parser.add_argument(
+        "--disable",
+        required=False,
+        action="store_true",
+        help="Check out every section again",
+    )
+
     # Wipe Parser
     wipe_parser = subparsers.add_parser("wipe", help="Wipe Profiles")
 
@@ -0,0 +1,1036 @@
+import io
+import os
+import json
+import hashlib
+import stat
+import shutil
+import tarfile
+import tempfile
+import subprocess
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED, is_zipfile
+from dotctl import __CHUNK_CACHE_SIZE__, __DEFAULT_JOBS__, __EXPORT_META_FILE__
+from dotctl.paths import app_chunk_directory
+from .fs_handler import EXCLUDE_PATTERNS, is_excluded, remove_path, file_digest
+from .chunk_handler import ChunkStore, split_chunks
+from .codec_handler import (
+    COPY_BUFFER_SIZE,
+    choose_codec,
+    compress_stream,
+    decompress_stream,
+)
+
+# Compressed members up to this size stay in memory, larger ones spill to disk
+SPOOL_SIZE = 8 * 1024 * 1024
+CODEC_HEADER = "DOTCTL.codec"
+SIZE_HEADER = "DOTCTL.size"
+# Zip timestamps have a two-second resolution
+MTIME_WINDOW = 2
+
+
+def _zip_info(arcname: str, mode: int, mtime: float) -> ZipInfo:
+    # Zip timestamps cannot go below 1980
+    date_time = max(datetime.fromtimestamp(mtime), datetime(1980, 1, 1))
+    info = ZipInfo(arcname, date_time=date_time.timetuple()[:6])
+    info.external_attr = (mode & 0xFFFF) << 16
+    if stat.S_ISDIR(mode):
+        info.external_attr |= 0x10
+    return info
+
+
+def collect_members(source: Path) -> list[tuple[str, Path, os.stat_result]]:
+    """
+    Lists everything below source (or source itself) that would be archived.
+
+    Only stat calls are made; unreadable files and directories raise
+    PermissionError here, before anything has been written for the entry.
+    """
+    members = []
+    st = source.lstat()
+    members.append(("", source, st))
+    if stat.S_ISREG(st.st_mode) and not os.access(source, os.R_OK):
+        raise PermissionError(f"Permission denied: '{source}'")
+
+    def walk(directory: Path, prefix: str) -> None:
+        with os.scandir(directory) as entries:
+            for entry in sorted(entries, key=lambda entry: entry.name):
+                if is_excluded(entry.name):
+                    continue
+                path = Path(entry.path)
+                entry_stat = entry.stat(follow_symlinks=False)
+                if stat.S_ISREG(entry_stat.st_mode) and not os.access(path, os.R_OK):
+                    raise PermissionError(f"Permission denied: '{path}'")
+                members.append((f"{prefix}{entry.name}", path, entry_stat))
+                if entry.is_dir(follow_symlinks=False):
+                    walk(path, f"{prefix}{entry.name}/")
+
+    if stat.S_ISDIR(st.st_mode):
+        walk(source, "")
+    return members
+
+
+def _parents(name: str) -> list[str]:
+    parts = name.split("/")
+    return ["/".join(parts[:i]) for i in range(1, len(parts))]
+
+
+def _tar_kind(info: tarfile.TarInfo) -> str | None:
+    if info.isdir():
+        return "dir"
+    if info.issym():
+        return "symlink"
+    if info.isfile():
+        return "file"
+    return None
+
+
+def _unchanged(entry: list, base: list | None) -> bool:
+    if base is None or entry[0] != base[0]:
+        return False
+    kind, size, mtime, mode = entry
+    if kind == "dir":
+        return mode == base[3]
+    same_mtime = abs(mtime - base[2]) < MTIME_WINDOW
+    if kind == "symlink":
+        return same_mtime
+    return same_mtime and size == base[1] and mode == base[3]
+
+
+class ArchiveWriter(ABC):
+    """
+    Writes a profile archive one member at a time.
+
+    Files are streamed from their source straight into the archive, so
+    nothing is staged on disk besides the archive itself. The archive is
+    written under a temporary name and only moved into place on close.
+
+    Given the index of a previous export (see archive_index), the archive
+    becomes a delta: members whose kind, size, mode and mtime match the
+    index are left out, and index entries that no longer exist are
+    recorded as tombstones in the meta.
+    """
+
+    # Store what symlinks point to instead of the links themselves
+    follow_symlinks = False
+
+    def __init__(self, path: Path, meta: dict | None = None, base: dict | None = None):
+        self.path = path
+        self._temp_path = path.with_name(f".{path.name}.part")
+        self.meta = {**(meta or {}), "id": uuid.uuid4().hex}
+        self._base = base
+        self._index: dict[str, list] = {}
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._close(success=exc_type is None)
+        if exc_type is None:
+            os.replace(self._temp_path, self.path)
+        else:
+            self._temp_path.unlink(missing_ok=True)
+
+    @abstractmethod
+    def _close(self, success: bool) -> None: ...
+
+    def _skip(self, name: str, kind: str, mode: int, size: int, mtime: float) -> bool:
+        """Records a member in the index and tells whether the base already has it."""
+        entry = [kind, size if kind == "file" else 0, int(mtime), stat.S_IMODE(mode)]
+        self._index[name] = entry
+        return self._base is not None and _unchanged(entry, self._base.get(name))
+
+    def keep(self, arcname: str) -> None:
+        """Carries the base members below arcname over, e.g. for a skipped entry."""
+        for name, entry in (self._base or {}).items():
+            if name == arcname or name.startswith(f"{arcname}/"):
+                self._index.setdefault(name, entry)
+
+    def _final_meta(self) -> dict:
+        if self._base is None:
+            return self.meta
+        deleted = set(self._base) - set(self._index)
+        # A deleted directory stands for everything below it
+        tombstones = [
+            name
+            for name in sorted(deleted)
+            if not any(parent in deleted for parent in _parents(name))
+        ]
+        return {**self.meta, "deleted": tombstones, "index": self._index}
+
+    @abstractmethod
+    def add_directory(self, arcname: str, mode: int, mtime: float) -> None: ...
+
+    @abstractmethod
+    def add_symlink(
+        self, arcname: str, target: str, mode: int, mtime: float
+    ) -> None: ...
+
+    @abstractmethod
+    def add_stream(
+        self, arcname: str, stream, size: int, mode: int, mtime: float
+    ) -> None: ...
+
+    def add_file(self, arcname: str, path: Path, st: os.stat_result) -> None:
+        with open(path, "rb") as stream:
+            self.add_stream(arcname, stream, st.st_size, st.st_mode, st.st_mtime)
+
+    def add_members(
+        self, arcname: str, members: list[tuple[str, Path, os.stat_result]]
+    ) -> None:
+        """Archives the output of collect_members below arcname."""
+        for rel, path, st in members:
+            name = "/".join(part for part in (arcname, rel) if part)
+            if stat.S_ISDIR(st.st_mode):
+                if name and not self._skip(name, "dir", st.st_mode, 0, st.st_mtime):
+                    self.add_directory(name, st.st_mode, st.st_mtime)
+            elif stat.S_ISLNK(st.st_mode) and self.follow_symlinks:
+                self._add_dereferenced(name, path)
+            elif stat.S_ISLNK(st.st_mode):
+                if not self._skip(name, "symlink", st.st_mode, 0, st.st_mtime):
+                    self.add_symlink(name, os.readlink(path), st.st_mode, st.st_mtime)
+            elif stat.S_ISREG(st.st_mode):
+                if not self._skip(name, "file", st.st_mode, st.st_size, st.st_mtime):
+                    self.add_file(name, path, st)
+
+    def _add_dereferenced(self, name: str, path: Path) -> None:
+        """Archives a symlink as its target; the contents of a linked directory are not."""
+        try:
+            st = path.stat()
+        except OSError:
+            return  # Dangling link
+        if stat.S_ISDIR(st.st_mode):
+            if not self._skip(name, "dir", st.st_mode, 0, st.st_mtime):
+                self.add_directory(name, st.st_mode, st.st_mtime)
+        elif stat.S_ISREG(st.st_mode):
+            if not self._skip(name, "file", st.st_mode, st.st_size, st.st_mtime):
+                self.add_file(name, path, st)
+
+    def add_tree(self, source: Path, arcname: str) -> None:
+        self.add_members(arcname, collect_members(source))
+
+    def add_tar(self, stream, strip: str, arcname: str) -> None:
+        """Re-packs a tar stream, renaming members from `strip` to `arcname`."""
+        with tarfile.open(fileobj=stream, mode="r|") as tar:
+            for member in tar:
+                rel = member.name.removeprefix(strip).lstrip("/")
+                name = "/".join(part for part in (arcname, rel) if part)
+                kind = _tar_kind(member)
+                if kind is None or self._skip(
+                    name, kind, member.mode, member.size, member.mtime
+                ):
+                    continue
+                if kind == "dir":
+                    self.add_directory(name, stat.S_IFDIR | member.mode, member.mtime)
+                elif kind == "symlink":
+                    self.add_symlink(
+                        name, member.linkname, stat.S_IFLNK | 0o777, member.mtime
+                    )
+                else:
+                    self.add_stream(
+                        name,
+                        tar.extractfile(member),
+                        member.size,
+                        stat.S_IFREG | member.mode,
+                        member.mtime,
+                    )
+
+    def add_privileged(self, source: Path, arcname: str, sudo_pass: str) -> None:
+        """Streams a path that needs sudo to read through `sudo tar`."""
+        exclude_options = [f"--exclude={pattern}" for pattern in EXCLUDE_PATTERNS]
+        command = [
+            "sshpass",
+            "-p",
+            sudo_pass,
+            "sudo",
+            "tar",
+            "-cf",
+            "-",
+            *(["--dereference"] if self.follow_symlinks else []),
+            *exclude_options,
+            "-C",
+            str(source.parent),
+            source.name,
+        ]
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(
+                command, stdout=subprocess.PIPE, stderr=stderr, stdin=subprocess.PIPE
+            )
+            try:
+                self.add_tar(process.stdout, source.name, arcname)
+            finally:
+                process.stdout.close()
+                returncode = process.wait()
+            if returncode != 0:
+                stderr.seek(0)
+                raise RuntimeError(stderr.read().decode(errors="replace").strip())
+
+
+class ZipArchiveWriter(ArchiveWriter):
+    """
+    v1 format: a deflate zip, compressed serially.
+
+    The layout is kept readable by dotctl releases that extract it with
+    ZipFile.extractall: symlinks are stored as what they point to and no
+    meta member is written, so v1 exports cannot be deltas.
+    """
+
+    follow_symlinks = True
+
+    def __init__(self, path: Path, meta: dict | None = None, base: dict | None = None):
+        if base is not None:
+            raise ValueError("v1 exports cannot be deltas, use the v2 format")
+        super().__init__(path, meta, base)
+        self._zip = ZipFile(self._temp_path, "w", ZIP_DEFLATED)
+
+    def _close(self, success: bool) -> None:
+        self._zip.close()
+
+    def add_directory(self, arcname: str, mode: int, mtime: float) -> None:
+        self._zip.writestr(_zip_info(f"{arcname}/", mode, mtime), b"")
+
+    def add_symlink(self, arcname: str, target: str, mode: int, mtime: float) -> None:
+        # Only reached for links `tar --dereference` could not resolve
+        pass
+
+    def add_stream(
+        self, arcname: str, stream, size: int, mode: int, mtime: float
+    ) -> None:
+        info = _zip_info(arcname, mode, mtime)
+        info.compress_type = ZIP_DEFLATED
+        info.file_size = size
+        with self._zip.open(info, "w") as member:
+            shutil.copyfileobj(stream, member, COPY_BUFFER_SIZE)
+
+
+class TarArchiveWriter(ArchiveWriter):
+    """
+    v2 format: a plain tar whose file members are compressed one by one.
+
+    Each member gets its own codec, recorded in a PAX header, so that
+    already-compressed media is stored as-is. Members are read and
+    compressed by a worker pool and written back in submission order;
+    at most twice the number of workers are in flight at any time.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        jobs: int = __DEFAULT_JOBS__,
+        meta: dict | None = None,
+        base: dict | None = None,
+    ):
+        super().__init__(path, {**(meta or {}), "format": 2}, base)
+        self._file = open(self._temp_path, "wb")
+        self._tar = tarfile.open(
+            fileobj=self._file, mode="w|", format=tarfile.PAX_FORMAT
+        )
+        self._executor = ThreadPoolExecutor(max_workers=jobs)
+        self._pending: deque[Future] = deque()
+        self._window = jobs * 2
+
+        self._add_meta(self.meta)
+
+    def _add_meta(self, meta: dict) -> None:
+        data = json.dumps(meta).encode()
+        info = tarfile.TarInfo(__EXPORT_META_FILE__)
+        info.size = len(data)
+        info.mtime = int(datetime.now().timestamp())
+        self._tar.addfile(info, io.BytesIO(data))
+
+    def _close(self, success: bool) -> None:
+        try:
+            if success:
+                self._drain(0)
+                # Tombstones and the index are only known once every member is in
+                if self._base is not None:
+                    self._add_meta(self._final_meta())
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            for future in self._pending:
+                if future.done() and not future.exception():
+                    _, data = future.result()
+                    if data is not None:
+                        data.close()
+            self._tar.close()
+            self._file.close()
+
+    def _drain(self, limit: int) -> None:
+        while len(self._pending) > limit:
+            info, data = self._pending.popleft().result()
+            try:
+                self._tar.addfile(info, data)
+            finally:
+                if data is not None:
+                    data.close()
+
+    def _submit(self, function, *args) -> None:
+        self._pending.append(self._executor.submit(function, *args))
+        self._drain(self._window)
+
+    def _ready(self, info: tarfile.TarInfo) -> None:
+        future = Future()
+        future.set_result((info, None))
+        self._pending.append(future)
+        self._drain(self._window)
+
+    @staticmethod
+    def _tar_info(arcname: str, mode: int, mtime: float) -> tarfile.TarInfo:
+        info = tarfile.TarInfo(arcname)
+        info.mode = stat.S_IMODE(mode)
+        info.mtime = mtime
+        return info
+
+    @classmethod
+    def _compress_member(cls, info: tarfile.TarInfo, source, size: int):
+        codec = choose_codec(info.name, size)
+        if codec == "store":
+            # Stored members are copied straight from the source at write time
+            if isinstance(source, io.BufferedReader):
+                size = os.fstat(source.fileno()).st_size
+            info.size = size
+            info.pax_headers = {CODEC_HEADER: codec, SIZE_HEADER: str(size)}
+            return info, source
+
+        data = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+        try:
+            with source:
+                compress_stream(codec, source, data)
+            info.size = data.tell()
+            data.seek(0)
+        except BaseException:
+            data.close()
+            raise
+        info.pax_headers = {CODEC_HEADER: codec, SIZE_HEADER: str(size)}
+        return info, data
+
+    @classmethod
+    def _compress_file(cls, info: tarfile.TarInfo, path: Path, size: int):
+        return cls._compress_member(info, open(path, "rb"), size)
+
+    def add_directory(self, arcname: str, mode: int, mtime: float) -> None:
+        info = self._tar_info(arcname, mode, mtime)
+        info.type = tarfile.DIRTYPE
+        self._ready(info)
+
+    def add_symlink(self, arcname: str, target: str, mode: int, mtime: float) -> None:
+        info = self._tar_info(arcname, 0o777, mtime)
+        info.type = tarfile.SYMTYPE
+        info.linkname = target
+        self._ready(info)
+
+    def add_file(self, arcname: str, path: Path, st: os.stat_result) -> None:
+        info = self._tar_info(arcname, st.st_mode, st.st_mtime)
+        self._submit(self._compress_file, info, path, st.st_size)
+
+    def add_stream(
+        self, arcname: str, stream, size: int, mode: int, mtime: float
+    ) -> None:
+        # Sequential streams (e.g. from sudo tar) are buffered before compressing
+        buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+        shutil.copyfileobj(stream, buffer, COPY_BUFFER_SIZE)
+        buffer.seek(0)
+        info = self._tar_info(arcname, mode, mtime)
+        self._submit(self._compress_member, info, buffer, size)
+
+
+class ChunkedArchiveWriter(ArchiveWriter):
+    """
+    Chunked format: a JSON manifest whose files point into a ChunkStore.
+
+    File content is split into content-defined chunks that are written to
+    the store only if no earlier export put them there, so exports of
+    similar profiles share nearly all their bytes. Files are hashed and
+    chunked by a worker pool; the manifest is written on close.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        store: Path,
+        jobs: int = __DEFAULT_JOBS__,
+        meta: dict | None = None,
+        base: dict | None = None,
+    ):
+        super().__init__(path, {**(meta or {}), "store": str(store.resolve())}, base)
+        self._store = ChunkStore(store)
+        self._members: list[dict | Future] = []
+        self._executor = ThreadPoolExecutor(max_workers=jobs)
+
+    def _close(self, success: bool) -> None:
+        try:
+            if success:
+                members = [
+                    member.result() if isinstance(member, Future) else member
+                    for member in self._members
+                ]
+                manifest = {
+                    "format": "chunked",
+                    "meta": self._final_meta(),
+                    "members": members,
+                }
+                self._temp_path.write_text(json.dumps(manifest))
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def _member(arcname: str, kind: str, mode: int, mtime: float, **extra) -> dict:
+        return {
+            "name": arcname,
+            "kind": kind,
+            "mode": stat.S_IMODE(mode),
+            "mtime": mtime,
+            **extra,
+        }
+
+    def _store_content(self, name: str, digest: str, stream, size: int) -> list[str]:
+        chunks = self._store.get_recipe(digest)
+        if chunks is None:
+            codec = choose_codec(name, size)
+            chunks = [
+                self._store.put_chunk(chunk, codec) for chunk in split_chunks(stream)
+            ]
+            self._store.put_recipe(digest, chunks)
+        return chunks
+
+    def _store_file(self, arcname: str, path: Path, st: os.stat_result) -> dict:
+        digest = file_digest(path)
+        with open(path, "rb") as stream:
+            chunks = self._store_content(arcname, digest, stream, st.st_size)
+        return self._member(
+            arcname, "file", st.st_mode, st.st_mtime, size=st.st_size, chunks=chunks
+        )
+
+    def add_directory(self, arcname: str, mode: int, mtime: float) -> None:
+        self._members.append(self._member(arcname, "dir", mode, mtime))
+
+    def add_symlink(self, arcname: str, target: str, mode: int, mtime: float) -> None:
+        self._members.append(
+            self._member(arcname, "symlink", 0o777, mtime, target=target)
+        )
+
+    def add_file(self, arcname: str, path: Path, st: os.stat_result) -> None:
+        self._members.append(self._executor.submit(self._store_file, arcname, path, st))
+
+    def add_stream(
+        self, arcname: str, stream, size: int, mode: int, mtime: float
+    ) -> None:
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as buffer:
+            digest = hashlib.blake2b(digest_size=20)
+            while data := stream.read(COPY_BUFFER_SIZE):
+                digest.update(data)
+                buffer.write(data)
+            buffer.seek(0)
+            chunks = self._store_content(arcname, digest.hexdigest(), buffer, size)
+        self._members.append(
+            self._member(arcname, "file", mode, mtime, size=size, chunks=chunks)
+        )
+
+
+def open_archive_writer(
+    path: Path,
+    archive_format: str = "v1",
+    jobs: int = __DEFAULT_JOBS__,
+    meta: dict | None = None,
+    store: Path | None = None,
+    base: dict | None = None,
+) -> ArchiveWriter:
+    if store is not None:
+        return ChunkedArchiveWriter(path, store, jobs=jobs, meta=meta, base=base)
+    if archive_format == "v2":
+        return TarArchiveWriter(path, jobs=jobs, meta=meta, base=base)
+    return ZipArchiveWriter(path, meta=meta, base=base)
+
+
+def _member_path(root: Path, name: str, checked: set[Path] | None = None) -> Path:
+    """
+    Returns where a member lands below the already resolved root.
+
+    checked holds parents already known to resolve below root, resolving
+    every parent again costs more than writing most members. Callers
+    must empty it whenever they extract a symlink.
+    """
+    target = Path(os.path.normpath(root / name))
+    if target == root:
+        return target
+    # Reject `..` members as well as members placed below an extracted symlink
+    if root not in target.parents:
+        raise ValueError(f"Archive member escapes the destination: {name}")
+    parent = target.parent
+    if checked is None or parent not in checked:
+        if not parent.resolve().is_relative_to(root):
+            raise ValueError(f"Archive member escapes the destination: {name}")
+        if checked is not None:
+            checked.add(parent)
+    return target
+
+
+@dataclass
+class ArchiveMember:
+    name: str
+    kind: str  # "file", "dir" or "symlink"
+    mode: int
+    mtime: float
+    size: int
+    handle: ZipInfo | tarfile.TarInfo
+
+    @property
+    def is_dir(self) -> bool:
+        return self.kind == "dir"
+
+    @property
+    def is_symlink(self) -> bool:
+        return self.kind == "symlink"
+
+
+class ArchiveReader(ABC):
+    """Reads a profile archive and extracts members straight to their destination."""
+
+    format = ""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.meta: dict = {}
+
+    def __enter__(self) -> "ArchiveReader":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    @abstractmethod
+    def close(self) -> None: ...
+
+    @abstractmethod
+    def members(self) -> list[ArchiveMember]: ...
+
+    @abstractmethod
+    def open(self, member: ArchiveMember):
+        """Returns a binary stream with the uncompressed content of a file member."""
+
+    @abstractmethod
+    def read_link(self, member: ArchiveMember) -> str: ...
+
+    def extract(
+        self, members: list[ArchiveMember], dest: Path, strip: str = ""
+    ) -> None:
+        """Extracts members below dest, restoring symlinks, permissions and mtimes."""
+        root = dest.resolve()
+        checked: set[Path] = set()
+        for member in members:
+            target = _member_path(root, member.name.removeprefix(strip), checked)
+            if member.is_dir:
+                if target.is_symlink() or (target.exists() and not target.is_dir()):
+                    remove_path(target)
+                target.mkdir(parents=True, exist_ok=True)
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            remove_path(target)
+            if member.is_symlink:
+                os.symlink(self.read_link(member), target)
+                checked.clear()
+                continue
+            with self.open(member) as source, open(target, "wb") as file:
+                shutil.copyfileobj(source, file, COPY_BUFFER_SIZE)
+            if member.mode:
+                os.chmod(target, member.mode)
+            os.utime(target, (member.mtime, member.mtime))
+
+    def extract_privileged(
+        self, members: list[ArchiveMember], dest: Path, sudo_pass: str, strip: str = ""
+    ) -> None:
+        """
+        Extracts members below dest by piping them into `sudo tar -x`.
+
+        --recursive-unlink empties existing directories before they are
+        extracted, which mirrors the --delete behaviour of the sync engine.
+        """
+        command = [
+            "sshpass",
+            "-p",
+            sudo_pass,
+            "sudo",
+            "tar",
+            "-x",
+            "--recursive-unlink",
+            "-f",
+            "-",
+            "-C",
+            str(dest),
+        ]
+        with tempfile.TemporaryFile() as stderr:
+            process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=stderr)
+            try:
+                with tarfile.open(fileobj=process.stdin, mode="w|") as tar:
+                    root = dest.resolve()
+                    for member in members:
+                        name = member.name.removeprefix(strip)
+                        _member_path(root, name)
+                        self._add_to_tar(tar, member, name)
+            finally:
+                process.stdin.close()
+                returncode = process.wait()
+            if returncode != 0:
+                stderr.seek(0)
+                raise RuntimeError(stderr.read().decode(errors="replace").strip())
+
+    def _add_to_tar(
+        self, tar: tarfile.TarFile, member: ArchiveMember, name: str
+    ) -> None:
+        tar_info = tarfile.TarInfo(name)
+        tar_info.mtime = int(member.mtime)
+        if member.is_dir:
+            tar_info.type = tarfile.DIRTYPE
+            tar_info.mode = member.mode or 0o755
+            tar.addfile(tar_info)
+        elif member.is_symlink:
+            tar_info.type = tarfile.SYMTYPE
+            tar_info.mode = 0o777
+            tar_info.linkname = self.read_link(member)
+            tar.addfile(tar_info)
+        else:
+            tar_info.mode = member.mode or 0o644
+            tar_info.size = member.size
+            with self.open(member) as source:
+                tar.addfile(tar_info, source)
+
+
+class ZipArchiveReader(ArchiveReader):
+    format = "v1"
+
+    def __init__(self, path: Path):
+        super().__init__(path)
+        self._zip = ZipFile(path, "r")
+        self._infos = self._zip.infolist()
+        for info in self._infos:
+            if info.filename == __EXPORT_META_FILE__:
+                self.meta = json.loads(self._zip.read(info))
+                self._infos.remove(info)
+                break
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def members(self) -> list[ArchiveMember]:
+        members = []
+        for info in self._infos:
+            mode = info.external_attr >> 16
+            if info.is_dir():
+                kind = "dir"
+            elif stat.S_ISLNK(mode):
+                kind = "symlink"
+            else:
+                kind = "file"
+            members.append(
+                ArchiveMember(
+                    name=info.filename.rstrip("/"),
+                    kind=kind,
+                    mode=stat.S_IMODE(mode),
+                    mtime=datetime(*info.date_time).timestamp(),
+                    size=info.file_size,
+                    handle=info,
+                )
+            )
+        return members
+
+    def open(self, member: ArchiveMember):
+        return self._zip.open(member.handle)
+
+    def read_link(self, member: ArchiveMember) -> str:
+        return self._zip.read(member.handle).decode()
+
+
+class _RangeReader(io.RawIOBase):
+    """Reads one byte range of a file with pread, so readers can share the fd."""
+
+    def __init__(self, fd: int, offset: int, size: int):
+        self._fd = fd
+        self._position = offset
+        self._end = offset + size
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), self._end - self._position)
+        if size <= 0:
+            return 0
+        data = os.pread(self._fd, size, self._position)
+        buffer[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+
+class TarArchiveReader(ArchiveReader):
+    format = "v2"
+
+    def __init__(self, path: Path):
+        super().__init__(path)
+        self._file = open(path, "rb")
+        self._tar = tarfile.open(fileobj=self._file, mode="r:")
+        self._infos = []
+        # Walks every header up front: each member has its own pax header
+        # (codec and size), so opening costs two header parses per member
+        # and is the one step where v2 is slower than the zip directory.
+        # Deltas repeat the meta at the end, with their tombstones and index
+        for info in self._tar.getmembers():
+            if info.name == __EXPORT_META_FILE__:
+                self.meta.update(json.loads(self._tar.extractfile(info).read()))
+            else:
+                self._infos.append(info)
+
+    def close(self) -> None:
+        self._tar.close()
+        self._file.close()
+
+    def members(self) -> list[ArchiveMember]:
+        members = []
+        for info in self._infos:
+            kind = _tar_kind(info)
+            if kind is None:
+                continue
+            members.append(
+                ArchiveMember(
+                    name=info.name.rstrip("/"),
+                    kind=kind,
+                    mode=info.mode,
+                    mtime=info.mtime,
+                    size=int(info.pax_headers.get(SIZE_HEADER, info.size)),
+                    handle=info,
+                )
+            )
+        return members
+
+    def open(self, member: ArchiveMember):
+        info = member.handle
+        raw = io.BufferedReader(
+            _RangeReader(self._file.fileno(), info.offset_data, info.size),
+            COPY_BUFFER_SIZE,
+        )
+        return decompress_stream(info.pax_headers.get(CODEC_HEADER, "store"), raw)
+
+    def read_link(self, member: ArchiveMember) -> str:
+        return member.handle.linkname
+
+
+class _ChunkReader(io.RawIOBase):
+    def __init__(self, load_chunk, chunks: list[str]):
+        self._load_chunk = load_chunk
+        self._chunks = iter(chunks)
+        self._data = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._data:
+            digest = next(self._chunks, None)
+            if digest is None:
+                return 0
+            self._data = memoryview(self._load_chunk(digest))
+        size = min(len(buffer), len(self._data))
+        buffer[:size] = self._data[:size]
+        self._data = self._data[size:]
+        return size
+
+
+class ChunkedArchiveReader(ArchiveReader):
+    """
+    Reads a chunked manifest, pulling chunks through the local chunk cache.
+
+    Chunks missing from the cache are copied from the store once; chunks
+    already cached by an earlier import are never fetched again. Closing
+    the reader prunes the cache back to cache_size bytes, keeping the
+    chunks it read.
+    """
+
+    format = "chunked"
+
+    def __init__(
+        self,
+        path: Path,
+        store: Path | None = None,
+        cache: Path = Path(app_chunk_directory),
+        cache_size: int = __CHUNK_CACHE_SIZE__ * 1024 * 1024,
+    ):
+        super().__init__(path)
+        manifest = json.loads(path.read_text())
+        self.meta = manifest.get("meta", {})
+        self._manifest_members = manifest.get("members", [])
+        self._store = ChunkStore(Path(store or self.meta["store"]))
+        self._cache = ChunkStore(cache)
+        self._cache_size = cache_size
+        self._used: set[str] = set()
+
+    def _cached(self) -> bool:
+        return self._store.root.resolve() != self._cache.root.resolve()
+
+    def close(self) -> None:
+        # The store itself is shared by exports and never pruned here
+        if self._used and self._cached():
+            self._cache.prune(self._cache_size, keep=self._used)
+
+    def members(self) -> list[ArchiveMember]:
+        return [
+            ArchiveMember(
+                name=member["name"],
+                kind=member["kind"],
+                mode=member["mode"],
+                mtime=member["mtime"],
+                size=member.get("size", 0),
+                handle=member,
+            )
+            for member in self._manifest_members
+        ]
+
+    def _load_chunk(self, digest: str) -> bytes:
+        if self._cached():
+            self._cache.fetch_chunk(digest, self._store)
+            self._used.add(digest)
+        return self._cache.get_chunk(digest)
+
+    def open(self, member: ArchiveMember):
+        return io.BufferedReader(
+            _ChunkReader(self._load_chunk, member.handle["chunks"]), COPY_BUFFER_SIZE
+        )
+
+    def read_link(self, member: ArchiveMember) -> str:
+        return member.handle["target"]
+
+
+def _is_chunked_manifest(path: Path) -> bool:
+    with open(path, "rb") as file:
+        if file.read(1) != b"{":
+            return False
+    try:
+        return json.loads(path.read_text()).get("format") == "chunked"
+    except (ValueError, UnicodeDecodeError):
+        return False
+
+
+def _has_tar_magic(path: Path) -> bool:
+    with open(path, "rb") as f:
+        header = f.read(tarfile.BLOCKSIZE)
+    return header[257:262] == tarfile.POSIX_MAGIC[:5]
+
+
+def detect_format(path: Path) -> str | None:
+    """Tells a v1 zip, v2 tar and chunked manifest apart; None when it is neither."""
+    if not path.is_file():
+        return None
+    # is_zipfile finds a zip stored as the last member of a tar, so the
+    # tar header is checked first
+    if _has_tar_magic(path):
+        return TarArchiveReader.format
+    if is_zipfile(path):
+        return ZipArchiveReader.format
+    if tarfile.is_tarfile(path):
+        return TarArchiveReader.format
+    if _is_chunked_manifest(path):
+        return ChunkedArchiveReader.format
+    return None
+
+
+def open_archive(path: Path, store: Path | None = None) -> ArchiveReader:
+    archive_format = detect_format(path)
+    if archive_format == TarArchiveReader.format:
+        return TarArchiveReader(path)
+    if archive_format == ChunkedArchiveReader.format:
+        return ChunkedArchiveReader(path, store=store)
+    return ZipArchiveReader(path)
+
+
+def archive_id(archive: ArchiveReader) -> str:
+    """Identifies an export; archives written before ids existed use their digest."""
+    return archive.meta.get("id") or file_digest(archive.path)
+
+
+def archive_index(archive: ArchiveReader) -> dict[str, list]:
+    """
+    The state an export leaves behind, as name -> [kind, size, mtime, mode].
+
+    Deltas carry the index of the whole chain in their meta, full exports
+    are indexed from their members.
+    """
+    if "index" in archive.meta:
+        return archive.meta["index"]
+    return {
+        member.name: [
+            member.kind,
+            member.size if member.kind == "file" else 0,
+            int(member.mtime),
+            member.mode,
+        ]
+        for member in archive.members()
+    }
+
+
+class ArchiveChain(ArchiveReader):
+    """
+    A full export followed by the deltas exported on top of it.
+
+    Members resolve to their latest version across the chain, minus
+    tombstones, so each file is extracted once from the archive that
+    last changed it.
+    """
+
+    format = "chain"
+
+    def __init__(self, archives: list[ArchiveReader]):
+        super().__init__(archives[-1].path)
+        self.archives = archives
+        self.meta = archives[-1].meta
+        if "base" in archives[0].meta:
+            raise ValueError(
+                f"{archives[0].path.name} is a delta export, import it after its base"
+            )
+        for base, delta in zip(archives, archives[1:]):
+            if delta.meta.get("base") != archive_id(base):
+                raise ValueError(
+                    f"{delta.path.name} was not exported on top of {base.path.name}"
+                )
+
+    def close(self) -> None:
+        for archive in self.archives:
+            archive.close()
+
+    def members(self) -> list[ArchiveMember]:
+        resolved: dict[str, ArchiveMember] = {}
+        for archive in self.archives:
+            deleted = set(archive.meta.get("deleted", []))
+            if deleted:
+                resolved = {
+                    name: member
+                    for name, member in resolved.items()
+                    if name not in deleted
+                    and not any(parent in deleted for parent in _parents(name))
+                }
+            for member in archive.members():
+                resolved[member.name] = replace(member, handle=(archive, member))
+        return list(resolved.values())
+
+    def open(self, member: ArchiveMember):
+        archive, inner = member.handle
+        return archive.open(inner)
+
+    def read_link(self, member: ArchiveMember) -> str:
+        archive, inner = member.handle
+        return archive.read_link(inner)
+
+
+def open_archive_chain(paths: list[Path], store: Path | None = None) -> ArchiveChain:
+    """Opens a full export and its deltas, in the order they were exported."""
+    archives = []
+    try:
+        for path in paths:
+            archives.append(open_archive(path, store=store))
+        return ArchiveChain(archives)
+    except BaseException:
+        for archive in archives:
+            archive.close()
+        raise
@@ -0,0 +1,151 @@
+import os
+import json
+import hashlib
+import tempfile
+from pathlib import Path
+from .codec_handler import COPY_BUFFER_SIZE, compress_bytes, decompress_bytes
+
+CHUNK_MIN_SIZE = 256 * 1024
+CHUNK_MAX_SIZE = 4 * 1024 * 1024
+# Every byte is mapped to one bit and a chunk ends where the last ANCHOR_BITS
+# bits match a fixed pattern. The match depends on the preceding bytes only,
+# and translate/find keep the whole scan in C.
+ANCHOR_BITS = 20
+_BIT_TABLE = bytes(
+    hashlib.blake2b(bytes([i]), digest_size=1).digest()[0] & 1 for i in range(256)
+)
+_ANCHOR = bytes(
+    int(bit) for bit in f"{0x9E3779B9 & ((1 << ANCHOR_BITS) - 1):0{ANCHOR_BITS}b}"
+)
+_CODEC_TAGS = {"store": b"s", "gzip": b"g", "zstd": b"z"}
+_TAG_CODECS = {tag: codec for codec, tag in _CODEC_TAGS.items()}
+
+
+def chunk_digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def _find_cut(data: bytes) -> int:
+    end = min(len(data), CHUNK_MAX_SIZE)
+    if end <= CHUNK_MIN_SIZE:
+        return end
+    bits = data[:end].translate(_BIT_TABLE)
+    index = bits.find(_ANCHOR, CHUNK_MIN_SIZE - ANCHOR_BITS, end)
+    return index + ANCHOR_BITS if index >= 0 else end
+
+
+def split_chunks(stream):
+    """
+    Splits a stream into content-defined chunks.
+
+    Cut points depend on the content only, so an insertion early in a file
+    shifts a single chunk instead of every chunk after it.
+    """
+    buffer = b""
+    eof = False
+    while True:
+        while not eof and len(buffer) < CHUNK_MAX_SIZE:
+            data = stream.read(COPY_BUFFER_SIZE * 4)
+            eof = not data
+            buffer += data
+        if not buffer:
+            return
+        cut = _find_cut(buffer)
+        yield buffer[:cut]
+        buffer = buffer[cut:]
+
+
+class ChunkStore:
+    """
+    Content-addressed chunk store shared by chunked exports.
+
+    Chunks live under chunks/<xx>/<digest> with a one-byte codec tag in
+    front of the payload. Whole-file recipes under files/<xx>/<digest>
+    map a file digest to its chunks, so a file already in the store is
+    only hashed, never chunked or compressed again.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def _path(self, kind: str, digest: str) -> Path:
+        return self.root / kind / digest[:2] / digest
+
+    def _write(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=".dotctl-")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def has_chunk(self, digest: str) -> bool:
+        return self._path("chunks", digest).exists()
+
+    def put_chunk(self, data: bytes, codec: str) -> str:
+        digest = chunk_digest(data)
+        if not self.has_chunk(digest):
+            payload = compress_bytes(codec, data)
+            if codec != "store" and len(payload) >= len(data):
+                codec, payload = "store", data
+            self._write(self._path("chunks", digest), _CODEC_TAGS[codec] + payload)
+        return digest
+
+    def get_chunk(self, digest: str) -> bytes:
+        raw = self._path("chunks", digest).read_bytes()
+        data = decompress_bytes(_TAG_CODECS[raw[:1]], raw[1:])
+        if chunk_digest(data) != digest:
+            raise ValueError(f"Corrupted chunk: {digest}")
+        return data
+
+    def fetch_chunk(self, digest: str, source: "ChunkStore") -> None:
+        """
+        Copies a chunk from another store unless it is already present.
+
+        A chunk already present has its mtime refreshed, which is what
+        prune evicts by.
+        """
+        path = self._path("chunks", digest)
+        if path.exists():
+            os.utime(path)
+        else:
+            self._write(path, source._path("chunks", digest).read_bytes())
+
+    def prune(self, max_size: int, keep: set[str] = frozenset()) -> int:
+        """
+        Removes the least recently fetched chunks until the store fits max_size bytes.
+
+        Chunks in keep are never removed. Returns the number of bytes freed.
+        """
+        chunks = []
+        for path in self.root.glob("chunks/*/*"):
+            if path.name.startswith("."):
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            chunks.append((st.st_mtime, st.st_size, path))
+        excess = sum(size for _, size, _ in chunks) - max_size
+        freed = 0
+        for _, size, path in sorted(chunks):
+            if freed >= excess:
+                break
+            if path.name in keep:
+                continue
+            path.unlink(missing_ok=True)
+            freed += size
+        return freed
+
+    def get_recipe(self, file_digest: str) -> list[str] | None:
+        try:
+            chunks = json.loads(self._path("files", file_digest).read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        return chunks if all(self.has_chunk(chunk) for chunk in chunks) else None
+
+    def put_recipe(self, file_digest: str, chunks: list[str]) -> None:
+        self._write(self._path("files", file_digest), json.dumps(chunks).encode())
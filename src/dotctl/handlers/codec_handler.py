@@ -0,0 +1,91 @@
+import io
+import gzip
+import shutil
+from pathlib import Path
+
+COPY_BUFFER_SIZE = 1024 * 1024
+# Compressing these again costs CPU time and saves next to nothing
+STORED_SUFFIXES = {
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".webp",
+    ".avif",
+    ".heic",
+    ".woff",
+    ".woff2",
+    ".svgz",
+    ".zip",
+    ".gz",
+    ".tgz",
+    ".xz",
+    ".bz2",
+    ".zst",
+    ".7z",
+    ".rar",
+    ".mp3",
+    ".ogg",
+    ".oga",
+    ".flac",
+    ".mp4",
+    ".mkv",
+    ".webm",
+    ".jar",
+    ".dtsv",
+}
+STORE_BELOW = 512
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def choose_codec(name: str, size: int) -> str:
+    """Picks a per-member codec: store, zstd or gzip when zstandard is missing."""
+    if size < STORE_BELOW or Path(name).suffix.lower() in STORED_SUFFIXES:
+        return "store"
+    return "zstd" if _zstandard() else "gzip"
+
+
+def compress_stream(codec: str, source, dest) -> None:
+    if codec == "store":
+        shutil.copyfileobj(source, dest, COPY_BUFFER_SIZE)
+    elif codec == "zstd":
+        _zstandard().ZstdCompressor(level=3).copy_stream(source, dest)
+    elif codec == "gzip":
+        with gzip.GzipFile(fileobj=dest, mode="wb", compresslevel=6, mtime=0) as out:
+            shutil.copyfileobj(source, out, COPY_BUFFER_SIZE)
+    else:
+        raise ValueError(f"Unknown codec: {codec}")
+
+
+def decompress_stream(codec: str, raw):
+    """Wraps a raw binary stream so that reading it yields the original content."""
+    if codec == "store":
+        return raw
+    if codec == "zstd":
+        zstandard = _zstandard()
+        if zstandard is None:
+            raise RuntimeError(
+                "This archive uses zstd compression, install it with `pip install dotctl[zstd]`"
+            )
+        return zstandard.ZstdDecompressor().stream_reader(raw)
+    if codec == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def compress_bytes(codec: str, data: bytes) -> bytes:
+    output = io.BytesIO()
+    compress_stream(codec, io.BytesIO(data), output)
+    return output.getvalue()
+
+
+def decompress_bytes(codec: str, data: bytes) -> bytes:
+    with decompress_stream(codec, io.BytesIO(data)) as stream:
+        return stream.read()
@@ -1,8 +1,9 @@
 import os
-import yaml
 import re
+import json
+import hashlib
 import shutil
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from dotctl import __BASE_DIR__
 from dotctl.exception import exception_handler
@@ -15,6 +16,7 @@ from dotctl.paths import (
     sys_share_directory,
     app_home_directory,
     app_config_file,
+    app_cache_directory,
 )
 from dotctl.utils import log
 
@@ -23,6 +25,10 @@ from dotctl.utils import log
 class EntryConfig:
     entries: list[str]
     location: str
+    path: Path = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.path = Path(self.location)
 
 
 @dataclass
@@ -31,26 +37,6 @@ class Config:
     export: dict[str, EntryConfig]
 
 
-def ends_with(grouped_regex, path) -> str:
-    occurrence = re.search(grouped_regex, path).group()
-    dirs = os.listdir(path[0 : path.find(occurrence)])
-    ends_with_text = re.search(grouped_regex, occurrence).group(2)
-    for directory in dirs:
-        if directory.endswith(ends_with_text):
-            return path.replace(occurrence, directory)
-    return occurrence
-
-
-def begins_with(grouped_regex, path) -> str:
-    occurrence = re.search(grouped_regex, path).group()
-    dirs = os.listdir(path[0 : path.find(occurrence)])
-    ends_with_text = re.search(grouped_regex, occurrence).group(2)
-    for directory in dirs:
-        if directory.startswith(ends_with_text):
-            return path.replace(occurrence, directory)
-    return occurrence
-
-
 TOKEN_SYMBOL = "$"
 tokens = {
     "keywords": {
@@ -65,26 +51,95 @@ tokens = {
 }
 
 
+CONFIG_CACHE_VERSION = 1
+# Parsed configs of this process, keyed like the on-disk cache
+_config_memo: dict[tuple, Config] = {}
+
+
 def parse_keywords(tokens_: dict, token_symbol: str, config: dict):
+    keywords = tokens_["keywords"]
+    # Longest keys first, so that a key never matches the prefix of another
+    pattern = re.compile(
+        re.escape(token_symbol)
+        + "("
+        + "|".join(map(re.escape, sorted(keywords, key=len, reverse=True)))
+        + ")"
+    )
     for item in config:
         for name in config[item]:
-            for key, value in tokens_["keywords"].items():
-                word = token_symbol + key
-                location = config[item][name]["location"]
-                if word in location:
-                    config[item][name]["location"] = location.replace(word, value)
+            section = config[item][name]
+            section["location"] = pattern.sub(
+                lambda match: keywords[match.group(1)], section["location"]
+            )
 
 
-@exception_handler
-def conf_reader(config_file: Path = Path(app_config_file)) -> Config:
-    with open(config_file, "r") as text:
-        config = yaml.load(text.read(), Loader=yaml.SafeLoader)
+def _load_yaml(text: str) -> dict:
+    import yaml
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(text, Loader=loader)
+
 
+def _parse_config(config_file: Path, key: tuple, cache_dir: Path) -> dict:
+    """
+    Returns the config with its keywords resolved, from the disk cache if fresh.
+
+    The key holds the file's path, mtime and size plus the keyword values,
+    so editing the config or running as another user invalidates it.
+    """
+    digest = hashlib.blake2b(key[0].encode(), digest_size=8).hexdigest()
+    cache_file = cache_dir / f"config-{digest}.json"
+    try:
+        data = json.loads(cache_file.read_text())
+        if data.get("version") == CONFIG_CACHE_VERSION and data.get("key") == list(key):
+            return data["config"]
+    except (FileNotFoundError, ValueError):
+        pass
+
+    with open(config_file, "r") as text:
+        config = _load_yaml(text.read())
     parse_keywords(tokens, TOKEN_SYMBOL, config)
-    return Config(
-        save={k: EntryConfig(**v) for k, v in config["save"].items()},
-        export={k: EntryConfig(**v) for k, v in config["export"].items()},
+
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_file = cache_file.with_suffix(".tmp")
+        temp_file.write_text(
+            json.dumps(
+                {"version": CONFIG_CACHE_VERSION, "key": list(key), "config": config}
+            )
+        )
+        os.replace(temp_file, cache_file)
+    except OSError:
+        pass
+    return config
+
+
+@exception_handler
+def conf_reader(
+    config_file: Path = Path(app_config_file),
+    cache_dir: Path = Path(app_cache_directory),
+) -> Config:
+    """
+    Reads the config, parsing the YAML only when the file changed.
+
+    The returned Config is shared by later calls, treat it as read-only.
+    """
+    st = os.stat(config_file)
+    key = (
+        str(Path(config_file).absolute()),
+        st.st_mtime_ns,
+        st.st_size,
+        *tokens["keywords"].values(),
     )
+    config = _config_memo.get(key)
+    if config is None:
+        data = _parse_config(Path(config_file), key, cache_dir)
+        config = Config(
+            save={k: EntryConfig(**v) for k, v in data["save"].items()},
+            export={k: EntryConfig(**v) for k, v in data["export"].items()},
+        )
+        _config_memo[key] = config
+    return config
 
 
 def conf_initializer(
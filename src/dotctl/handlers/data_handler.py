@@ -1,18 +1,83 @@
+import os
+import re
 import subprocess
 import getpass
+import tempfile
+from dataclasses import dataclass, field
 from pathlib import Path
 from dotctl.exception import exception_handler
 from dotctl.utils import log
+from .fs_handler import EXCLUDE_PATTERNS, native_sync
+
+
+@dataclass(frozen=True)
+class TransferProfile:
+    name: str
+    options: tuple[str, ...]
+
+
+# Local disk to local disk: skip compression and the delta algorithm
+LOCAL_TRANSFER = TransferProfile("local", ("-a", "--whole-file"))
+# Also writes straight into the destination files, for destinations nothing
+# else reads while they are written (e.g. the profile repo during save)
+LOCAL_INPLACE_TRANSFER = TransferProfile(
+    "local-inplace", ("-a", "--whole-file", "--inplace")
+)
+# Anything crossing the network still benefits from compression and deltas
+REMOTE_TRANSFER = TransferProfile("remote", ("-az",))
+
+
+def is_remote_path(path: Path | str) -> bool:
+    """Detects rsync remote specs such as `host:path` or `user@host:path`."""
+    return bool(re.match(r"^[^/:]+:", str(path)))
+
+
+def get_transfer_profile(
+    source: Path | str, destination: Path | str, inplace: bool = False
+) -> TransferProfile:
+    """Picks rsync transfer flags from the source and destination types."""
+    if is_remote_path(source) or is_remote_path(destination):
+        return REMOTE_TRANSFER
+    return LOCAL_INPLACE_TRANSFER if inplace else LOCAL_TRANSFER
+
+
+@dataclass
+class RsyncBatchReport:
+    changes: dict[str, list[str]] = field(default_factory=dict)
+    errors: dict[str, list[str]] = field(default_factory=dict)
+
+
+def _run_rsync(command: list[str], sudo_pass: str | None = None):
+    if sudo_pass:
+        command = ["sshpass", "-p", sudo_pass, "sudo"] + command
+
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+    stdout, stderr = process.communicate()
+    return process.returncode, stdout, stderr, command
 
 
 def rsync(
-    source: Path, destination: Path, sudo_pass: str | None = None, is_dir: bool = False
+    source: Path,
+    destination: Path,
+    sudo_pass: str | None = None,
+    is_dir: bool = False,
+    inplace: bool = False,
+    checksum: bool = False,
 ):
     """Synchronizes source to destination using rsync with optional sudo support."""
     rsync_command = "rsync"
-    exclude_patterns = ["*.pyc", "*.pyo", ".git"]
-    exclude_options = [f"--exclude={pattern}" for pattern in exclude_patterns]
-    rsync_options = ["-az", "--delete"]
+    exclude_options = [f"--exclude={pattern}" for pattern in EXCLUDE_PATTERNS]
+    transfer = get_transfer_profile(source, destination, inplace=inplace)
+    rsync_options = [*transfer.options, "--delete"]
+    if checksum:
+        rsync_options.append("--checksum")
 
     source_str = str(source) + "/" if is_dir else str(source)
     destination_str = str(destination) + "/" if is_dir else str(destination)
@@ -25,28 +90,114 @@ def rsync(
         destination_str,
     ]
 
-    if sudo_pass:
-        command = ["sshpass", "-p", sudo_pass, "sudo"] + command
+    returncode, stdout, stderr, command = _run_rsync(command, sudo_pass)
 
-    process = subprocess.Popen(
-        command,
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-    )
+    if returncode != 0:
+        log(f"rsync failed: {stderr.strip()}")
 
-    stdout, stderr = process.communicate()
+        if "Permission denied" in stderr or returncode == 13:
+            raise PermissionError(stderr.strip())
+
+        raise subprocess.CalledProcessError(returncode, command, stderr)
+
+    return stdout.strip()
+
+
+# rsync writes each file to a hidden `.name.XXXXXX` sibling before renaming it
+RSYNC_TEMP_NAME = re.compile(r"(^|/)\.([^/]+)\.[A-Za-z0-9]{6}$")
+
+
+def _match_entry(name: str, entries: list[str]) -> str | None:
+    """Returns the longest entry that the relative path name belongs to."""
+    name = RSYNC_TEMP_NAME.sub(r"\1\2", name.strip().rstrip("/"))
+    matches = [
+        entry
+        for entry in entries
+        if name == entry.rstrip("/") or name.startswith(entry.rstrip("/") + "/")
+    ]
+    return max(matches, key=len) if matches else None
+
+
+def rsync_batch(
+    source_root: Path,
+    destination_root: Path,
+    entries: list[str],
+    sudo_pass: str | None = None,
+    inplace: bool = False,
+    checksum: bool = False,
+) -> RsyncBatchReport:
+    """
+    Synchronizes several entries sharing one root with a single rsync run.
+
+    Entries are handed over with --files-from, so each one lands at the same
+    relative path below destination_root. Itemized changes and error lines
+    are mapped back to the entry they belong to; errors that cannot be
+    attributed to an entry are reported under the empty key.
+    """
+    exclude_options = [f"--exclude={pattern}" for pattern in EXCLUDE_PATTERNS]
+
+    with tempfile.NamedTemporaryFile(
+        "w", prefix="dotctl-files-", delete=False
+    ) as files_from:
+        files_from.write("\0".join(entries))
 
-    if process.returncode != 0:
+    transfer = get_transfer_profile(source_root, destination_root, inplace=inplace)
+    command = [
+        "rsync",
+        *transfer.options,
+        "-r",
+        "--delete",
+        "--itemize-changes",
+        *(["--checksum"] if checksum else []),
+        "--from0",
+        f"--files-from={files_from.name}",
+        *exclude_options,
+        str(source_root) + "/",
+        str(destination_root) + "/",
+    ]
+
+    try:
+        returncode, stdout, stderr, command = _run_rsync(command, sudo_pass)
+    finally:
+        os.unlink(files_from.name)
+
+    # 23/24: partial transfer, the failing files are listed on stderr
+    if returncode not in (0, 23, 24):
         log(f"rsync failed: {stderr.strip()}")
 
-        if "Permission denied" in stderr or process.returncode == 13:
+        if "Permission denied" in stderr or returncode == 13:
             raise PermissionError(stderr.strip())
 
-        raise subprocess.CalledProcessError(process.returncode, command, stderr)
+        raise subprocess.CalledProcessError(returncode, command, stderr)
 
-    return stdout.strip()
+    report = RsyncBatchReport()
+    for line in stdout.splitlines():
+        if len(line) < 13 or line[11] != " ":
+            continue
+        entry = _match_entry(line[12:], entries)
+        if entry is not None:
+            report.changes.setdefault(entry, []).append(line)
+
+    roots = [str(source_root) + "/", str(destination_root) + "/"]
+    for line in stderr.splitlines():
+        if not line.startswith("rsync:"):
+            continue
+        entry = None
+        quoted = re.search(r'"(.+?)"', line)
+        if quoted:
+            path = quoted.group(1)
+            for root in roots:
+                if path.startswith(root):
+                    entry = _match_entry(path.removeprefix(root), entries)
+                    break
+            else:
+                entry = _match_entry(path, entries)
+        report.errors.setdefault(entry or "", []).append(line)
+
+    if returncode != 0 and not report.errors:
+        report.errors[""] = [stderr.strip()]
+
+    return report
 
 
 def get_sudo_pass(path: Path, sudo_max_attempts: int = 3):
@@ -106,7 +257,12 @@ def run_command(command: str, sudo_pass: str | None = None):
 
 @exception_handler
 def copy(source: Path, dest: Path, skip_sudo=False, sudo_pass=None):
-    """Copies files/directories using rsync and handles sudo permission issues."""
+    """
+    Copies files/directories and handles sudo permission issues.
+
+    Paths accessible to the current user are copied in-process; rsync is
+    only used once sudo is required.
+    """
     temp_pass = None
     source_exists = False
     is_dir = False  # Default to file
@@ -131,7 +287,10 @@ def copy(source: Path, dest: Path, skip_sudo=False, sudo_pass=None):
 
         if source_exists:
             assert source != dest, "Source and destination can't be the same"
-            rsync(source, dest, temp_pass or sudo_pass, is_dir=is_dir)
+            if temp_pass or sudo_pass:
+                rsync(source, dest, temp_pass or sudo_pass, is_dir=is_dir)
+            else:
+                native_sync(source, dest)
     except PermissionError:
         log(f"PermissionError: {source} requires sudo access.")
         if not skip_sudo:
@@ -0,0 +1,269 @@
+import os
+import shlex
+import asyncio
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from dotctl.paths import home_path
+from dotctl.utils import log
+from .data_handler import LOCAL_TRANSFER, REMOTE_TRANSFER, TransferProfile
+from .fs_handler import EXCLUDE_PATTERNS
+from .sync_handler import SyncTask
+
+# One master connection per host, shared by every ssh and rsync call
+SSH_OPTIONS = (
+    "-o",
+    "BatchMode=yes",
+    "-o",
+    "ConnectTimeout=10",
+    "-o",
+    "ControlMaster=auto",
+    "-o",
+    "ControlPath=~/.ssh/dotctl-%C",
+    "-o",
+    "ControlPersist=60",
+)
+
+
+def parse_inventory(path: Path) -> list[str]:
+    """
+    Reads an inventory: one host per line, as given to ssh (e.g. `user@host`).
+
+    Blank lines and `#` comments are ignored, duplicates are dropped.
+    """
+    hosts = []
+    for line in path.read_text().splitlines():
+        host = line.split("#", 1)[0].strip()
+        if host:
+            hosts.append(host)
+    return list(dict.fromkeys(hosts))
+
+
+@dataclass
+class HostReport:
+    host: str
+    status: str = "ok"
+    duration: float = 0.0
+    changes: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+async def _exec(argv: list[str], stdin: bytes | None = None) -> tuple[int, str, str]:
+    process = await asyncio.create_subprocess_exec(
+        *argv,
+        stdin=(
+            asyncio.subprocess.PIPE if stdin is not None else asyncio.subprocess.DEVNULL
+        ),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await process.communicate(stdin)
+    return (
+        process.returncode,
+        stdout.decode(errors="replace"),
+        stderr.decode(errors="replace"),
+    )
+
+
+class SshTransport:
+    """
+    Reaches hosts over ssh; paths below the local home land in the remote home.
+
+    Destinations outside the home are written through `sudo -n`, so they
+    need passwordless sudo on the host.
+    """
+
+    transfer: TransferProfile = REMOTE_TRANSFER
+
+    def remote_path(self, host: str, path: Path) -> str:
+        if path.is_relative_to(home_path):
+            return path.relative_to(home_path).as_posix() or "."
+        return path.as_posix()
+
+    def needs_sudo(self, path: Path) -> bool:
+        return not path.is_relative_to(home_path)
+
+    def destination(self, host: str, path: Path) -> str:
+        return f"{host}:{self.remote_path(host, path)}"
+
+    def rsync_options(self, host: str, sudo: bool) -> list[str]:
+        options = ["-e", shlex.join(["ssh", *SSH_OPTIONS])]
+        if sudo:
+            options.append("--rsync-path=sudo -n rsync")
+        return options
+
+    async def run(
+        self, host: str, argv: list[str], stdin: bytes | None = None
+    ) -> tuple[int, str, str]:
+        return await _exec(["ssh", *SSH_OPTIONS, host, shlex.join(argv)], stdin)
+
+
+class LocalTransport:
+    """
+    Treats every inventory entry as a local directory standing in for a host.
+
+    The profile is applied below that directory, which makes fleet runs
+    testable without any ssh server.
+    """
+
+    transfer: TransferProfile = LOCAL_TRANSFER
+
+    def remote_path(self, host: str, path: Path) -> str:
+        if path.is_relative_to(home_path):
+            path = Path("home") / path.relative_to(home_path)
+        return (Path(host) / path.as_posix().lstrip("/")).as_posix()
+
+    def needs_sudo(self, path: Path) -> bool:
+        return False
+
+    def destination(self, host: str, path: Path) -> str:
+        return self.remote_path(host, path)
+
+    def rsync_options(self, host: str, sudo: bool) -> list[str]:
+        return []
+
+    async def run(
+        self, host: str, argv: list[str], stdin: bytes | None = None
+    ) -> tuple[int, str, str]:
+        if argv[:1] == ["bash"]:
+            return await _exec(["env", f"DOTCTL_FLEET_ROOT={host}", *argv], stdin)
+        return await _exec(argv, stdin)
+
+
+TRANSPORTS = {"ssh": SshTransport, "local": LocalTransport}
+
+
+def count_changes(itemized: str) -> int:
+    """
+    Counts the files an `rsync --itemize-changes` run transferred, created or deleted.
+
+    Lines such as `.d..t......` only report attribute updates and are not counted.
+    """
+    return sum(
+        1
+        for line in itemized.splitlines()
+        if line.startswith("*deleting")
+        or (len(line) > 12 and line[11] == " " and line[0] in "<>c")
+    )
+
+
+async def _push_section(
+    host: str, transport, tasks: list[SyncTask], report: HostReport
+) -> None:
+    """rsyncs the entries of one section; rsync itself only ships the delta."""
+    first = tasks[0]
+    sudo = transport.needs_sudo(first.dest_root)
+    mkdir = ["mkdir", "-p", transport.remote_path(host, first.dest_root)]
+    code, _, stderr = await transport.run(
+        host, ["sudo", "-n", *mkdir] if sudo else mkdir
+    )
+    if code != 0:
+        report.errors.append(f"{first.section}: {stderr.strip()}")
+        return
+
+    with tempfile.NamedTemporaryFile(
+        "w", prefix="dotctl-files-", delete=False
+    ) as files_from:
+        files_from.write("\0".join(task.entry for task in tasks))
+    command = [
+        "rsync",
+        *transport.transfer.options,
+        *transport.rsync_options(host, sudo),
+        "-r",
+        "--delete",
+        "--itemize-changes",
+        "--from0",
+        f"--files-from={files_from.name}",
+        *(f"--exclude={pattern}" for pattern in EXCLUDE_PATTERNS),
+        str(first.source_root) + "/",
+        transport.destination(host, first.dest_root) + "/",
+    ]
+    try:
+        code, stdout, stderr = await _exec(command)
+    finally:
+        os.unlink(files_from.name)
+
+    report.changes += count_changes(stdout)
+    if code != 0:
+        report.errors.append(f"{first.section}: {stderr.strip()}")
+
+
+async def _run_hook(host: str, transport, script: Path, report: HostReport) -> bool:
+    if not script.exists():
+        return True
+    code, _, stderr = await transport.run(host, ["bash", "-s"], script.read_bytes())
+    if code != 0:
+        message = f"{script.name}: exited with code {code}"
+        report.errors.append(
+            f"{message}: {stderr.strip()}" if stderr.strip() else message
+        )
+    return code == 0
+
+
+async def apply_host(
+    host: str,
+    transport,
+    sections: dict[str, list[SyncTask]],
+    hooks: tuple[Path, Path] | None = None,
+) -> HostReport:
+    """Applies the profile to one host: pre hook, every section at once, post hook."""
+    report = HostReport(host=host)
+    start = time.monotonic()
+    try:
+        if hooks is None or await _run_hook(host, transport, hooks[0], report):
+            await asyncio.gather(
+                *(
+                    _push_section(host, transport, tasks, report)
+                    for tasks in sections.values()
+                )
+            )
+            if hooks is not None and not report.errors:
+                await _run_hook(host, transport, hooks[1], report)
+    except OSError as e:
+        report.errors.append(str(e))
+    report.duration = time.monotonic() - start
+    if report.errors:
+        report.status = "failed"
+    return report
+
+
+def run_fleet(
+    hosts: list[str],
+    transport,
+    tasks: list[SyncTask],
+    jobs: int,
+    hooks: tuple[Path, Path] | None = None,
+) -> list[HostReport]:
+    """Applies the tasks to every host, at most `jobs` hosts at a time."""
+    sections: dict[str, list[SyncTask]] = {}
+    for task in tasks:
+        sections.setdefault(task.section, []).append(task)
+
+    async def main() -> list[HostReport]:
+        semaphore = asyncio.Semaphore(jobs)
+
+        async def bounded(host: str) -> HostReport:
+            async with semaphore:
+                report = await apply_host(host, transport, sections, hooks)
+            icon = "✅" if report.status == "ok" else "❌"
+            log(f"{icon} {host}: {report.status} in {report.duration:.1f}s")
+            return report
+
+        return await asyncio.gather(*(bounded(host) for host in hosts))
+
+    return asyncio.run(main())
+
+
+def show_fleet_report(reports: list[HostReport], wall_time: float) -> None:
+    width = max((len(report.host) for report in reports), default=4)
+    print(f"{'HOST':<{width}}  {'STATUS':<7} {'TIME':>7} {'CHANGES':>8}")
+    for report in sorted(reports, key=lambda report: report.duration, reverse=True):
+        print(
+            f"{report.host:<{width}}  {report.status:<7} "
+            f"{report.duration:>6.1f}s {report.changes:>8}"
+        )
+        for error in report.errors:
+            print(f"{'':<{width}}  {error}")
+    failed = sum(report.status != "ok" for report in reports)
+    log(f"Applied to {len(reports) - failed}/{len(reports)} hosts in {wall_time:.1f}s")
@@ -0,0 +1,403 @@
+import os
+import re
+import json
+import shutil
+import stat
+import hashlib
+import threading
+from collections.abc import Callable, Iterable
+from fnmatch import fnmatch, fnmatchcase
+from functools import lru_cache
+from pathlib import Path
+
+EXCLUDE_PATTERNS = ["*.pyc", "*.pyo", ".git"]
+REGEX_PREFIX = "re:"
+GLOB_CHARS = "*?["
+
+
+def is_excluded(name: str, exclude_patterns: list[str] = EXCLUDE_PATTERNS) -> bool:
+    return any(fnmatch(name, pattern) for pattern in exclude_patterns)
+
+
+@lru_cache(maxsize=None)
+def list_directory(directory: Path) -> tuple[str, ...]:
+    """
+    Names in a directory, empty when it cannot be read.
+
+    Each directory is scanned once until the cache is cleared, which every
+    sync and import does once it has written its entries.
+    """
+    try:
+        with os.scandir(directory) as entries:
+            return tuple(sorted(entry.name for entry in entries))
+    except (FileNotFoundError, NotADirectoryError, PermissionError):
+        return ()
+
+
+def is_pattern(entry: str) -> bool:
+    return entry.startswith(REGEX_PREFIX) or any(char in entry for char in GLOB_CHARS)
+
+
+def _match_names(pattern: str, names: Iterable[str]) -> list[str]:
+    if pattern.startswith(REGEX_PREFIX):
+        regex = re.compile(pattern.removeprefix(REGEX_PREFIX))
+        return [name for name in names if regex.fullmatch(name)]
+    # Like shell globs, wildcards only match hidden names if the pattern does
+    hidden = pattern.startswith(".")
+    return [
+        name
+        for name in names
+        if fnmatchcase(name, pattern) and (hidden or not name.startswith("."))
+    ]
+
+
+def expand_entries(
+    entries: list[str],
+    base_dir: Path,
+    list_names: Callable[[Path], Iterable[str]] = list_directory,
+) -> list[str]:
+    """
+    Expands glob (`plasma*`, `kde/*rc`) and regex (`re:kwin.*rc`) entries.
+
+    Globs may appear in any path component and are matched one directory
+    at a time; a regex is matched against the names directly in base_dir.
+    Literal entries are kept as they are, whether they exist or not.
+    """
+    expanded = []
+    for entry in entries:
+        if not is_pattern(entry):
+            expanded.append(entry)
+            continue
+        parts = (
+            [entry] if entry.startswith(REGEX_PREFIX) else entry.strip("/").split("/")
+        )
+        candidates = [""]
+        for part in parts:
+            if not is_pattern(part):
+                # Below a wildcard, keep only the matches that contain this name
+                candidates = [
+                    f"{candidate}{part}/"
+                    for candidate in candidates
+                    if not candidate or part in list_names(base_dir / candidate)
+                ]
+                continue
+            candidates = [
+                f"{candidate}{name}/"
+                for candidate in candidates
+                for name in _match_names(part, list_names(base_dir / candidate))
+                if not is_excluded(name)
+            ]
+        expanded += [candidate.rstrip("/") for candidate in candidates]
+    return list(dict.fromkeys(expanded))
+
+
+def file_digest(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """Returns the blake2b hex digest of a file's content."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HashCache:
+    """
+    Persistent content digests keyed by device, inode, size and mtime.
+
+    A file whose inode still carries the same size and mtime is not read
+    again, so checksum runs only hash what actually changed since the
+    last run. Safe to share between worker threads.
+    """
+
+    # Past this many entries only the ones used by the last run are kept
+    LIMIT = 200_000
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._used: set[str] = set()
+        self.entries: dict[str, list] = {}
+        try:
+            self.entries = json.loads(path.read_text())
+        except (FileNotFoundError, ValueError):
+            pass
+
+    @staticmethod
+    def _key(st: os.stat_result) -> str:
+        return f"{st.st_dev}:{st.st_ino}"
+
+    def digest(self, path: Path, st: os.stat_result) -> str:
+        key = self._key(st)
+        cached = self.entries.get(key)
+        if cached and cached[:2] == [st.st_size, st.st_mtime_ns]:
+            with self._lock:
+                self._used.add(key)
+            return cached[2]
+        digest = file_digest(path)
+        self.record(st, digest)
+        return digest
+
+    def record(self, st: os.stat_result, digest: str) -> None:
+        key = self._key(st)
+        with self._lock:
+            self.entries[key] = [st.st_size, st.st_mtime_ns, digest]
+            self._used.add(key)
+
+    def save(self) -> None:
+        with self._lock:
+            if len(self.entries) > self.LIMIT:
+                self.entries = {key: self.entries[key] for key in self._used}
+            data = json.dumps(self.entries)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_suffix(".tmp")
+            temp_path.write_text(data)
+            os.replace(temp_path, self.path)
+        except OSError:
+            pass
+
+
+def files_differ(
+    source: Path,
+    source_stat: os.stat_result,
+    dest: Path,
+    checksum: bool = False,
+    hashes: HashCache | None = None,
+) -> bool:
+    """
+    Compares a source file with its destination the way rsync's quick check does.
+
+    With checksum set, files of the same size are compared by content
+    digest instead of mtime, looked up in hashes when given.
+    """
+    try:
+        dest_stat = dest.lstat()
+    except FileNotFoundError:
+        return True
+
+    if not stat.S_ISREG(dest_stat.st_mode):
+        return True
+    if source_stat.st_size != dest_stat.st_size:
+        return True
+    if checksum and hashes is not None:
+        return hashes.digest(source, source_stat) != hashes.digest(dest, dest_stat)
+    if checksum:
+        return file_digest(source) != file_digest(dest)
+    return source_stat.st_mtime_ns != dest_stat.st_mtime_ns
+
+
+def _copy_content(source: Path, dest: Path) -> None:
+    with open(source, "rb") as src_file, open(dest, "wb") as dest_file:
+        try:
+            while os.copy_file_range(
+                src_file.fileno(), dest_file.fileno(), 1024 * 1024 * 1024
+            ):
+                pass
+        except (AttributeError, OSError):
+            src_file.seek(0)
+            dest_file.seek(0)
+            dest_file.truncate()
+            shutil.copyfileobj(src_file, dest_file)
+
+
+def copy_file(source: Path, dest: Path) -> None:
+    """Copies a file through a temporary sibling and renames it into place."""
+    temp_dest = dest.with_name(f".{dest.name}.dotctl-tmp")
+    try:
+        _copy_content(source, temp_dest)
+        shutil.copystat(source, temp_dest)
+        if dest.is_dir() and not dest.is_symlink():
+            shutil.rmtree(dest)
+        os.replace(temp_dest, dest)
+    finally:
+        if temp_dest.exists():
+            temp_dest.unlink()
+
+
+def copy_symlink(source: Path, dest: Path) -> bool:
+    target = os.readlink(source)
+    if dest.is_symlink() and os.readlink(dest) == target:
+        return False
+    remove_path(dest)
+    os.symlink(target, dest)
+    return True
+
+
+def remove_path(path: Path) -> None:
+    if path.is_symlink() or path.is_file():
+        path.unlink()
+    elif path.is_dir():
+        shutil.rmtree(path)
+
+
+def _sync_file(
+    source: Path,
+    source_stat: os.stat_result,
+    dest: Path,
+    checksum: bool,
+    hashes: HashCache | None,
+    changes: list[str],
+) -> None:
+    if files_differ(source, source_stat, dest, checksum, hashes):
+        copy_file(source, dest)
+        if hashes is not None:
+            hashes.record(dest.stat(), hashes.digest(source, source_stat))
+        changes.append(str(dest))
+    elif checksum and stat.S_IMODE(dest.stat().st_mode) != stat.S_IMODE(
+        source_stat.st_mode
+    ):
+        # Same content: fix the permissions without rewriting the file
+        os.chmod(dest, stat.S_IMODE(source_stat.st_mode))
+        changes.append(str(dest))
+
+
+def _sync_dir(
+    source: Path,
+    dest: Path,
+    checksum: bool,
+    hashes: HashCache | None,
+    changes: list[str],
+) -> None:
+    if dest.is_symlink() or (dest.exists() and not dest.is_dir()):
+        dest.unlink()
+    if not dest.exists():
+        dest.mkdir(parents=True)
+        changes.append(f"{dest}/")
+
+    source_names = set()
+    with os.scandir(source) as entries:
+        for entry in entries:
+            if is_excluded(entry.name):
+                continue
+            source_names.add(entry.name)
+            target = dest / entry.name
+            if entry.is_symlink():
+                if copy_symlink(Path(entry.path), target):
+                    changes.append(str(target))
+            elif entry.is_dir():
+                _sync_dir(Path(entry.path), target, checksum, hashes, changes)
+            elif entry.is_file():
+                _sync_file(
+                    Path(entry.path), entry.stat(), target, checksum, hashes, changes
+                )
+
+    # Mirror rsync --delete; excluded names are protected on the receiver side
+    with os.scandir(dest) as entries:
+        stale = [
+            Path(entry.path)
+            for entry in entries
+            if entry.name not in source_names and not is_excluded(entry.name)
+        ]
+    for path in stale:
+        remove_path(path)
+        changes.append(f"*deleting {path}")
+
+    if checksum:
+        # Directory mtimes follow their content, only the mode is carried over
+        mode = stat.S_IMODE(os.stat(source).st_mode)
+        if stat.S_IMODE(os.stat(dest).st_mode) != mode:
+            os.chmod(dest, mode)
+    else:
+        shutil.copystat(source, dest)
+
+
+def native_sync(
+    source: Path,
+    dest: Path,
+    checksum: bool = False,
+    hashes: HashCache | None = None,
+) -> list[str]:
+    """
+    Synchronizes source to dest in-process, mirroring `rsync -a --delete`.
+
+    Files are compared by size and mtime (or content digest when checksum is
+    set) and only the ones that differ are rewritten, through a temporary
+    file renamed into place. In checksum mode identical files are not
+    touched at all, not even their mtime. Raises PermissionError when
+    either side is not accessible to the current user.
+
+    :return: Paths that were created, updated or deleted
+    """
+    changes: list[str] = []
+    if source.is_dir():
+        _sync_dir(source, dest, checksum, hashes, changes)
+    elif source.is_symlink():
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if copy_symlink(source, dest):
+            changes.append(str(dest))
+    elif source.is_file():
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        _sync_file(source, source.stat(), dest, checksum, hashes, changes)
+    return changes
+
+
+def prune_tree(root: Path, keep: set[str]) -> list[str]:
+    """
+    Removes everything below root whose relative path is not in keep.
+
+    Excluded names are left alone, as with the --delete of the sync backends.
+
+    :return: Paths that were deleted
+    """
+    deleted: list[str] = []
+
+    def walk(directory: Path, prefix: str) -> None:
+        with os.scandir(directory) as entries:
+            stale, nested = [], []
+            for entry in entries:
+                if is_excluded(entry.name):
+                    continue
+                rel = f"{prefix}{entry.name}"
+                if rel not in keep:
+                    stale.append(Path(entry.path))
+                elif entry.is_dir(follow_symlinks=False):
+                    nested.append((Path(entry.path), f"{rel}/"))
+        for path in stale:
+            remove_path(path)
+            deleted.append(str(path))
+        for path, nested_prefix in nested:
+            walk(path, nested_prefix)
+
+    if root.is_dir() and not root.is_symlink():
+        walk(root, "")
+    return deleted
+
+
+def scan_tree(path: Path) -> dict[str, list]:
+    """
+    Collects [size, mtime_ns, inode] for every file below path (or path itself).
+
+    Directories are recorded with size -1 so that empty ones still count, and
+    symlinks with their target in place of the inode. Raises PermissionError
+    if any part of the tree is unreadable.
+    """
+    records: dict[str, list] = {}
+
+    def record(rel: str, entry_path: str, st: os.stat_result) -> None:
+        if stat.S_ISLNK(st.st_mode):
+            records[rel] = [st.st_size, st.st_mtime_ns, os.readlink(entry_path)]
+        elif stat.S_ISDIR(st.st_mode):
+            records[rel] = [-1, 0, st.st_ino]
+        else:
+            records[rel] = [st.st_size, st.st_mtime_ns, st.st_ino]
+
+    def walk(directory: str, prefix: str) -> None:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if is_excluded(entry.name):
+                    continue
+                rel = f"{prefix}{entry.name}"
+                record(rel, entry.path, entry.stat(follow_symlinks=False))
+                if entry.is_dir(follow_symlinks=False):
+                    walk(entry.path, f"{rel}/")
+
+    try:
+        st = path.lstat()
+    except FileNotFoundError:
+        return records
+
+    if path.is_dir():
+        walk(str(path), "")
+    else:
+        record(".", str(path), st)
+    return records
@@ -1,8 +1,19 @@
+import json
+import os
+import time
+from collections.abc import Callable
 from dataclasses import dataclass
 from pathlib import Path
 import getpass
-from git import Repo, InvalidGitRepositoryError, GitCommandError, Remote
-from dotctl import __APP_NAME__, __DEFAULT_PROFILE__
+from git import (
+    Repo,
+    InvalidGitRepositoryError,
+    GitCommandError,
+    Remote,
+    RemoteReference,
+)
+from dotctl import __APP_NAME__, __DEFAULT_PROFILE__, __FETCH_TTL__
+from dotctl.paths import app_hooks_directory, app_worktree_directory
 from dotctl.utils import log
 
 
@@ -13,14 +24,213 @@ class RepoMetaData:
     last_commit_author: str
 
 
+class RemoteSession:
+    """
+    Tracks the origin remote of a repository for a single dotctl invocation.
+
+    Most commands only need one profile and fetch just that branch
+    (`fetch_ref`); a full, pruning fetch of every ref (`fetch`) is left to
+    listing. Each is done at most once per session, or not at all when the
+    ref was fetched more recently than the freshness window in seconds.
+    Fetch times are kept per ref, since a ref-scoped fetch leaves every
+    other ref as it was.
+    """
+
+    FETCH_TIMES_FILE = "dotctl-fetch-times.json"
+    FULL_FETCH = "*"
+
+    def __init__(
+        self,
+        repo: Repo,
+        fetch_ttl: int = __FETCH_TTL__,
+        on_fetch: Callable[[], None] | None = None,
+    ):
+        self.repo = repo
+        self.fetch_ttl = fetch_ttl
+        self.on_fetch = on_fetch
+        self.origin: Remote | None = next(
+            (remote for remote in repo.remotes if remote.name == "origin"), None
+        )
+        self.fetched: bool | None = None
+        self.reachable: bool | None = None
+        self.fetched_refs: set[str] = set()
+
+    def _fetch_times(self) -> dict[str, float]:
+        try:
+            return json.loads(
+                (Path(self.repo.git_dir) / self.FETCH_TIMES_FILE).read_text()
+            )
+        except (OSError, ValueError):
+            return {}
+
+    def _record_fetch(self, key: str) -> None:
+        times = self._fetch_times()
+        if key == self.FULL_FETCH:
+            times = {}
+        times[key] = time.time()
+        try:
+            (Path(self.repo.git_dir) / self.FETCH_TIMES_FILE).write_text(
+                json.dumps(times)
+            )
+        except OSError:
+            pass
+
+    def is_fresh(self, branch: str | None = None) -> bool:
+        """
+        Tells whether every ref (or, given a branch, that branch) was fetched
+        within the freshness window.
+        """
+        if self.fetch_ttl <= 0:
+            return False
+        times = self._fetch_times()
+        fetched_at = times.get(self.FULL_FETCH, 0.0)
+        if branch is not None:
+            fetched_at = max(fetched_at, times.get(branch, 0.0))
+        return time.time() - fetched_at < self.fetch_ttl
+
+    def mark_fetched(self) -> None:
+        self.fetched = self.reachable = self.origin is not None
+
+    def _warn(self, e: Exception) -> None:
+        print(f"Warning: Unable to fetch from remote '{self.origin.url}'. Error: {e}")
+        self.reachable = False
+
+    def fetch(self, force: bool = False) -> bool:
+        """
+        Fetches and prunes every ref of origin unless this session already did.
+
+        :param force: Ignore the freshness window (explicit `--fetch`)
+        :return: True if the remote is reachable and refs are up to date
+        """
+        if self.origin is None:
+            return False
+        if self.fetched is not None:
+            return self.fetched
+        if not force and self.is_fresh():
+            self.fetched = self.reachable = True
+            return True
+        try:
+            self.origin.fetch(prune=True)
+            self._record_fetch(self.FULL_FETCH)
+            self.fetched = self.reachable = True
+            if self.on_fetch:
+                self.on_fetch()
+        except Exception as e:
+            self._warn(e)
+            self.fetched = False
+        return self.fetched
+
+    def fetch_ref(self, branch: str, force: bool = False) -> bool:
+        """
+        Fetches a single profile branch of origin unless this session already did.
+
+        A branch that is gone from origin has its remote-tracking ref removed,
+        as a pruning fetch would. Single-branch clones keep tracking the
+        branch from then on, with the depth they were cloned with.
+
+        :param force: Ignore the freshness window (explicit `--fetch`)
+        :return: True if the remote is reachable
+        """
+        if self.origin is None or self.reachable is False:
+            return False
+        if branch in self.fetched_refs:
+            return True
+        tracking_ref = f"refs/remotes/origin/{branch}"
+        known = RemoteReference(self.repo, tracking_ref).is_valid()
+        if known and (self.fetched or (not force and self.is_fresh(branch))):
+            self.reachable = True
+            return True
+
+        refspec = f"+refs/heads/{branch}:{tracking_ref}"
+        options = {}
+        depth = self.repo.config_reader().get_value(__APP_NAME__, "depth", 0)
+        if depth:
+            options["depth"] = depth
+        try:
+            self.origin.fetch(refspec, **options)
+            if is_single_branch(self.repo) and refspec not in _fetch_refspecs(
+                self.repo
+            ):
+                self.repo.git.config("--add", "remote.origin.fetch", refspec)
+        except GitCommandError as e:
+            if "couldn't find remote ref" not in str(e):
+                self._warn(e)
+                return False
+            if known:
+                self.repo.git.update_ref("-d", tracking_ref)
+        self._record_fetch(branch)
+        self.reachable = True
+        self.fetched_refs.add(branch)
+        if self.on_fetch:
+            self.on_fetch()
+        return True
+
+    def is_remote(self) -> tuple[bool, None] | tuple[bool, Remote]:
+        if self.origin is not None and self.reachable is None:
+            # Probing with the active profile also brings its remote ref up to date
+            if self.repo.head.is_detached:
+                self.fetch()
+            else:
+                self.fetch_ref(self.repo.active_branch.name)
+        if self.reachable:
+            return True, self.origin
+        return False, None
+
+
+@dataclass
+class RefSnapshot:
+    local_profiles: set[str]
+    remote_profiles: set[str]
+    active_profile: str
+    all_profiles: set[str]
+
+
+class RepoContext:
+    """
+    Single repository handle shared by every action of one dotctl invocation.
+
+    Holds the Repo object, its remote session and a parsed snapshot of the
+    profile refs. The snapshot is rebuilt lazily after mutating operations
+    (checkout, commit, fetch, push, branch create/delete) invalidate it.
+    """
+
+    def __init__(self, repo: Repo):
+        self.repo = repo
+        self.remote = RemoteSession(repo, on_fetch=self.invalidate)
+        self._refs: RefSnapshot | None = None
+
+    @property
+    def refs(self) -> RefSnapshot:
+        if self._refs is None:
+            self._refs = _read_refs(self.repo)
+        return self._refs
+
+    def invalidate(self) -> None:
+        self._refs = None
+
+
+_contexts: dict[str, RepoContext] = {}
+
+
+def _repo_key(path: Path | str) -> str:
+    return str(Path(path).resolve())
+
+
+def _context_for(repo: Repo) -> RepoContext:
+    key = _repo_key(repo.working_tree_dir or repo.git_dir)
+    context = _contexts.get(key)
+    if context is None or context.repo.git_dir != repo.git_dir:
+        context = _contexts[key] = RepoContext(repo)
+    return context
+
+
 def is_git_repo(path: Path) -> bool:
-    if not path.exists() or not path.is_dir():
-        return False
-    dest = path.resolve()
-    if dest is None:
+    if _repo_key(path) in _contexts:
+        return True
+    if not (path / ".git").exists() and not (path / "HEAD").is_file():
         return False
     try:
-        Repo(path)
+        _contexts[_repo_key(path)] = RepoContext(Repo(path))
         return True
     except InvalidGitRepositoryError:
         return False
@@ -28,47 +238,127 @@ def is_git_repo(path: Path) -> bool:
         raise Exception(f"Unexpected error: {e}")
 
 
-def get_repo(path: Path) -> Repo:
+def get_repo_context(path: Path) -> RepoContext:
     if not is_git_repo(path):
         raise Exception(
             f"Profile not yet initialized, run `{__APP_NAME__} init` first."
         )
-    return Repo(path)
+    return _contexts[_repo_key(path)]
+
+
+def get_repo(path: Path) -> Repo:
+    return get_repo_context(path).repo
+
+
+def get_remote_session(repo: Repo) -> RemoteSession:
+    """Returns the invocation-wide remote session of the repository."""
+    return _context_for(repo).remote
+
+
+def invalidate_refs(repo: Repo) -> None:
+    _context_for(repo).invalidate()
 
 
 def is_remote_repo(repo: Repo) -> tuple[bool, None] | tuple[bool, Remote]:
-    if not repo.remotes:
-        return False, None
-    origin = next((remote for remote in repo.remotes if remote.name == "origin"), None)
-    if origin:
-        try:
-            origin.fetch(prune=True)
-            return True, origin
-        except Exception as e:
-            print(f"Warning: Unable to fetch from remote '{origin.url}'. Error: {e}")
-    return False, None
+    return get_remote_session(repo).is_remote()
 
 
 def git_fetch(repo: Repo) -> None:
     try:
-        is_remote, origin = is_remote_repo(repo)
-        if is_remote and origin:
-            origin.fetch(prune=True)
+        get_remote_session(repo).fetch(force=True)
     except Exception as e:
         log(f"Failed to fetch remote: {e}")
 
 
-def clone_repo(git_url: str, dest: Path) -> Repo | None:
+def clone_repo(
+    git_url: str,
+    dest: Path,
+    branch: str | None = None,
+    depth: int | None = None,
+    filter_spec: str | None = None,
+    sections: list[str] | None = None,
+) -> Repo | None:
+    """
+    Clones the profile repository.
+
+    With a branch, only that profile is cloned; other profiles are fetched
+    on demand by `checkout_branch`. `depth` and `filter_spec` (e.g.
+    `blob:none`) make the clone shallow or partial, later on-demand fetches
+    keep using them. With sections, only those are checked out.
+    """
     if is_git_repo(dest):
         log(f"Profile already exists")
         return
+    options: dict = {}
+    if depth:
+        options["depth"] = depth
+    if filter_spec:
+        options["filter"] = filter_spec
+    if branch or options:
+        options["single_branch"] = True
+    if sections is not None:
+        options["no_checkout"] = True
     try:
-        repo = Repo.clone_from(git_url, dest)
+        try:
+            repo = Repo.clone_from(git_url, dest, branch=branch, **options)
+        except GitCommandError as e:
+            if not branch or "not found in upstream" not in str(e):
+                raise
+            # A new profile: start from the default branch instead
+            repo = Repo.clone_from(git_url, dest, **options)
+        if depth:
+            with repo.config_writer() as config:
+                config.set_value(__APP_NAME__, "depth", depth)
+        if sections is not None:
+            # Set before the first checkout, so other sections are never written
+            set_sparse_sections(repo, sections)
+            repo.git.checkout(repo.active_branch.name)
+        get_remote_session(repo).mark_fetched()
         return repo
     except Exception as e:
         raise Exception(f"Failed to clone repo from {git_url} to {dest}. {e}")
 
 
+def _fetch_refspecs(repo: Repo) -> list[str]:
+    try:
+        return repo.git.config("--get-all", "remote.origin.fetch").split()
+    except GitCommandError:
+        return []
+
+
+def is_single_branch(repo: Repo) -> bool:
+    """True for clones that only track the profiles fetched so far."""
+    refspecs = _fetch_refspecs(repo)
+    return bool(refspecs) and not any("*" in refspec for refspec in refspecs)
+
+
+def list_remote_profiles(repo: Repo) -> set[str]:
+    """Names of every profile on origin, without fetching any of them."""
+    try:
+        output = repo.git.ls_remote("--heads", "origin")
+    except GitCommandError as e:
+        log(f"Failed to list remote profiles: {e}")
+        return set()
+    return {
+        line.split("\t", 1)[1].removeprefix("refs/heads/")
+        for line in output.splitlines()
+        if "\t" in line
+    }
+
+
+def fetch_profile(repo: Repo, branch: str) -> bool:
+    """
+    Brings a single profile of origin up to date, fetching only its branch.
+
+    :return: True if the profile exists on origin
+    """
+    try:
+        get_remote_session(repo).fetch_ref(branch)
+    except Exception as e:
+        log(f"Failed to fetch profile '{branch}': {e}")
+    return branch in get_repo_branches(repo)[1]
+
+
 def create_local_repo(dest: Path) -> Repo | None:
     if is_git_repo(dest):
         log(f"Profile already exists")
@@ -77,10 +367,117 @@ def create_local_repo(dest: Path) -> Repo | None:
     repo = Repo.init(dest)
     repo.git.checkout("-b", __DEFAULT_PROFILE__)
     repo.index.commit("Initial commit for dotctl")
+    _context_for(repo)
     return repo
 
 
-def get_repo_branches(repo: Repo):
+def get_sparse_sections(repo: Repo) -> list[str] | None:
+    """Sections checked out on this host, None when the whole profile is."""
+    try:
+        return repo.git.config("--get-all", f"{__APP_NAME__}.sections").splitlines()
+    except GitCommandError:
+        return None
+
+
+def set_sparse_sections(repo: Repo, sections: list[str] | None) -> None:
+    """
+    Limits the working tree to the given sections with a cone-mode
+    sparse-checkout. Top-level files and the hooks directory are always
+    checked out; None restores the whole profile.
+
+    The selection lives in the repo config (`dotctl.sections`), so it is
+    kept for every profile checked out afterwards.
+    """
+    key = f"{__APP_NAME__}.sections"
+    try:
+        repo.git.config("--unset-all", key)
+    except GitCommandError:
+        pass
+    if sections is None:
+        repo.git.sparse_checkout("disable")
+        return
+    for section in sections:
+        repo.git.config("--add", key, section)
+    repo.git.sparse_checkout("set", "--cone", Path(app_hooks_directory).name, *sections)
+
+
+def uses_worktrees(repo: Repo) -> bool:
+    """True when profiles other than the active one get worktrees of their own."""
+    return bool(repo.config_reader().get_value(__APP_NAME__, "worktrees", False))
+
+
+def set_worktrees(repo: Repo, enabled: bool) -> None:
+    with repo.config_writer() as config:
+        config.set_value(__APP_NAME__, "worktrees", enabled)
+
+
+def _worktrees(repo: Repo) -> dict[str, Path]:
+    """Branch -> path of every linked worktree, from `git worktree list`."""
+    worktrees: dict[str, Path] = {}
+    path = None
+    for line in repo.git.worktree("list", "--porcelain").splitlines():
+        if line.startswith("worktree "):
+            path = Path(line.removeprefix("worktree "))
+        elif line.startswith("branch refs/heads/") and path is not None:
+            worktrees[line.removeprefix("branch refs/heads/")] = path
+    main_dir = Path(repo.working_tree_dir or repo.git_dir).resolve()
+    return {
+        branch: path for branch, path in worktrees.items() if path.resolve() != main_dir
+    }
+
+
+def profile_worktree(
+    repo: Repo,
+    branch: str,
+    create: bool = False,
+    root: Path = Path(app_worktree_directory),
+) -> Repo:
+    """
+    Returns a working tree holding the profile, without touching the one of
+    the active profile.
+
+    The active profile is the repository itself; any other profile gets a
+    worktree below root, added on first use and reused afterwards.
+
+    :param create: Create the profile as a new branch off the active one
+    """
+    if not repo.head.is_detached and repo.active_branch.name == branch:
+        return repo
+    path = _worktrees(repo).get(branch)
+    if path is not None and path.is_dir():
+        return Repo(path)
+
+    # A worktree directory deleted by hand is still registered
+    repo.git.worktree("prune")
+    path = root / branch
+    local_profiles, remote_profiles, _, _ = get_repo_branches(repo)
+    if create:
+        repo.git.worktree("add", "-b", branch, path)
+    elif branch in local_profiles:
+        repo.git.worktree("add", path, branch)
+    elif branch in remote_profiles:
+        repo.git.worktree("add", "--track", "-b", branch, path, f"origin/{branch}")
+    else:
+        raise Exception(f"Branch {branch} not found in local or remote profiles.")
+    invalidate_refs(repo)
+    return Repo(path)
+
+
+def remove_worktree(repo: Repo, branch: str) -> None:
+    """
+    Removes the worktree of a profile, if it has one, so the branch can be
+    checked out or deleted. Uncommitted changes in it make this fail.
+    """
+    path = _worktrees(repo).get(branch)
+    if path is None:
+        return
+    try:
+        repo.git.worktree("remove", path)
+    except GitCommandError as e:
+        raise Exception(f"Profile '{branch}' has uncommitted changes in {path}. {e}")
+
+
+def _read_refs(repo: Repo) -> RefSnapshot:
     active_profile = repo.active_branch.name
     local_profiles = {profile.name for profile in repo.branches}
 
@@ -104,7 +501,122 @@ def get_repo_branches(repo: Repo):
         remote_profiles = set()
 
     all_profiles = local_profiles | remote_profiles | {active_profile}
-    return local_profiles, remote_profiles, active_profile, all_profiles
+    return RefSnapshot(local_profiles, remote_profiles, active_profile, all_profiles)
+
+
+def get_repo_branches(repo: Repo):
+    refs = _context_for(repo).refs
+    return (
+        set(refs.local_profiles),
+        set(refs.remote_profiles),
+        refs.active_profile,
+        set(refs.all_profiles),
+    )
+
+
+def _parse_track(track: str) -> tuple[int, int] | None:
+    """Parses `%(upstream:track,nobracket)` output such as `ahead 1, behind 2`."""
+    if track == "gone":
+        return None
+    counts = {"ahead": 0, "behind": 0}
+    for part in filter(None, (p.strip() for p in track.split(","))):
+        key, _, value = part.partition(" ")
+        if key not in counts or not value.isdigit():
+            return None
+        counts[key] = int(value)
+    return counts["ahead"], counts["behind"]
+
+
+def _count_divergence(
+    repo: Repo, pairs: dict[str, tuple[str, str]]
+) -> dict[str, tuple[int, int]]:
+    """
+    Counts ahead/behind commits for local profiles without an origin upstream.
+
+    Each branch is lent `origin/<name>` as its upstream through GIT_CONFIG_*
+    variables, so a single `git for-each-ref` counts all of them, every walk
+    stopping at its merge base. Branches whose upstream still points
+    elsewhere (a second `merge` value loses to the configured one) are
+    counted with one `rev-list --left-right` each.
+    """
+    config = [("remote.origin.fetch", "+refs/heads/*:refs/remotes/origin/*")]
+    for name in pairs:
+        config.append((f"branch.{name}.remote", "origin"))
+        config.append((f"branch.{name}.merge", f"refs/heads/{name}"))
+    offset = int(os.environ.get("GIT_CONFIG_COUNT", "0") or 0)
+    env = {"GIT_CONFIG_COUNT": str(offset + len(config))}
+    for index, (key, value) in enumerate(config, offset):
+        env[f"GIT_CONFIG_KEY_{index}"] = key
+        env[f"GIT_CONFIG_VALUE_{index}"] = value
+    output = repo.git.for_each_ref(
+        "--format=%(refname)%00%(upstream)%00%(upstream:track,nobracket)",
+        "refs/heads",
+        env=env,
+    )
+
+    divergence = {}
+    for line in output.splitlines():
+        refname, upstream, track = (line.split("\0") + ["", ""])[:3]
+        name = refname.removeprefix("refs/heads/")
+        if name in pairs and upstream == f"refs/remotes/origin/{name}":
+            counts = _parse_track(track)
+            if counts is not None:
+                divergence[name] = counts
+    for name, (local_sha, remote_sha) in pairs.items():
+        if name not in divergence:
+            ahead, behind = repo.git.rev_list(
+                "--left-right", "--count", f"{local_sha}...{remote_sha}"
+            ).split()
+            divergence[name] = (int(ahead), int(behind))
+    return divergence
+
+
+def get_tracking_status(repo: Repo) -> dict[str, tuple[int, int]]:
+    """
+    Returns (ahead, behind) commit counts against origin for every profile
+    that exists both locally and remotely.
+
+    Branch tips and upstream tracking info come from one `git for-each-ref`
+    call; branches that diverge without a configured upstream are counted
+    together by a second one (see _count_divergence).
+    """
+    output = repo.git.for_each_ref(
+        "--format=%(refname)%00%(objectname)%00%(upstream)%00%(upstream:track,nobracket)",
+        "refs/heads",
+        "refs/remotes/origin",
+    )
+
+    local_refs: dict[str, tuple[str, str, str]] = {}
+    remote_refs: dict[str, str] = {}
+    for line in output.splitlines():
+        refname, sha, upstream, track = (line.split("\0") + ["", "", ""])[:4]
+        if refname.startswith("refs/heads/"):
+            local_refs[refname.removeprefix("refs/heads/")] = (sha, upstream, track)
+        elif refname.startswith("refs/remotes/origin/"):
+            name = refname.removeprefix("refs/remotes/origin/")
+            if name != "HEAD":
+                remote_refs[name] = sha
+
+    status: dict[str, tuple[int, int]] = {}
+    pending: dict[str, tuple[str, str]] = {}
+    for name, (sha, upstream, track) in local_refs.items():
+        remote_sha = remote_refs.get(name)
+        if remote_sha is None:
+            continue
+        if sha == remote_sha:
+            status[name] = (0, 0)
+            continue
+        counts = (
+            _parse_track(track) if upstream == f"refs/remotes/origin/{name}" else None
+        )
+        if counts is not None:
+            status[name] = counts
+        else:
+            pending[name] = (sha, remote_sha)
+
+    if pending:
+        status.update(_count_divergence(repo, pending))
+    return status
 
 
 def create_branch(repo: Repo, branch: str) -> None:
@@ -115,6 +627,7 @@ def create_branch(repo: Repo, branch: str) -> None:
         repo.index.commit("Initial commit for dotctl")
     new_branch = repo.create_head(branch)
     new_branch.checkout()
+    invalidate_refs(repo)
 
 
 def create_empty_branch(repo: Repo, branch: str) -> None:
@@ -125,6 +638,7 @@ def create_empty_branch(repo: Repo, branch: str) -> None:
     has_commits = repo.head.is_valid() if repo.head else False
     if not has_commits:
         repo.index.commit("Initial commit for dotctl")
+    invalidate_refs(repo)
 
 
 def checkout_branch(repo: Repo, branch: str) -> None:
@@ -132,13 +646,19 @@ def checkout_branch(repo: Repo, branch: str) -> None:
         repo
     )
     if branch not in all_profiles:
-        git_fetch(repo)
+        fetch_profile(repo, branch)
+        local_profiles, remote_profiles, active_profile, all_profiles = (
+            get_repo_branches(repo)
+        )
+    # A branch can only be checked out in one working tree at a time
+    remove_worktree(repo, branch)
     if branch in local_profiles:
         repo.git.checkout(branch)
     elif branch in remote_profiles:
         repo.git.checkout("--track", f"origin/{branch}")
     else:
         raise Exception(f"Branch {branch} not found in local or remote profiles.")
+    invalidate_refs(repo)
 
 
 def delete_local_branch(repo: Repo, branch: str) -> None:
@@ -152,7 +672,9 @@ def delete_local_branch(repo: Repo, branch: str) -> None:
             repo.git.checkout(fallback_branch)
         else:
             raise Exception("No fallback branch available to checkout before deletion.")
+    remove_worktree(repo, branch)
     repo.delete_head(branch, force=True)
+    invalidate_refs(repo)
 
 
 def delete_remote_branch(repo: Repo, branch: str) -> None:
@@ -160,6 +682,7 @@ def delete_remote_branch(repo: Repo, branch: str) -> None:
         origin = repo.remotes.origin if "origin" in repo.remotes else None
         if origin:
             origin.push(refspec=f":refs/heads/{branch}")
+            invalidate_refs(repo)
         else:
             log("No remote 'origin' found to delete the remote profile.")
     except GitCommandError as e:
@@ -169,7 +692,11 @@ def delete_remote_branch(repo: Repo, branch: str) -> None:
 def add_changes(repo: Repo) -> None:
     if repo.bare:
         raise Exception("Error: The repository is bare. Cannot add files.")
-    repo.git.add("--all")
+    if get_sparse_sections(repo) is not None:
+        # Imported profiles may hold sections outside the sparse-checkout
+        repo.git.add("--all", "--sparse")
+    else:
+        repo.git.add("--all")
 
 
 def is_repo_changed(repo: Repo) -> bool:
@@ -186,6 +713,7 @@ def commit_changes(repo: Repo, message: str) -> None:
         log("No changes to commit.")
         return
     repo.index.commit(message)
+    invalidate_refs(repo)
 
 
 def push_existing_branch(repo: Repo) -> None:
@@ -198,6 +726,7 @@ def push_existing_branch(repo: Repo) -> None:
 
         try:
             origin.push(branch)
+            invalidate_refs(repo)
         except GitCommandError as e:
             raise Exception(f"Error: Failed to push '{branch}'.\n{e}")
     else:
@@ -216,6 +745,7 @@ def push_new_branch(repo: Repo) -> None:
 
         try:
             origin.push(refspec=f"{branch}:{branch}", set_upstream=True)
+            invalidate_refs(repo)
         except GitCommandError as e:
             raise Exception(
                 f"Error: Failed to push new branch '{branch}' with --set-upstream.\n{e}"
@@ -235,11 +765,8 @@ def pull_changes(repo: Repo) -> bool | None:
     if repo.bare:
         raise Exception("Error: The repository is bare. Cannot pull changes.")
 
-    git_fetch(repo)
-
-    _, remote_profiles, active_profile, _ = get_repo_branches(repo)
-
-    if active_profile not in remote_profiles:
+    active_profile = repo.active_branch.name
+    if not fetch_profile(repo, active_profile):
         return None
 
     local_commit = repo.commit(active_profile)
@@ -251,7 +778,9 @@ def pull_changes(repo: Repo) -> bool | None:
     log("📥 Update found:")
     for commit in repo.iter_commits(f"{active_profile}..origin/{active_profile}"):
         log(f"  - {commit.summary} ({commit.hexsha[:7]})")
-    origin.pull()
+    # The branch was just fetched, merging it avoids a second fetch by `git pull`
+    repo.git.merge(f"origin/{active_profile}")
+    invalidate_refs(repo)
     return True
 
 
@@ -1,11 +1,56 @@
+import os
+import re
+import signal
 import subprocess
 import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from dataclasses import dataclass, field
 from pathlib import Path
-from dotctl import __BASE_DIR__
+from dotctl import __BASE_DIR__, __DEFAULT_JOBS__
 from dotctl.paths import app_hooks_directory
-from dotctl.utils import log, new_line
+from dotctl.utils import log, new_line, output_lock
 from .data_handler import copy
 
+HOOKS_D_DIR = "hooks.d"
+PRE_APPLY = "pre_apply"
+POST_APPLY = "post_apply"
+# Header lines such as `# dotctl-after: fonts, services`
+HEADER_PATTERN = re.compile(
+    r"^#\s*dotctl-(phase|section|after|timeout)\s*:\s*(.*?)\s*$"
+)
+HEADER_LINES = 30
+
+
+@dataclass
+class Hook:
+    name: str
+    path: Path
+    phase: str = POST_APPLY
+    section: str | None = None
+    after: list[str] = field(default_factory=list)
+    timeout: int | None = None
+
+
+@dataclass
+class HookResult:
+    hook: Hook
+    returncode: int | None = None
+    start: float = 0.0
+    end: float = 0.0
+    output: str = ""
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
 
 def hooks_initializer(
     app_hooks_dir_path: Path = Path(app_hooks_directory),
@@ -71,19 +116,304 @@ def run_shell_script(
         return e.returncode
 
 
+def parse_hook(path: Path) -> Hook:
+    """
+    Reads the metadata of a hooks.d script from its leading comment lines.
+
+    `# dotctl-phase:` is pre_apply or post_apply (default), `# dotctl-section:`
+    ties the hook to one save section, `# dotctl-after:` lists the hooks
+    (file names without extension) that must finish first and
+    `# dotctl-timeout:` overrides the hooks timeout in seconds.
+    """
+    hook = Hook(name=path.stem, path=path)
+    with open(path, "r", errors="replace") as file:
+        for _, line in zip(range(HEADER_LINES), file):
+            match = HEADER_PATTERN.match(line.strip())
+            if not match:
+                continue
+            key, value = match.groups()
+            if key == "phase":
+                hook.phase = value.replace("-", "_")
+                if hook.phase not in (PRE_APPLY, POST_APPLY):
+                    raise RuntimeError(
+                        f"❌ Hook '{path.name}' has an unknown dotctl-phase: {value}"
+                    )
+            elif key == "section":
+                hook.section = value or None
+            elif key == "after":
+                hook.after += [name for name in re.split(r"[,\s]+", value) if name]
+            elif key == "timeout":
+                if not value.isdigit():
+                    raise RuntimeError(
+                        f"❌ Hook '{path.name}' has an invalid dotctl-timeout: {value}"
+                    )
+                hook.timeout = int(value)
+    return hook
+
+
+def _read_hooks(hooks_d_dir: Path) -> list[Hook]:
+    if not hooks_d_dir.is_dir():
+        return []
+    return [
+        parse_hook(path)
+        for path in sorted(hooks_d_dir.iterdir())
+        if path.is_file() and not path.name.startswith(".")
+    ]
+
+
+def load_hooks(hooks_d_dir: Path, phase: str, section: str | None = None) -> list[Hook]:
+    """Returns the hooks.d scripts of a phase and section, ordered by name."""
+    return [
+        hook
+        for hook in _read_hooks(hooks_d_dir)
+        if hook.phase == phase and hook.section == section
+    ]
+
+
+def _check_graph(hooks: list[Hook]) -> None:
+    names = {hook.name for hook in hooks}
+    for hook in hooks:
+        missing = [name for name in hook.after if name not in names]
+        if missing:
+            raise RuntimeError(
+                f"❌ Hook '{hook.name}' runs after unknown hooks: {', '.join(missing)}"
+            )
+
+    # Kahn's algorithm: whatever is left over sits on a cycle
+    remaining = {hook.name: set(hook.after) for hook in hooks}
+    while ready := [name for name, deps in remaining.items() if not deps]:
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    if remaining:
+        raise RuntimeError(f"❌ Hooks depend on each other: {', '.join(remaining)}")
+
+
+def _run_hook(
+    hook: Hook, timeout: int, slots: threading.Semaphore | None = None
+) -> HookResult:
+    """
+    Runs a hook without a terminal, capturing stdout and stderr together.
+
+    With slots, the hook only starts once it holds one of them.
+    """
+    with slots or nullcontext():
+        return _run_process(hook, timeout)
+
+
+def _run_process(hook: Hook, timeout: int) -> HookResult:
+    if os.access(hook.path, os.X_OK):
+        cmd = [str(hook.path)]
+    else:
+        cmd = ["bash", str(hook.path)]
+    timeout = hook.timeout if hook.timeout is not None else timeout
+
+    result = HookResult(hook=hook, start=time.monotonic())
+    try:
+        # A session of its own lets a timeout kill everything the hook started
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            cwd=hook.path.parent,
+            start_new_session=True,
+            text=True,
+            errors="replace",
+        )
+    except OSError as e:
+        # e.g. an executable script without a shebang line
+        result.output = f"could not be started: {e.strerror or e}"
+        result.returncode = 126
+        result.end = time.monotonic()
+        return result
+    try:
+        result.output, _ = process.communicate(timeout=timeout if timeout > 0 else None)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        result.output, _ = process.communicate()
+        result.timed_out = True
+    result.returncode = process.returncode
+    result.end = time.monotonic()
+    return result
+
+
+def _print_result(result: HookResult) -> None:
+    """Prints a finished hook's output as one block, each line prefixed."""
+    if result.ok:
+        status = "✅"
+    elif result.timed_out:
+        status = "⏱️"
+    else:
+        status = "❌"
+    with output_lock:
+        print(f"{status} [{result.hook.name}] finished in {result.duration:.1f}s")
+        for line in result.output.splitlines():
+            print(f"  [{result.hook.name}] {line}")
+        if result.timed_out:
+            print(f"  [{result.hook.name}] timed out and was terminated")
+        elif not result.ok:
+            print(f"  [{result.hook.name}] exited with code {result.returncode}")
+
+
+def run_hook_graph(
+    hooks: list[Hook],
+    jobs: int = __DEFAULT_JOBS__,
+    timeout: int = 0,
+    ignore_errors: bool = False,
+    slots: threading.Semaphore | None = None,
+) -> list[HookResult]:
+    """
+    Runs hooks in a bounded pool, starting each as soon as its dependencies finish.
+
+    Graphs running side by side share their bound through slots, a
+    semaphore every hook process must hold. Without ignore_errors, no new
+    hook is started once one fails and a RuntimeError is raised after the
+    running ones have finished. With it, a failed hook still releases the
+    hooks that run after it.
+    """
+    _check_graph(hooks)
+    pending = {hook.name: set(hook.after) for hook in hooks}
+    by_name = {hook.name: hook for hook in hooks}
+    results: list[HookResult] = []
+    failed: list[str] = []
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        running = {}
+
+        def start_ready() -> None:
+            for name in [name for name, deps in pending.items() if not deps]:
+                del pending[name]
+                running[executor.submit(_run_hook, by_name[name], timeout, slots)] = (
+                    name
+                )
+
+        start_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                result = future.result()
+                results.append(result)
+                _print_result(result)
+                if not result.ok:
+                    failed.append(name)
+                if result.ok or ignore_errors:
+                    for deps in pending.values():
+                        deps.discard(name)
+            if not failed or ignore_errors:
+                start_ready()
+
+    with output_lock:
+        for name in pending:
+            print(f"⏭️ [{name}] skipped")
+    if failed and not ignore_errors:
+        raise RuntimeError(f"❌ Hooks failed: {', '.join(failed)}")
+    return results
+
+
+def critical_path(results: list[HookResult]) -> tuple[list[str], float]:
+    """The dependency chain with the largest total run time."""
+    by_name = {result.hook.name: result for result in results}
+    paths: dict[str, tuple[list[str], float]] = {}
+
+    def longest(name: str) -> tuple[list[str], float]:
+        if name not in paths:
+            result = by_name[name]
+            before = [longest(dep) for dep in result.hook.after if dep in by_name]
+            chain, total = max(before, key=lambda item: item[1], default=([], 0.0))
+            paths[name] = ([*chain, name], total + result.duration)
+        return paths[name]
+
+    return max(map(longest, by_name), key=lambda item: item[1], default=([], 0.0))
+
+
+def show_hook_summary(results: list[HookResult], wall_time: float) -> None:
+    if not results:
+        return
+    chain, total = critical_path(results)
+    busy = sum(result.duration for result in results)
+    with output_lock:
+        log(f"Ran {len(results)} hooks in {wall_time:.1f}s ({busy:.1f}s of hook time)")
+        print(f"  critical path ({total:.1f}s): {' -> '.join(chain)}")
+
+
 def run_hooks(
     app_hooks_dir_path: Path = Path(app_hooks_directory),
     pre_apply_hooks: bool = False,
     post_apply_hooks: bool = False,
     ignore_errors: bool = False,
     timeout: int = 0,
+    jobs: int = __DEFAULT_JOBS__,
 ):
-    if pre_apply_hooks:
-        log("Applying pre-apply hooks...")
-        script_file = app_hooks_dir_path / "pre_apply.sh"
-        run_shell_script(script_file, timeout=timeout, ignore_errors=ignore_errors)
+    """
+    Runs the hooks of the selected phases.
 
+    The legacy pre_apply.sh/post_apply.sh script of a phase runs first,
+    interactively, followed by the hooks.d scripts of that phase.
+    """
+    phases = []
+    if pre_apply_hooks:
+        phases.append((PRE_APPLY, "pre-apply"))
     if post_apply_hooks:
-        log("Applying post-apply hooks...")
-        script_file = app_hooks_dir_path / "post_apply.sh"
-        run_shell_script(script_file, timeout=timeout, ignore_errors=ignore_errors)
+        phases.append((POST_APPLY, "post-apply"))
+
+    for phase, label in phases:
+        log(f"Applying {label} hooks...")
+        script_file = app_hooks_dir_path / f"{phase}.sh"
+        if script_file.exists():
+            run_shell_script(script_file, timeout=timeout, ignore_errors=ignore_errors)
+
+        hooks = load_hooks(app_hooks_dir_path / HOOKS_D_DIR, phase)
+        if hooks:
+            start = time.monotonic()
+            results = run_hook_graph(
+                hooks, jobs=jobs, timeout=timeout, ignore_errors=ignore_errors
+            )
+            show_hook_summary(results, time.monotonic() - start)
+
+
+def section_hook_runner(
+    phase: str,
+    app_hooks_dir_path: Path = Path(app_hooks_directory),
+    ignore_errors: bool = False,
+    timeout: int = 0,
+    jobs: int = __DEFAULT_JOBS__,
+    slots: threading.Semaphore | None = None,
+) -> Callable[[str], None] | None:
+    """
+    Returns a function running the hooks.d scripts of a phase for one section.
+
+    The scripts are read once up front; None means no section has hooks
+    in this phase. Sections run concurrently, so at most `jobs` hook
+    processes run at once across all of them; pass the same slots to the
+    runners of several phases to share that bound.
+    """
+    if slots is None:
+        slots = threading.BoundedSemaphore(jobs)
+    by_section: dict[str, list[Hook]] = {}
+    for hook in _read_hooks(app_hooks_dir_path / HOOKS_D_DIR):
+        if hook.phase == phase and hook.section:
+            by_section.setdefault(hook.section, []).append(hook)
+    if not by_section:
+        return None
+    label = phase.replace("_", "-")
+
+    def run(section: str) -> None:
+        hooks = by_section.get(section)
+        if not hooks:
+            return
+        with output_lock:
+            log(f'Applying {label} hooks of "{section}"...')
+        start = time.monotonic()
+        results = run_hook_graph(
+            hooks,
+            jobs=jobs,
+            timeout=timeout,
+            ignore_errors=ignore_errors,
+            slots=slots,
+        )
+        show_hook_summary(results, time.monotonic() - start)
+
+    return run
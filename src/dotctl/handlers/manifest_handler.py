@@ -0,0 +1,116 @@
+import json
+import os
+from pathlib import Path
+from dotctl.paths import app_manifest_directory, app_config_file, app_hooks_directory
+from .fs_handler import file_digest, scan_tree
+from .sync_handler import SyncTask
+
+MANIFEST_VERSION = 1
+
+
+class SaveManifest:
+    """
+    Persistent record of what the last `save` copied for a profile.
+
+    For every entry it keeps the stat signature (and content digest) of the
+    source files and the stat signature of their copy in the profile repo.
+    An entry whose source content and repo copy both still match needs no
+    rsync and produces no git change, so it can be skipped entirely.
+    """
+
+    def __init__(self, profile: str, manifest_dir: Path = Path(app_manifest_directory)):
+        self.path = manifest_dir / f"{profile}.json"
+        self.entries: dict[str, dict] = {}
+        self.repo_files: dict[str, list] = {}
+        try:
+            data = json.loads(self.path.read_text())
+            if data.get("version") == MANIFEST_VERSION:
+                self.entries = data.get("entries", {})
+                self.repo_files = data.get("repo_files", {})
+        except (FileNotFoundError, ValueError):
+            pass
+
+    @staticmethod
+    def _key(task: SyncTask) -> str:
+        return f"{task.section}/{task.entry}"
+
+    @staticmethod
+    def _repo_scan() -> dict[str, list]:
+        # Files edited in the repo directly (config, hooks) bypass the entries
+        return {
+            "config": scan_tree(Path(app_config_file)),
+            "hooks": scan_tree(Path(app_hooks_directory)),
+        }
+
+    def _source_unchanged(self, task: SyncTask, stored: dict[str, list]) -> bool:
+        current = scan_tree(task.source)
+        if current.keys() != stored.keys():
+            return False
+        for rel, signature in current.items():
+            previous = stored[rel]
+            if signature == previous[:3]:
+                continue
+            # Touched but possibly identical: fall back to the content digest
+            if signature[0] < 0 or signature[0] != previous[0] or not previous[3:]:
+                return False
+            file_path = task.source if rel == "." else task.source / rel
+            if file_digest(file_path) != previous[3]:
+                return False
+        return True
+
+    def is_unchanged(self, task: SyncTask) -> bool:
+        stored = self.entries.get(self._key(task))
+        if stored is None:
+            return False
+        try:
+            return scan_tree(task.dest) == stored["dest"] and self._source_unchanged(
+                task, stored["source"]
+            )
+        except (OSError, KeyError):
+            return False
+
+    def changed_tasks(self, tasks: list[SyncTask]) -> list[SyncTask]:
+        return [task for task in tasks if not self.is_unchanged(task)]
+
+    def repo_unchanged(self) -> bool:
+        try:
+            return bool(self.repo_files) and self._repo_scan() == self.repo_files
+        except OSError:
+            return False
+
+    def record(self, task: SyncTask) -> None:
+        """Stores the post-save state of an entry; unreadable entries are dropped."""
+        key = self._key(task)
+        previous = self.entries.get(key, {}).get("source", {})
+        try:
+            source = scan_tree(task.source)
+            for rel, signature in source.items():
+                if signature[0] < 0 or isinstance(signature[2], str):
+                    continue
+                old = previous.get(rel, [])
+                if old[:3] == signature and old[3:]:
+                    signature.append(old[3])
+                else:
+                    file_path = task.source if rel == "." else task.source / rel
+                    signature.append(file_digest(file_path))
+            self.entries[key] = {"source": source, "dest": scan_tree(task.dest)}
+        except OSError:
+            self.entries.pop(key, None)
+
+    def save(self) -> None:
+        try:
+            self.repo_files = self._repo_scan()
+        except OSError:
+            self.repo_files = {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(".tmp")
+        temp_path.write_text(
+            json.dumps(
+                {
+                    "version": MANIFEST_VERSION,
+                    "entries": self.entries,
+                    "repo_files": self.repo_files,
+                }
+            )
+        )
+        os.replace(temp_path, self.path)
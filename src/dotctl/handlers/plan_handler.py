@@ -0,0 +1,146 @@
+import json
+from dataclasses import dataclass, field, asdict
+from .fs_handler import scan_tree
+from .sync_handler import SyncTask
+
+
+@dataclass
+class EntryPlan:
+    section: str
+    entry: str
+    source: str
+    dest: str
+    added: list[str] = field(default_factory=list)
+    modified: list[str] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+    transfer_bytes: int = 0
+    requires_sudo: bool = False
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.modified or self.deleted or self.requires_sudo)
+
+
+@dataclass
+class Plan:
+    action: str
+    entries: list[EntryPlan] = field(default_factory=list)
+
+    @property
+    def changed_entries(self) -> list[EntryPlan]:
+        return [entry for entry in self.entries if entry.changed]
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["entries"] = [asdict(entry) for entry in self.changed_entries]
+        data["summary"] = {
+            "entries": len(self.changed_entries),
+            "added": sum(len(entry.added) for entry in self.entries),
+            "modified": sum(len(entry.modified) for entry in self.entries),
+            "deleted": sum(len(entry.deleted) for entry in self.entries),
+            "transfer_bytes": sum(entry.transfer_bytes for entry in self.entries),
+        }
+        return json.dumps(data, indent=2)
+
+
+def _format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size} B"
+
+
+def plan_entry(task: SyncTask) -> EntryPlan:
+    """
+    Diffs one entry by size/mtime the way the sync backends decide to copy.
+
+    Only stat calls are used, so planning never needs sudo for readable
+    paths; unreadable ones are flagged with requires_sudo instead.
+    """
+    plan = EntryPlan(
+        section=task.section,
+        entry=task.entry,
+        source=str(task.source),
+        dest=str(task.dest),
+    )
+    try:
+        source = scan_tree(task.source)
+        dest = scan_tree(task.dest)
+    except PermissionError:
+        plan.requires_sudo = True
+        return plan
+
+    if not source:
+        return plan
+
+    def label(rel: str) -> str:
+        return task.entry if rel == "." else f"{task.entry}/{rel}"
+
+    for rel, signature in source.items():
+        previous = dest.get(rel)
+        if previous is None:
+            plan.added.append(label(rel))
+            plan.transfer_bytes += max(signature[0], 0)
+        elif signature[0] < 0 and previous[0] < 0:
+            continue
+        elif isinstance(signature[2], str) and isinstance(previous[2], str):
+            if signature[2] != previous[2]:
+                plan.modified.append(label(rel))
+        elif signature[:2] != previous[:2]:
+            plan.modified.append(label(rel))
+            plan.transfer_bytes += max(signature[0], 0)
+
+    removed = sorted(rel for rel in dest if rel not in source)
+    for rel in removed:
+        # Report a removed directory once instead of every file below it
+        if not any(rel.startswith(f"{parent}/") for parent in removed):
+            plan.deleted.append(label(rel))
+    return plan
+
+
+def build_plan(action: str, tasks: list[SyncTask]) -> Plan:
+    return Plan(action=action, entries=[plan_entry(task) for task in tasks])
+
+
+def show_plan(plan: Plan, as_json: bool = False) -> None:
+    if as_json:
+        print(plan.to_json())
+        return
+
+    changed = plan.changed_entries
+    if not changed:
+        print(f"Plan for {plan.action}: nothing to do.")
+        return
+
+    print(f"Plan for {plan.action}:")
+    for entry in changed:
+        if entry.requires_sudo:
+            print(f"  {entry.section}/{entry.entry}: requires sudo to inspect")
+            continue
+        print(
+            f"  {entry.section}/{entry.entry}: "
+            f"+{len(entry.added)} ~{len(entry.modified)} -{len(entry.deleted)} "
+            f"({_format_size(entry.transfer_bytes)})"
+        )
+        for path in entry.added:
+            print(f"      + {path}")
+        for path in entry.modified:
+            print(f"      ~ {path}")
+        for path in entry.deleted:
+            print(f"      - {path}")
+
+
+def confirm_plan(plan: Plan, as_json: bool = False, no_confirm: bool = False) -> bool:
+    """Shows the plan and asks whether to execute it."""
+    show_plan(plan, as_json=as_json)
+    if not plan.changed_entries or no_confirm:
+        return True
+    confirm = input("Do you want to execute this plan? (y/N): ")
+    return confirm.lower() == "y"
+
+
+def planned_tasks(plan: Plan, tasks: list[SyncTask]) -> list[SyncTask]:
+    """Keeps only the tasks whose entry has changes in the plan."""
+    changed = {(entry.section, entry.entry) for entry in plan.changed_entries}
+    return [task for task in tasks if (task.section, task.entry) in changed]
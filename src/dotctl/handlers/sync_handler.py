@@ -0,0 +1,413 @@
+import os
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from dotctl import __DEFAULT_JOBS__
+from dotctl.exception import exception_handler
+from dotctl.utils import log
+from .data_handler import rsync, rsync_batch, get_sudo_pass, run_command
+from .fs_handler import HashCache, native_sync, expand_entries, list_directory
+from dotctl.paths import app_hash_cache_file
+
+
+@dataclass
+class SyncTask:
+    section: str
+    entry: str
+    source: Path
+    dest: Path
+    is_dir: bool = False
+    sudo_pass: str | None = None
+    source_root: Path | None = None
+    dest_root: Path | None = None
+
+
+@dataclass
+class SyncResult:
+    skip_sudo: bool
+    sudo_pass: str | None
+    synced: list[SyncTask] = field(default_factory=list)
+    skipped: list[SyncTask] = field(default_factory=list)
+    failed: list[SyncTask] = field(default_factory=list)
+
+
+def section_tasks(
+    section: str,
+    entries: list[str],
+    source_base_dir: Path,
+    dest_base_dir: Path,
+    list_names: Callable[[Path], Iterable[str]] = list_directory,
+) -> list[SyncTask]:
+    """
+    Builds one sync task per entry of a config section.
+
+    Pattern entries are expanded against the source side, listing each
+    directory through list_names.
+    """
+    return [
+        SyncTask(
+            section=section,
+            entry=entry,
+            source=source_base_dir / entry,
+            dest=dest_base_dir / entry,
+            source_root=source_base_dir,
+            dest_root=dest_base_dir,
+        )
+        for entry in expand_entries(entries, source_base_dir, list_names)
+    ]
+
+
+def is_writable(path: Path) -> bool:
+    """Checks write access on the path or, if missing, its nearest existing parent."""
+    for candidate in (path, *path.parents):
+        try:
+            if candidate.exists():
+                return os.access(candidate, os.W_OK)
+        except PermissionError:
+            return False
+    return False
+
+
+def prompt_sudo(path: Path, result: SyncResult) -> str | None:
+    """Returns the password to use for path, prompting unless already settled."""
+    temp_pass = None
+    if not result.skip_sudo and not result.sudo_pass:
+        temp_pass, result.sudo_pass, result.skip_sudo = get_sudo_pass(path)
+    return temp_pass or result.sudo_pass
+
+
+def resolve_sudo(
+    tasks: list[SyncTask],
+    skip_sudo: bool = False,
+    sudo_pass: str | None = None,
+    check_dest: bool = True,
+) -> SyncResult:
+    """
+    Probes every task and settles its sudo requirements up front.
+
+    All interactive prompts happen here, serially, so that the tasks handed
+    to the worker pool never need to ask the user anything. Set check_dest
+    to False when the destination is not a filesystem path (e.g. an archive).
+
+    :return: SyncResult whose `synced` list holds the runnable tasks
+    """
+    result = SyncResult(skip_sudo=skip_sudo, sudo_pass=sudo_pass)
+
+    for task in tasks:
+        temp_pass = None
+        privileged = False
+
+        try:
+            source_exists = task.source.exists()
+            task.is_dir = task.source.is_dir()
+        except PermissionError:
+            if result.skip_sudo:
+                log(f"PermissionError: skipping {task.source}")
+                result.skipped.append(task)
+                continue
+            if not result.sudo_pass:
+                temp_pass, result.sudo_pass, result.skip_sudo = get_sudo_pass(
+                    task.source
+                )
+            probe_pass = temp_pass or result.sudo_pass
+            source_exists, _, _ = run_command(f"ls {task.source}", probe_pass)
+            _, _, exit_code = run_command(f"test -d {task.source}", probe_pass)
+            task.is_dir = exit_code == 0
+            privileged = True
+
+        if not source_exists:
+            continue
+
+        assert task.source != task.dest, "Source and destination can't be the same"
+
+        if not privileged and check_dest and not is_writable(task.dest):
+            log(f"PermissionError: {task.dest} requires sudo access.")
+            privileged = True
+
+        if privileged:
+            if not temp_pass and not result.sudo_pass and not result.skip_sudo:
+                temp_pass, result.sudo_pass, result.skip_sudo = get_sudo_pass(task.dest)
+            task.sudo_pass = temp_pass or result.sudo_pass
+            if not task.sudo_pass:
+                log(f"Skipping {task.source}")
+                result.skipped.append(task)
+                continue
+
+        result.synced.append(task)
+
+    return result
+
+
+def _run_task(
+    task: SyncTask,
+    native: bool = False,
+    inplace: bool = False,
+    hashes: HashCache | None = None,
+) -> None:
+    if native and not task.sudo_pass:
+        native_sync(task.source, task.dest, checksum=hashes is not None, hashes=hashes)
+    else:
+        rsync(
+            task.source,
+            task.dest,
+            task.sudo_pass,
+            is_dir=task.is_dir,
+            inplace=inplace,
+            checksum=hashes is not None,
+        )
+
+
+def _run_batch(
+    batch: list[SyncTask],
+    native: bool = False,
+    inplace: bool = False,
+    hashes: HashCache | None = None,
+) -> list[tuple[SyncTask, Exception | None]]:
+    """
+    Runs a batch of tasks sharing roots and sudo class.
+
+    Unprivileged batches are copied in-process when native is set; the rest
+    go through a single rsync invocation.
+    """
+    use_native = native and not batch[0].sudo_pass
+    if use_native or len(batch) == 1 or batch[0].source_root is None:
+        outcomes = []
+        for task in batch:
+            try:
+                _run_task(task, native=use_native, inplace=inplace, hashes=hashes)
+                outcomes.append((task, None))
+            except Exception as e:
+                outcomes.append((task, e))
+        return outcomes
+
+    first = batch[0]
+    try:
+        report = rsync_batch(
+            first.source_root,
+            first.dest_root,
+            [task.entry for task in batch],
+            first.sudo_pass,
+            inplace=inplace,
+            checksum=hashes is not None,
+        )
+    except Exception as e:
+        return [(task, e) for task in batch]
+
+    for message in report.errors.get("", []):
+        log(f"rsync: {message}")
+
+    outcomes = []
+    for task in batch:
+        messages = report.errors.get(task.entry)
+        if not messages:
+            outcomes.append((task, None))
+        elif any("Permission denied" in message for message in messages):
+            outcomes.append((task, PermissionError("\n".join(messages))))
+        else:
+            outcomes.append((task, RuntimeError("\n".join(messages))))
+    return outcomes
+
+
+def batch_tasks(tasks: list[SyncTask], native: bool = False) -> list[list[SyncTask]]:
+    """
+    Groups the tasks of one section root and sudo class into a single batch.
+
+    Only tasks that go through rsync are grouped. With native set, tasks
+    that need no sudo are copied in-process and each stays a batch of its
+    own, so the worker pool copies them concurrently.
+    """
+    batches: dict[tuple, list[SyncTask]] = {}
+    for task in tasks:
+        key = (task.section, task.source_root, task.dest_root, task.sudo_pass)
+        if task.source_root is None or (native and not task.sudo_pass):
+            key = (id(task),)
+        batches.setdefault(key, []).append(task)
+    return list(batches.values())
+
+
+@exception_handler
+def sync_entries(
+    tasks: list[SyncTask],
+    skip_sudo: bool = False,
+    sudo_pass: str | None = None,
+    jobs: int = __DEFAULT_JOBS__,
+    batch: bool = True,
+    native: bool = True,
+    inplace: bool = False,
+    checksum: bool = False,
+) -> SyncResult:
+    """
+    Synchronizes tasks through a bounded worker pool.
+
+    Sudo prompts are resolved once before any worker starts; a task that
+    still hits a permission error while running is retried serially with
+    the interactive fallback afterwards. With batch enabled, the entries of
+    a section that share a sudo class are transferred by a single rsync.
+    With native enabled, entries that need no sudo are copied in-process,
+    one work item each, and rsync is only spawned for privileged ones. Set
+    inplace when nothing reads the destination while it is written (e.g.
+    the profile repo during save), so rsync skips its temporary copies.
+    With checksum set, files are compared by content and only the ones that
+    differ are written; digests are kept in a persistent hash cache.
+    """
+    hashes = HashCache(Path(app_hash_cache_file)) if checksum else None
+    result = resolve_sudo(tasks, skip_sudo=skip_sudo, sudo_pass=sudo_pass)
+    runnable, result.synced = result.synced, []
+    batches = batch_tasks(runnable, native) if batch else [[t] for t in runnable]
+    denied: list[SyncTask] = []
+
+    def settle(task: SyncTask, error: Exception | None) -> None:
+        if error is None:
+            result.synced.append(task)
+        elif isinstance(error, PermissionError) and not task.sudo_pass:
+            denied.append(task)
+        else:
+            log(f"Failed to sync {task.source}: {error}")
+            result.failed.append(task)
+
+    if jobs <= 1 or len(batches) <= 1:
+        for tasks_batch in batches:
+            for task, error in _run_batch(tasks_batch, native, inplace, hashes):
+                settle(task, error)
+    else:
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = [
+                executor.submit(_run_batch, b, native, inplace, hashes) for b in batches
+            ]
+            for future in as_completed(futures):
+                for task, error in future.result():
+                    settle(task, error)
+
+    _retry_denied(denied, result, inplace, hashes)
+    # Patterns expanded after the sync must see what it copied
+    list_directory.cache_clear()
+
+    if hashes is not None:
+        hashes.save()
+    return result
+
+
+def _retry_denied(
+    denied: list[SyncTask],
+    result: SyncResult,
+    inplace: bool = False,
+    hashes: HashCache | None = None,
+) -> None:
+    """Retries tasks refused at run time serially, prompting for sudo."""
+    for task in denied:
+        log(f"PermissionError: {task.source} requires sudo access.")
+        task.sudo_pass = prompt_sudo(task.source, result)
+        if not task.sudo_pass:
+            result.skipped.append(task)
+            continue
+        try:
+            _run_task(task, inplace=inplace, hashes=hashes)
+            result.synced.append(task)
+        except Exception as e:
+            log(f"Failed to sync {task.source}: {e}")
+            result.failed.append(task)
+
+
+def sync_sections(
+    tasks: list[SyncTask],
+    before: Callable[[str], None] | None = None,
+    after: Callable[[str], None] | None = None,
+    skip_sudo: bool = False,
+    sudo_pass: str | None = None,
+    jobs: int = __DEFAULT_JOBS__,
+    native: bool = True,
+    checksum: bool = False,
+    sections: Iterable[str] = (),
+) -> SyncResult:
+    """
+    Synchronizes tasks as one pipeline per section: before, transfer, after.
+
+    Sections run concurrently, so the after step of one section (e.g. its
+    post-apply hooks) overlaps the transfers of the others. The transfers
+    of every section share one pool of `jobs` workers, batched as in
+    sync_entries. Pipelines also run for the given sections that have no
+    tasks, so their before and after steps are not skipped. Sudo is
+    resolved for every task before any pipeline starts; a section with
+    tasks denied at run time only runs its after step once they have been
+    retried. A failing before step fails that section's tasks; the first
+    error of any step is raised once every pipeline has finished.
+    """
+    hashes = HashCache(Path(app_hash_cache_file)) if checksum else None
+    result = resolve_sudo(tasks, skip_sudo=skip_sudo, sudo_pass=sudo_pass)
+    runnable, result.synced = result.synced, []
+    by_section: dict[str, list[SyncTask]] = {section: [] for section in sections}
+    for task in tasks:
+        by_section.setdefault(task.section, [])
+    for task in runnable:
+        by_section[task.section].append(task)
+    lock = threading.Lock()
+    errors: list[Exception] = []
+    deferred: dict[str, list[SyncTask]] = {}
+
+    def pipeline(
+        transfers: ThreadPoolExecutor, section: str, section_tasks: list[SyncTask]
+    ) -> list[SyncTask]:
+        try:
+            if before:
+                before(section)
+        except Exception:
+            with lock:
+                result.failed += section_tasks
+            raise
+
+        denied = []
+        futures = [
+            transfers.submit(_run_batch, tasks_batch, native, False, hashes)
+            for tasks_batch in batch_tasks(section_tasks, native)
+        ]
+        for future in as_completed(futures):
+            for task, error in future.result():
+                with lock:
+                    if error is None:
+                        result.synced.append(task)
+                    elif isinstance(error, PermissionError) and not task.sudo_pass:
+                        denied.append(task)
+                    else:
+                        log(f"Failed to sync {task.source}: {error}")
+                        result.failed.append(task)
+
+        if after and not denied:
+            after(section)
+        return denied
+
+    # Pipelines mostly wait on their hooks and transfers, only the transfers
+    # are bounded by jobs
+    with (
+        ThreadPoolExecutor(max_workers=jobs) as transfers,
+        ThreadPoolExecutor(max_workers=max(1, len(by_section))) as pipelines,
+    ):
+        futures = {
+            pipelines.submit(pipeline, transfers, section, section_tasks): section
+            for section, section_tasks in by_section.items()
+        }
+        for future in as_completed(futures):
+            try:
+                denied = future.result()
+            except Exception as e:
+                log(f'Section "{futures[future]}" failed: {e}')
+                errors.append(e)
+                continue
+            if denied:
+                deferred[futures[future]] = denied
+
+    for section, denied in deferred.items():
+        _retry_denied(denied, result, hashes=hashes)
+        try:
+            if after:
+                after(section)
+        except Exception as e:
+            errors.append(e)
+    list_directory.cache_clear()
+
+    if hashes is not None:
+        hashes.save()
+    if errors:
+        raise errors[0]
+    return result
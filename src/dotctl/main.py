@@ -1,20 +1,9 @@
 from enum import Enum
 from pathlib import Path
 from dataclasses import replace
-from dotctl import __APP_NAME__, __APP_VERSION__
+from dotctl import __APP_NAME__
 from .arg_manager import get_parser
 from .exception import exception_handler, check_req_commands
-from .actions.initializer import initialise, initializer_default_props
-from .actions.saver import save, saver_default_props
-from .actions.activator import apply, activator_default_props
-from .actions.lister import get_profile_list, lister_default_props
-from .actions.switcher import switch, switcher_default_props
-from .actions.puller import pull, puller_default_props
-from .actions.creator import create, creator_default_props
-from .actions.remover import remove, remover_default_props
-from .actions.exporter import exporter, exporter_default_props
-from .actions.importer import importer, importer_default_props
-from .actions.wiper import wipe, wiper_default_props
 
 
 class Action(Enum):
@@ -34,6 +23,8 @@ class Action(Enum):
     DEL = "del"
     IMPORT = "import"
     EXPORT = "export"
+    FLEET = "fleet"
+    SPARSE = "sparse"
     WIPE = "wipe"
     HELP = "help"
     VERSION = "version"
@@ -63,6 +54,8 @@ class DotCtl:
             Action.DEL: self.remove_profile,
             Action.EXPORT: self.export_profile,
             Action.IMPORT: self.import_profile,
+            Action.FLEET: self.fleet_apply,
+            Action.SPARSE: self.sparse_sections,
             Action.WIPE: self.wipe_profile,
         }
         action_methods.get(self.action, lambda: None)()
@@ -74,20 +67,42 @@ class DotCtl:
 
     def init_profile(self):
         """Initialize a new dotfiles profile."""
+        from .actions.initializer import initialise, initializer_default_props
+
         props = self._build_props(
-            initializer_default_props, "git_url", "profile", "config", "env"
+            initializer_default_props,
+            "git_url",
+            "profile",
+            "config",
+            "env",
+            "depth",
+            "filter",
+            "sections",
+            "worktrees",
         )
         initialise(props)
 
     def save_dots(self):
         """Save current dotfiles."""
+        from .actions.saver import save, saver_default_props
+
         props = self._build_props(
-            saver_default_props, "skip_sudo", "password", "profile"
+            saver_default_props,
+            "skip_sudo",
+            "password",
+            "profile",
+            "jobs",
+            "dry_run",
+            "plan",
+            "json",
+            "no_confirm",
         )
         save(props)
 
     def apply_dots(self):
         """Apply a saved dotfiles profile."""
+        from .actions.activator import apply, activator_default_props
+
         props = self._build_props(
             activator_default_props,
             "skip_sudo",
@@ -98,21 +113,33 @@ class DotCtl:
             "skip_post_hooks",
             "ignore_hook_errors",
             "hooks_timeout",
+            "jobs",
+            "dry_run",
+            "plan",
+            "json",
+            "no_confirm",
+            "checksum",
         )
         apply(props)
 
     def list_profiles(self):
         """List available dotfiles profiles."""
+        from .actions.lister import get_profile_list, lister_default_props
+
         props = self._build_props(lister_default_props, "details", "fetch")
         get_profile_list(props)
 
     def switch_profile(self):
         """Switch to a different dotfiles profile."""
+        from .actions.switcher import switch, switcher_default_props
+
         props = self._build_props(switcher_default_props, "profile", "fetch")
         switch(props)
 
     def create_profile(self):
         """Create a new dotfiles profile."""
+        from .actions.creator import create, creator_default_props
+
         props = self._build_props(
             creator_default_props, "profile", "fetch", "config", "env"
         )
@@ -120,6 +147,8 @@ class DotCtl:
 
     def remove_profile(self):
         """Remove an existing dotfiles profile."""
+        from .actions.remover import remove, remover_default_props
+
         props = self._build_props(
             remover_default_props, "profile", "fetch", "no_confirm"
         )
@@ -127,25 +156,66 @@ class DotCtl:
 
     def export_profile(self):
         """Export dotfiles profile."""
+        from .actions.exporter import exporter, exporter_default_props
+
         props = self._build_props(
-            exporter_default_props, "skip_sudo", "password", "profile"
+            exporter_default_props,
+            "skip_sudo",
+            "password",
+            "profile",
+            "jobs",
+            "archive_format",
+            "store",
+            "since",
         )
         exporter(props)
 
     def import_profile(self):
         """Import a dotfiles profile."""
+        from .actions.importer import importer, importer_default_props
+
         props = self._build_props(
-            importer_default_props, "skip_sudo", "password", "profile"
+            importer_default_props,
+            "skip_sudo",
+            "password",
+            "profile",
+            "jobs",
+            "store",
         )
         importer(props)
 
+    def fleet_apply(self):
+        """Apply a dotfiles profile to a fleet of hosts."""
+        from .actions.deployer import deploy, deployer_default_props
+
+        props = self._build_props(
+            deployer_default_props,
+            "inventory",
+            "profile",
+            "jobs",
+            "transport",
+            "skip_hooks",
+        )
+        deploy(props)
+
+    def sparse_sections(self):
+        """Select the sections checked out on this host."""
+        from .actions.selector import select_sections, selector_default_props
+
+        props = self._build_props(selector_default_props, "sections", "disable")
+        select_sections(props)
+
     def wipe_profile(self):
         """Wipe dotfiles profile."""
+        from .actions.wiper import wipe, wiper_default_props
+
         props = self._build_props(wiper_default_props, "no_confirm")
         wipe(props)
 
     def pull_profile(self):
         """Pull dotfiles profile."""
+        from .actions.puller import pull, puller_default_props
+
         pull(puller_default_props)
 
 
@@ -155,6 +225,8 @@ def main():
     args = parser.parse_args()
 
     if args.version:
+        from dotctl import __APP_VERSION__
+
         print(f"{__APP_NAME__}: {__APP_VERSION__}")
         return
 
@@ -186,6 +258,21 @@ def main():
         "details": getattr(args, "details", False),
         "fetch": getattr(args, "fetch", False),
         "no_confirm": getattr(args, "no_confirm", False),
+        "jobs": getattr(args, "jobs", None),
+        "dry_run": getattr(args, "dry_run", False),
+        "plan": getattr(args, "plan", False),
+        "json": getattr(args, "json", False),
+        "archive_format": getattr(args, "archive_format", None),
+        "store": getattr(args, "store", None),
+        "since": getattr(args, "since", None),
+        "checksum": getattr(args, "checksum", False),
+        "inventory": getattr(args, "inventory", None),
+        "transport": getattr(args, "transport", None),
+        "depth": getattr(args, "depth", None),
+        "filter": getattr(args, "filter", None),
+        "sections": getattr(args, "sections", None),
+        "disable": getattr(args, "disable", False),
+        "worktrees": getattr(args, "worktrees", False),
     }
 
     dot_ctl_obj = DotCtl(**common_args)
@@ -9,6 +9,11 @@ app_home_directory = os.path.join(home_path, f".{__APP_NAME__}")
 app_profile_directory = os.path.join(app_home_directory, "dots")
 app_config_file = os.path.join(app_profile_directory, f"{__APP_NAME__}.yaml")
 app_hooks_directory = os.path.join(app_profile_directory, "hooks")
+app_manifest_directory = os.path.join(app_home_directory, "manifests")
+app_chunk_directory = os.path.join(app_home_directory, "chunks")
+app_cache_directory = os.path.join(app_home_directory, "cache")
+app_hash_cache_file = os.path.join(app_cache_directory, "hashes.json")
+app_worktree_directory = os.path.join(app_home_directory, "worktrees")
 temp_path = os.path.join(app_home_directory, "tmp-%s" % time.time())
 
 config_directory = os.path.join(home_path, ".config")
@@ -1,6 +1,11 @@
 import sys
+import threading
 from dotctl import __APP_NAME__
 
+# Held while printing, so lines from worker threads never split a block of
+# output (e.g. a hook's captured output) that is printed under it
+output_lock = threading.RLock()
+
 
 def new_line():
     sys.stdout.write("\n")
@@ -10,4 +15,5 @@ def new_line():
 def log(msg, *args, **kwargs):
     prefix = f"{__APP_NAME__}: "
     cleaned_msg = msg.removeprefix(prefix).capitalize()
-    print(f"{prefix}{cleaned_msg}", *args, **kwargs)
+    with output_lock:
+        print(f"{prefix}{cleaned_msg}", *args, **kwargs)
@@ -1,7 +1,6 @@
 import argparse
 import re
 from pathlib import Path
-import yaml
 
 
 def valid_git_url(url: str) -> str:
@@ -17,6 +16,8 @@ def valid_git_url(url: str) -> str:
 
 
 def valid_config_file(config: str) -> str:
+    import yaml
+
     config_path = Path(config).resolve()
 
     if not config_path.exists():
@@ -43,3 +44,27 @@ def valid_config_file(config: str) -> str:
         )
 
     return config
+
+
+def valid_jobs(jobs: str) -> int:
+    try:
+        value = int(jobs)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid jobs count: {jobs}")
+
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"Jobs count must be at least 1, got {value}")
+
+    return value
+
+
+def valid_depth(depth: str) -> int:
+    try:
+        value = int(depth)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid clone depth: {depth}")
+
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"Clone depth must be at least 1, got {value}")
+
+    return value
@@ -0,0 +1,191 @@
+import io
+import json
+import os
+import tarfile
+import zipfile
+import pytest
+from dotctl import __EXPORT_META_FILE__
+from dotctl.handlers.archive_handler import (
+    ChunkedArchiveReader,
+    archive_id,
+    archive_index,
+    detect_format,
+    open_archive,
+    open_archive_chain,
+    open_archive_writer,
+)
+
+
+def _zip_bytes() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_STORED) as archive:
+        archive.writestr("plugin.txt", "x")
+    return buffer.getvalue()
+
+
+def test_detect_format_zip(tmp_path):
+    path = tmp_path / "profile.dtsv"
+    path.write_bytes(_zip_bytes())
+    assert detect_format(path) == "v1"
+
+
+def test_detect_format_tar_ending_with_zip(tmp_path):
+    # is_zipfile alone finds the zip stored as the last member
+    path = tmp_path / "profile.dtsv"
+    data = _zip_bytes()
+    with tarfile.open(path, "w", format=tarfile.PAX_FORMAT) as tar:
+        info = tarfile.TarInfo("._export_/x/plugin.zip")
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+    assert detect_format(path) == "v2"
+
+
+def test_detect_format_chunked(tmp_path):
+    path = tmp_path / "profile.dtsv"
+    path.write_text(json.dumps({"format": "chunked", "members": []}))
+    assert detect_format(path) == "chunked"
+
+
+def test_detect_format_unknown(tmp_path):
+    path = tmp_path / "profile.dtsv"
+    path.write_text("not an archive")
+    assert detect_format(path) is None
+    assert detect_format(tmp_path / "missing.dtsv") is None
+
+
+def _profile_tree(root):
+    (root / "conf").mkdir(parents=True)
+    (root / "conf" / "app.rc").write_text("color=blue")
+    (root / "conf" / "link.rc").symlink_to("app.rc")
+    (root / "conf" / "dangling.rc").symlink_to("missing.rc")
+    return root
+
+
+def test_v1_readable_by_earlier_releases(tmp_path):
+    source = _profile_tree(tmp_path / "source")
+    path = tmp_path / "profile.dtsv"
+    with open_archive_writer(path, "v1", meta={"profile": "main"}) as archive:
+        archive.add_tree(source, "")
+
+    # Earlier releases import v1 with ZipFile.extractall
+    with zipfile.ZipFile(path) as archive:
+        assert __EXPORT_META_FILE__ not in archive.namelist()
+        assert "conf/dangling.rc" not in archive.namelist()
+        archive.extractall(tmp_path / "old")
+    assert (tmp_path / "old/conf/link.rc").read_text() == "color=blue"
+
+    with open_archive(path) as archive:
+        archive.extract(archive.members(), tmp_path / "new")
+    assert not (tmp_path / "new/conf/link.rc").is_symlink()
+    assert (tmp_path / "new/conf/link.rc").read_text() == "color=blue"
+
+
+def test_v2_round_trip(tmp_path):
+    source = _profile_tree(tmp_path / "source")
+    (source / "conf" / "wallpaper.jpg").write_bytes(os.urandom(64 * 1024))
+    (source / "conf" / "app.rc").chmod(0o600)
+    path = tmp_path / "profile.dtsv"
+    with open_archive_writer(path, "v2", jobs=2, meta={"profile": "main"}) as archive:
+        archive.add_tree(source, "")
+    assert detect_format(path) == "v2"
+
+    with open_archive(path) as archive:
+        assert archive.meta["profile"] == "main"
+        archive.extract(archive.members(), tmp_path / "dest")
+    dest = tmp_path / "dest" / "conf"
+    assert (dest / "app.rc").read_text() == "color=blue"
+    assert (dest / "app.rc").stat().st_mode & 0o777 == 0o600
+    assert (dest / "wallpaper.jpg").read_bytes() == (
+        source / "conf" / "wallpaper.jpg"
+    ).read_bytes()
+    assert os.readlink(dest / "link.rc") == "app.rc"
+    assert os.readlink(dest / "dangling.rc") == "missing.rc"
+
+
+def test_v1_rejects_deltas(tmp_path):
+    with pytest.raises(ValueError):
+        open_archive_writer(tmp_path / "profile.dtsv", "v1", base={})
+
+
+def test_chunked_round_trip(tmp_path):
+    source = _profile_tree(tmp_path / "source")
+    store = tmp_path / "store"
+    path = tmp_path / "profile.dtsv"
+    with open_archive_writer(path, meta={"profile": "main"}, store=store) as archive:
+        archive.add_tree(source, "")
+    assert detect_format(path) == "chunked"
+
+    cache = tmp_path / "cache"
+    with ChunkedArchiveReader(path, cache=cache, cache_size=0) as archive:
+        assert archive.meta["profile"] == "main"
+        archive.extract(archive.members(), tmp_path / "dest")
+    assert (tmp_path / "dest/conf/app.rc").read_text() == "color=blue"
+    assert os.readlink(tmp_path / "dest/conf/link.rc") == "app.rc"
+    # The chunk read by this import survives the pruning on close
+    assert len(list(cache.glob("chunks/*/*"))) == 1
+
+
+def _export(source, path, archive_format, base=None):
+    meta, base_index = {}, None
+    if base is not None:
+        with open_archive(base) as archive:
+            meta["base"] = archive_id(archive)
+            base_index = archive_index(archive)
+    with open_archive_writer(
+        path, archive_format, meta=meta, base=base_index
+    ) as archive:
+        archive.add_tree(source, "")
+    with open_archive(path) as archive:
+        return {member.name for member in archive.members()}
+
+
+def test_delta_chain_round_trip(tmp_path):
+    source = _profile_tree(tmp_path / "source")
+    (source / "conf" / "plugins").mkdir()
+    (source / "conf" / "plugins" / "old.rc").write_text("legacy")
+    paths = [tmp_path / f"profile{i}.dtsv" for i in range(3)]
+    _export(source, paths[0], "v1")
+
+    (source / "conf" / "app.rc").write_text("color=green")
+    os.utime(source / "conf" / "app.rc", (1e9, 1e9))
+    (source / "conf" / "new.rc").write_text("new")
+    first = _export(source, paths[1], "v2", base=paths[0])
+    assert {"conf/app.rc", "conf/new.rc"} <= first
+    assert "conf/plugins/old.rc" not in first
+
+    (source / "conf" / "new.rc").unlink()
+    (source / "conf" / "plugins" / "old.rc").unlink()
+    (source / "conf" / "plugins").rmdir()
+    second = _export(source, paths[2], "v2", base=paths[1])
+    with open_archive(paths[2]) as archive:
+        assert archive.meta["deleted"] == ["conf/new.rc", "conf/plugins"]
+    assert "conf/app.rc" not in second
+
+    with open_archive_chain(paths) as chain:
+        chain.extract(chain.members(), tmp_path / "dest")
+    dest = tmp_path / "dest" / "conf"
+    assert (dest / "app.rc").read_text() == "color=green"
+    assert os.readlink(dest / "link.rc") == "app.rc"
+    assert not (dest / "new.rc").exists()
+    assert not (dest / "plugins").exists()
+
+    with pytest.raises(ValueError):
+        open_archive_chain([paths[0], paths[2]])
+    with pytest.raises(ValueError):
+        open_archive_chain(paths[1:])
+
+
+def test_extract_rejects_members_below_extracted_symlink(tmp_path):
+    # The parent passes the check for a/y, then becomes a link out of dest.
+    # v1 does not store symlinks.
+    path = tmp_path / "profile.dtsv"
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    with open_archive_writer(path, "v2") as archive:
+        archive.add_directory("a", 0o755, 0)
+        archive.add_stream("a/y", io.BytesIO(b"y"), 1, 0o644, 0)
+        archive.add_symlink("a", str(outside), 0o777, 0)
+        archive.add_stream("a/x", io.BytesIO(b"x"), 1, 0o644, 0)
+    with open_archive(path) as archive, pytest.raises(ValueError):
+        archive.extract(archive.members(), tmp_path / "dest")
+    assert not (outside / "x").exists()
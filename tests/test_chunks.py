@@ -0,0 +1,48 @@
+import io
+import os
+import random
+from dotctl.handlers.chunk_handler import (
+    CHUNK_MAX_SIZE,
+    CHUNK_MIN_SIZE,
+    ChunkStore,
+    split_chunks,
+)
+
+
+def _random_bytes(size: int, seed: int = 0) -> bytes:
+    return random.Random(seed).randbytes(size)
+
+
+def test_chunk_sizes_are_bounded():
+    data = _random_bytes(6 * CHUNK_MAX_SIZE)
+    chunks = list(split_chunks(io.BytesIO(data)))
+    assert b"".join(chunks) == data
+    assert all(len(chunk) <= CHUNK_MAX_SIZE for chunk in chunks)
+    assert all(len(chunk) >= CHUNK_MIN_SIZE for chunk in chunks[:-1])
+    assert list(split_chunks(io.BytesIO(b""))) == []
+
+
+def test_insertion_shifts_few_chunks():
+    data = _random_bytes(6 * CHUNK_MAX_SIZE)
+    edited = data[:1000] + b"inserted" + data[1000:]
+    before = set(split_chunks(io.BytesIO(data)))
+    after = list(split_chunks(io.BytesIO(edited)))
+    assert len([chunk for chunk in after if chunk not in before]) <= 2
+
+
+def test_prune_evicts_least_recently_fetched(tmp_path):
+    source = ChunkStore(tmp_path / "store")
+    cache = ChunkStore(tmp_path / "cache")
+    digests = [
+        source.put_chunk(_random_bytes(1000, seed), "store") for seed in range(4)
+    ]
+    for age, digest in enumerate(digests):
+        cache.fetch_chunk(digest, source)
+        path = cache._path("chunks", digest)
+        os.utime(path, (age, age))
+
+    # Fetching an older chunk again marks it as recently used
+    cache.fetch_chunk(digests[0], source)
+    freed = cache.prune(2 * 1001, keep={digests[1]})
+    assert freed == 2 * 1001
+    assert [cache.has_chunk(digest) for digest in digests] == [True, True, False, False]
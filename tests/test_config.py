@@ -0,0 +1,49 @@
+from dotctl.handlers import config_handler
+from dotctl.handlers.config_handler import conf_reader, parse_keywords
+
+CONFIG = """
+save:
+  configs:
+    entries: [kwinrc]
+    location: $CONFIG_DIR
+export:
+  share_folder:
+    entries: [icons]
+    location: $SYS_SHARE_DIR/sddm
+"""
+
+
+def test_parse_keywords_prefers_longest_key():
+    tokens = {"keywords": {"SHARE": "/short", "SHARE_DIR": "/long"}}
+    config = {"save": {"app": {"location": "$SHARE_DIR/app:$SHARE"}}}
+    parse_keywords(tokens, "$", config)
+    assert config["save"]["app"]["location"] == "/long/app:/short"
+
+
+def test_conf_reader_caches_parsed_config(tmp_path, monkeypatch):
+    config_file = tmp_path / "dotctl.yaml"
+    config_file.write_text(CONFIG)
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(config_handler, "_config_memo", {})
+
+    config = conf_reader(config_file=config_file, cache_dir=cache_dir)
+    assert config.save["configs"].entries == ["kwinrc"]
+    assert str(config.export["share_folder"].path).endswith("/sddm")
+    assert "$" not in config.save["configs"].location
+    assert conf_reader(config_file=config_file, cache_dir=cache_dir) is config
+
+    # A new process reads the disk cache without parsing YAML
+    monkeypatch.setattr(config_handler, "_config_memo", {})
+    monkeypatch.setattr(config_handler, "_load_yaml", None)
+    assert conf_reader(config_file=config_file, cache_dir=cache_dir) == config
+
+
+def test_conf_reader_sees_edits(tmp_path, monkeypatch):
+    config_file = tmp_path / "dotctl.yaml"
+    config_file.write_text(CONFIG)
+    monkeypatch.setattr(config_handler, "_config_memo", {})
+    conf_reader(config_file=config_file, cache_dir=tmp_path)
+
+    config_file.write_text(CONFIG.replace("[kwinrc]", "[kwinrc, kdeglobals]"))
+    config = conf_reader(config_file=config_file, cache_dir=tmp_path)
+    assert config.save["configs"].entries == ["kwinrc", "kdeglobals"]
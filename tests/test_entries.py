@@ -0,0 +1,55 @@
+from pathlib import Path
+from dotctl.handlers.fs_handler import expand_entries, list_directory
+
+TREE = {
+    "": ["kdeglobals", "kwinrc", "kwinrulesrc", "plasma", "plasmarc", ".kwinrc.bak"],
+    "plasma": ["desktop", "look-and-feel", "module.pyc"],
+    "plasma/desktop": ["contents"],
+    "plasma/look-and-feel": ["metadata.json"],
+}
+
+
+def _lister(base: Path):
+    def list_names(directory: Path) -> list[str]:
+        return TREE.get(directory.relative_to(base).as_posix().strip("."), [])
+
+    return list_names
+
+
+def test_expand_entries():
+    base = Path("/profile")
+    list_names = _lister(base)
+    entries = ["kdeglobals", "kwin*rc", "re:plasma(rc)?", "plasma/*", "missing*"]
+    assert expand_entries(entries, base, list_names) == [
+        "kdeglobals",
+        "kwinrc",
+        "kwinrulesrc",
+        "plasma",
+        "plasmarc",
+        "plasma/desktop",
+        "plasma/look-and-feel",
+    ]
+
+
+def test_glob_below_wildcard_keeps_matches_with_the_name():
+    base = Path("/profile")
+    list_names = _lister(base)
+    assert expand_entries(["plasma/*/contents"], base, list_names) == [
+        "plasma/desktop/contents"
+    ]
+
+
+def test_hidden_names_need_a_hidden_pattern():
+    base = Path("/profile")
+    list_names = _lister(base)
+    assert expand_entries(["*.bak"], base, list_names) == []
+    assert expand_entries([".kwin*"], base, list_names) == [".kwinrc.bak"]
+
+
+def test_each_directory_is_scanned_once(tmp_path):
+    for name in ("kwinrc", "kwinrulesrc", "plasmarc"):
+        (tmp_path / name).write_text("")
+    list_directory.cache_clear()
+    entries = ["kwin*", "*rc", "re:plasma.*"]
+    assert expand_entries(entries, tmp_path) == ["kwinrc", "kwinrulesrc", "plasmarc"]
+    assert list_directory.cache_info().misses == 1
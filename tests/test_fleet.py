@@ -0,0 +1,36 @@
+import os
+import shutil
+import pytest
+from dotctl.handlers.fleet_handler import LocalTransport, count_changes, run_fleet
+from dotctl.handlers.sync_handler import section_tasks
+
+
+def test_count_changes_skips_attribute_updates():
+    itemized = "\n".join(
+        [
+            ">f+++++++++ app/new.rc",
+            ">f.st...... app/changed.rc",
+            "cd+++++++++ app/themes/",
+            "*deleting   app/old.rc",
+            ".d..t...... app/",
+            ".f...p..... app/mode.rc",
+        ]
+    )
+    assert count_changes(itemized) == 4
+
+
+@pytest.mark.skipif(shutil.which("rsync") is None, reason="needs rsync")
+def test_fleet_counts_only_changed_files(tmp_path):
+    source = tmp_path / "profile" / "app"
+    source.mkdir(parents=True)
+    (source / "app.rc").write_text("color=blue")
+    tasks = section_tasks("app", ["app.rc"], source, tmp_path / "dest")
+    hosts = [str(tmp_path / "host")]
+
+    (first,) = run_fleet(hosts, LocalTransport(), tasks, jobs=1)
+    assert (first.status, first.changes) == ("ok", 1)
+
+    # Only the directory mtime differs on the second run
+    os.utime(source, (0, 0))
+    (second,) = run_fleet(hosts, LocalTransport(), tasks, jobs=1)
+    assert (second.status, second.changes) == ("ok", 0)
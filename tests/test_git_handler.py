@@ -0,0 +1,267 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from git import Git, Repo
+from dotctl.handlers.git_handler import (
+    RemoteSession,
+    checkout_branch,
+    clone_repo,
+    commit_changes,
+    get_repo_branches,
+    get_tracking_status,
+    is_single_branch,
+    profile_worktree,
+    push_new_branch,
+    remove_worktree,
+    set_sparse_sections,
+    set_worktrees,
+    uses_worktrees,
+)
+
+
+def _git(cwd: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+def _commit(cwd: Path, name: str) -> str:
+    (cwd / name).write_text(name)
+    _git(cwd, "add", name)
+    _git(cwd, "commit", "-qm", name)
+    return _git(cwd, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def remote(tmp_path):
+    """An origin with profiles a and b, its clone and a second working copy."""
+    work = tmp_path / "work"
+    work.mkdir()
+    _git(work, "init", "-q", "-b", "a")
+    _commit(work, "one")
+    _git(work, "branch", "b")
+    origin = tmp_path / "origin.git"
+    _git(tmp_path, "clone", "-q", "--bare", str(work), str(origin))
+    _git(work, "remote", "add", "origin", str(origin))
+    _git(work, "fetch", "-q", "origin")
+    clone = tmp_path / "clone"
+    _git(tmp_path, "clone", "-q", str(origin), str(clone))
+    return work, Repo(clone)
+
+
+def test_fetch_ref_only_fetches_once_per_session(remote):
+    work, repo = remote
+    session = RemoteSession(repo)
+    assert session.fetch_ref("b")
+    _git(work, "checkout", "-q", "b")
+    head = _commit(work, "two")
+    _git(work, "push", "-q", "origin", "b")
+    assert session.fetch_ref("b")
+    assert repo.commit("origin/b").hexsha != head
+    assert RemoteSession(repo).fetch_ref("b")
+    assert repo.commit("origin/b").hexsha == head
+
+
+def test_fetching_one_ref_keeps_others_stale(remote):
+    work, repo = remote
+    RemoteSession(repo, fetch_ttl=3600).fetch_ref("a")
+    _git(work, "checkout", "-q", "b")
+    head = _commit(work, "two")
+    _git(work, "push", "-q", "origin", "b")
+
+    # b was never fetched within the window, a fetch of a must not hide that
+    session = RemoteSession(repo, fetch_ttl=3600)
+    assert session.is_fresh("a")
+    assert not session.is_fresh("b")
+    assert session.fetch_ref("b")
+    assert repo.commit("origin/b").hexsha == head
+    assert RemoteSession(repo, fetch_ttl=3600).is_fresh("b")
+
+
+def test_fresh_ref_is_not_fetched_again(remote):
+    work, repo = remote
+    before = repo.commit("origin/b").hexsha
+    assert RemoteSession(repo, fetch_ttl=3600).fetch_ref("b")
+    _git(work, "checkout", "-q", "b")
+    head = _commit(work, "two")
+    _git(work, "push", "-q", "origin", "b")
+
+    assert RemoteSession(repo, fetch_ttl=3600).fetch_ref("b")
+    assert repo.commit("origin/b").hexsha == before
+    # An explicit --fetch ignores the window
+    assert RemoteSession(repo, fetch_ttl=3600).fetch_ref("b", force=True)
+    assert repo.commit("origin/b").hexsha == head
+
+
+def test_fetch_ttl_comes_from_the_environment(remote):
+    work, repo = remote
+    RemoteSession(repo, fetch_ttl=3600).fetch_ref("b")
+    _git(work, "checkout", "-q", "b")
+    head = _commit(work, "two")
+    _git(work, "push", "-q", "origin", "b")
+    script = (
+        "import sys; from git import Repo;"
+        "from dotctl.handlers.git_handler import RemoteSession;"
+        "repo = Repo(sys.argv[1]); RemoteSession(repo).fetch_ref('b');"
+        "print(repo.commit('origin/b').hexsha)"
+    )
+
+    def fetched(ttl: str) -> str:
+        env = {**os.environ, "DOTCTL_FETCH_TTL": ttl}
+        env["PYTHONPATH"] = os.pathsep.join(sys.path)
+        return subprocess.run(
+            [sys.executable, "-c", script, repo.working_tree_dir],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+
+    assert fetched("3600") != head
+    assert fetched("0") == head
+
+
+def test_refs_are_cached_until_checkout(remote):
+    _, repo = remote
+    assert get_repo_branches(repo)[2] == "a"
+    _git(Path(repo.working_tree_dir), "branch", "c")
+    # Changes made outside dotctl are not seen within one invocation
+    assert "c" not in get_repo_branches(repo)[0]
+    checkout_branch(repo, "b")
+    local_profiles, _, active_profile, _ = get_repo_branches(repo)
+    assert active_profile == "b"
+    assert "c" in local_profiles
+
+
+def test_refs_are_invalidated_by_commit_and_push(remote):
+    _, repo = remote
+    clone = Path(repo.working_tree_dir)
+    get_repo_branches(repo)
+    _git(clone, "branch", "c")
+    (clone / "two").write_text("two")
+    repo.index.add(["two"])
+    commit_changes(repo, "two")
+    assert "c" in get_repo_branches(repo)[0]
+
+    _git(clone, "checkout", "-q", "c")
+    assert "c" not in get_repo_branches(repo)[1]
+    push_new_branch(repo)
+    assert "c" in get_repo_branches(repo)[1]
+
+
+def test_fetch_ref_prunes_deleted_branch(remote):
+    work, repo = remote
+    _git(work, "push", "-q", "origin", "--delete", "b")
+    assert RemoteSession(repo).fetch_ref("b")
+    assert "origin/b" not in [ref.name for ref in repo.remotes.origin.refs]
+
+
+def test_tracking_status_without_upstream(remote):
+    work, repo = remote
+    clone = Path(repo.working_tree_dir)
+    _git(clone, "branch", "--no-track", "b", "origin/b")
+    _git(clone, "checkout", "-q", "b")
+    _commit(clone, "local")
+    _git(work, "checkout", "-q", "b")
+    _commit(work, "upstream-1")
+    _commit(work, "upstream-2")
+    _git(work, "push", "-q", "origin", "b")
+    _git(clone, "fetch", "-q", "origin")
+    assert get_tracking_status(repo)["b"] == (1, 2)
+
+
+def test_tracking_status_counts_branches_without_upstream_together(remote, monkeypatch):
+    work, repo = remote
+    clone = Path(repo.working_tree_dir)
+    for name in ("c", "d", "e"):
+        _git(work, "branch", name, "a")
+    _git(work, "push", "-q", "origin", "c", "d", "e")
+    _git(clone, "fetch", "-q", "origin")
+    _git(clone, "branch", "--no-track", "b", "origin/b")
+    _git(clone, "branch", "--no-track", "c", "origin/c")
+    # e follows another profile's branch, so its own counts need a rev-list
+    _git(clone, "branch", "--track", "e", "origin/d")
+    for name in ("b", "c", "e"):
+        _git(clone, "checkout", "-q", name)
+        _commit(clone, f"local-{name}")
+    _git(work, "checkout", "-q", "c")
+    _commit(work, "upstream-c")
+    _git(work, "push", "-q", "origin", "c")
+    _git(clone, "fetch", "-q", "origin")
+
+    rev_lists = []
+
+    def rev_list(git, *args):
+        rev_lists.append(args)
+        return git._call_process("rev_list", *args)
+
+    monkeypatch.setattr(Git, "rev_list", rev_list, raising=False)
+    status = get_tracking_status(repo)
+    assert (status["b"], status["c"], status["e"]) == ((1, 0), (1, 1), (1, 0))
+    assert len(rev_lists) == 1
+
+
+def test_shallow_single_branch_clone(remote, tmp_path):
+    work, _ = remote
+    _commit(work, "two")
+    _git(work, "checkout", "-q", "b")
+    _commit(work, "three")
+    _git(work, "push", "-q", "origin", "a", "b")
+    repo = clone_repo(f"file://{tmp_path / 'origin.git'}", tmp_path / "dots", "a", 1)
+    assert _git(tmp_path / "dots", "rev-parse", "--is-shallow-repository") == "true"
+    assert is_single_branch(repo)
+    assert get_repo_branches(repo)[1] == {"a"}
+
+    # Other profiles are fetched on demand, just as shallow
+    checkout_branch(repo, "b")
+    assert repo.active_branch.name == "b"
+    assert _git(tmp_path / "dots", "rev-list", "--count", "HEAD") == "1"
+
+
+def test_sparse_sections(remote, tmp_path):
+    work, _ = remote
+    for path in ("kde/kwinrc", "zsh/.zshrc", "hooks/post_apply.sh"):
+        (work / path).parent.mkdir(exist_ok=True)
+        _commit(work, path)
+    _git(work, "push", "-q", "origin", "a")
+    dots = tmp_path / "dots"
+    repo = clone_repo(str(tmp_path / "origin.git"), dots, "a", sections=["kde"])
+    assert sorted(path.name for path in dots.iterdir() if path.name != ".git") == [
+        "hooks",
+        "kde",
+        "one",
+    ]
+
+    set_sparse_sections(repo, None)
+    assert (dots / "zsh" / ".zshrc").exists()
+
+
+def test_profile_worktree(remote, tmp_path):
+    _, repo = remote
+    clone = Path(repo.working_tree_dir)
+    set_worktrees(repo, True)
+    assert uses_worktrees(repo)
+    assert profile_worktree(repo, "a", root=tmp_path / "trees") is repo
+
+    tree = profile_worktree(repo, "b", root=tmp_path / "trees")
+    assert Path(tree.working_tree_dir) == tmp_path / "trees" / "b"
+    assert tree.active_branch.name == "b"
+    assert repo.active_branch.name == "a"
+    again = profile_worktree(repo, "b", root=tmp_path / "trees")
+    assert again.working_tree_dir == tree.working_tree_dir
+
+    new = profile_worktree(repo, "c", create=True, root=tmp_path / "trees")
+    assert new.active_branch.name == "c"
+
+    # Switching to a profile frees its worktree first
+    checkout_branch(repo, "b")
+    assert repo.active_branch.name == "b"
+    assert not (tmp_path / "trees" / "b").exists()
+    remove_worktree(repo, "c")
+    assert "c" in _git(clone, "branch", "--list", "c")
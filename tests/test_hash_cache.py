@@ -0,0 +1,80 @@
+import os
+from dotctl.handlers import fs_handler
+from dotctl.handlers.fs_handler import (
+    HashCache,
+    file_digest,
+    files_differ,
+    native_sync,
+)
+
+
+def test_hash_cache_reuses_digests(tmp_path, monkeypatch):
+    path = tmp_path / "kwinrc"
+    path.write_text("[Compositing]")
+    cache = HashCache(tmp_path / "hashes.json")
+    digest = cache.digest(path, path.stat())
+    cache.save()
+
+    reads = []
+    monkeypatch.setattr(
+        fs_handler, "file_digest", lambda path: reads.append(path) or "changed"
+    )
+    reloaded = HashCache(tmp_path / "hashes.json")
+    assert reloaded.digest(path, path.stat()) == digest
+    assert reads == []
+
+    # A new mtime on the same inode means the content has to be read again
+    os.utime(path, ns=(0, 0))
+    assert reloaded.digest(path, path.stat()) == "changed"
+    assert reads == [path]
+
+
+def test_hash_cache_keeps_used_entries_past_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(HashCache, "LIMIT", 1)
+    cache = HashCache(tmp_path / "hashes.json")
+    cache.entries = {"0:1": [1, 1, "stale"], "0:2": [1, 1, "stale"]}
+    path = tmp_path / "kwinrc"
+    path.write_text("x")
+    cache.digest(path, path.stat())
+    cache.save()
+    assert list(HashCache(tmp_path / "hashes.json").entries) == [
+        HashCache._key(path.stat())
+    ]
+
+
+def test_files_differ_by_content(tmp_path):
+    source, dest = tmp_path / "source", tmp_path / "dest"
+    source.write_text("same")
+    dest.write_text("same")
+    os.utime(dest, ns=(0, 0))
+    hashes = HashCache(tmp_path / "hashes.json")
+    assert files_differ(source, source.stat(), dest)
+    assert not files_differ(source, source.stat(), dest, checksum=True)
+    assert not files_differ(source, source.stat(), dest, True, hashes)
+
+    dest.write_text("diff")
+    assert files_differ(source, source.stat(), dest, True, hashes)
+    assert file_digest(source) != file_digest(dest)
+    assert files_differ(source, source.stat(), tmp_path / "missing", True, hashes)
+
+
+def test_checksum_sync_leaves_identical_files_alone(tmp_path):
+    source, dest = tmp_path / "source", tmp_path / "dest"
+    for root, text in ((source, "new"), (dest, "old")):
+        root.mkdir()
+        (root / "kwinrc").write_text("same")
+        (root / "kdeglobals").write_text(text)
+    os.utime(source / "kwinrc", ns=(0, 0))
+    (dest / "stale.rc").write_text("")
+    before = (dest / "kwinrc").stat()
+
+    hashes = HashCache(tmp_path / "hashes.json")
+    changes = native_sync(source, dest, checksum=True, hashes=hashes)
+    assert sorted(changes) == [
+        f"*deleting {dest / 'stale.rc'}",
+        str(dest / "kdeglobals"),
+    ]
+    after = (dest / "kwinrc").stat()
+    assert (after.st_ino, after.st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
+    assert (dest / "kdeglobals").read_text() == "new"
+    assert not [path for path in dest.iterdir() if "dotctl-tmp" in path.name]
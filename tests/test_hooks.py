@@ -0,0 +1,101 @@
+import threading
+from pathlib import Path
+import pytest
+from dotctl.handlers.hooks_handler import (
+    Hook,
+    HookResult,
+    _check_graph,
+    critical_path,
+    parse_hook,
+    run_hook_graph,
+)
+
+
+def _hook(directory: Path, name: str, body: str, **options) -> Hook:
+    path = directory / f"{name}.sh"
+    path.write_text(f"#!/bin/bash\n{body}\n")
+    return Hook(name=name, path=path, **options)
+
+
+def test_graphs_share_slots(tmp_path):
+    # Two sections with two hooks each, but only one hook process at a time
+    log = tmp_path / "log"
+    body = f"echo start >> {log}; sleep 0.2; echo end >> {log}"
+    graphs = [
+        [_hook(tmp_path, f"{section}{i}", body) for i in range(2)]
+        for section in ("a", "b")
+    ]
+    slots = threading.BoundedSemaphore(1)
+    threads = [
+        threading.Thread(
+            target=run_hook_graph, args=(hooks, 2), kwargs={"slots": slots}
+        )
+        for hooks in graphs
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert log.read_text().split() == ["start", "end"] * 4
+
+
+def test_parse_hook_headers(tmp_path):
+    path = tmp_path / "fonts.sh"
+    path.write_text(
+        "#!/bin/bash\n"
+        "# dotctl-phase: pre-apply\n"
+        "# dotctl-section: kde\n"
+        "# dotctl-after: icons, themes\n"
+        "# dotctl-timeout: 120\n"
+        "fc-cache\n"
+    )
+    hook = parse_hook(path)
+    assert (hook.name, hook.phase, hook.section) == ("fonts", "pre_apply", "kde")
+    assert (hook.after, hook.timeout) == (["icons", "themes"], 120)
+
+
+@pytest.mark.parametrize(
+    "header", ["# dotctl-timeout: 2m", "# dotctl-timeout: -1", "# dotctl-phase: apply"]
+)
+def test_parse_hook_rejects_bad_headers(tmp_path, header):
+    path = tmp_path / "fonts.sh"
+    path.write_text(f"#!/bin/bash\n{header}\n")
+    with pytest.raises(RuntimeError, match="fonts.sh"):
+        parse_hook(path)
+
+
+def test_unstartable_hook_fails(tmp_path):
+    # Executable, but without a shebang exec() fails with ENOEXEC
+    path = tmp_path / "broken.sh"
+    path.write_bytes(b"\x7fELF")
+    path.chmod(0o755)
+    with pytest.raises(RuntimeError, match="broken"):
+        run_hook_graph([Hook(name="broken", path=path)])
+
+
+def test_check_graph(tmp_path):
+    with pytest.raises(RuntimeError, match="unknown hooks: icons"):
+        _check_graph([Hook(name="fonts", path=tmp_path, after=["icons"])])
+    with pytest.raises(RuntimeError, match="depend on each other"):
+        _check_graph(
+            [
+                Hook(name="fonts", path=tmp_path, after=["icons"]),
+                Hook(name="icons", path=tmp_path, after=["fonts"]),
+            ]
+        )
+
+
+def test_critical_path(tmp_path):
+    def result(name, duration, after=()):
+        return HookResult(
+            hook=Hook(name=name, path=tmp_path, after=list(after)), end=duration
+        )
+
+    results = [
+        result("fonts", 1.0),
+        result("icons", 3.0),
+        result("cache", 2.0, after=["fonts", "icons"]),
+        result("wallpaper", 4.0),
+    ]
+    assert critical_path(results) == (["icons", "cache"], 5.0)
+    assert critical_path([]) == ([], 0.0)
@@ -0,0 +1,142 @@
+from pathlib import Path
+from types import SimpleNamespace
+import pytest
+from dotctl import __EXPORT_DATA_DIR__
+from dotctl.actions import importer
+from dotctl.handlers.archive_handler import ArchiveMember
+
+
+class _StubArchive:
+    """Records which members each extract call receives."""
+
+    def __init__(self, names: list[str], denied: tuple[str, ...] = ()):
+        self._members = [
+            ArchiveMember(name, "file", 0o644, 0, 1, None) for name in names
+        ]
+        self.denied = denied
+        self.extracted: list[tuple[list[str], Path, str]] = []
+        self.privileged: list[tuple[list[str], Path, str]] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def members(self):
+        return list(self._members)
+
+    def extract(self, members, dest, strip=""):
+        names = [member.name for member in members]
+        if any(name.startswith(self.denied) for name in names):
+            raise PermissionError(dest)
+        self.extracted.append((names, dest, strip))
+
+    def extract_privileged(self, members, dest, sudo_pass, strip=""):
+        self.privileged.append(([member.name for member in members], dest, sudo_pass))
+
+
+def _import(tmp_path, monkeypatch, archive, sections, writable=None, sudo=None):
+    """Runs importer with git, the config and sudo stubbed out."""
+    work_dir = tmp_path / "profile"
+    work_dir.mkdir()
+    repo = SimpleNamespace(working_tree_dir=str(work_dir))
+    config = SimpleNamespace(
+        export={
+            name: SimpleNamespace(entries=entries, path=tmp_path / name)
+            for name, entries in sections.items()
+        }
+    )
+    prompted = []
+
+    def prompt_sudo(path, result):
+        prompted.append(path)
+        return sudo
+
+    monkeypatch.setattr(importer, "detect_format", lambda path: "v2")
+    monkeypatch.setattr(importer, "app_profile_directory", str(work_dir))
+    monkeypatch.setattr(importer, "get_repo", lambda path: repo)
+    monkeypatch.setattr(importer, "get_repo_branches", lambda r: ([], [], "main", []))
+    monkeypatch.setattr(importer, "open_archive_chain", lambda paths, store: archive)
+    monkeypatch.setattr(importer, "uses_worktrees", lambda r: False)
+    monkeypatch.setattr(importer, "create_branch", lambda repo, branch: None)
+    monkeypatch.setattr(importer, "checkout_branch", lambda r, branch: None)
+    monkeypatch.setattr(importer, "add_changes", lambda repo: None)
+    monkeypatch.setattr(importer, "commit_changes", lambda repo, message: None)
+    monkeypatch.setattr(importer, "is_remote_repo", lambda repo: (False, None))
+    monkeypatch.setattr(importer, "conf_reader", lambda config_file: config)
+    monkeypatch.setattr(importer, "run_command", lambda command, sudo_pass: None)
+    monkeypatch.setattr(importer, "prompt_sudo", prompt_sudo)
+    if writable is not None:
+        monkeypatch.setattr(importer, "is_writable", writable)
+    props = importer.ImporterProps(
+        profile=[tmp_path / "work.dtsv"],
+        skip_sudo=False,
+        password=None,
+        jobs=4,
+        store=None,
+    )
+    importer.importer(props)
+    return prompted
+
+
+def _data(section: str, *names: str) -> list[str]:
+    return [f"{__EXPORT_DATA_DIR__}/{section}/{name}" for name in names]
+
+
+def test_members_are_routed_to_their_entry(tmp_path, monkeypatch):
+    archive = _StubArchive(
+        [
+            "dotctl.yaml",
+            *_data("themes", "dark/a.svg", "dark/b.svg", "darker/c.svg"),
+            *_data("themes", "light/a.svg", "icons/app.png", "unlisted/x"),
+        ]
+    )
+    _import(tmp_path, monkeypatch, archive, {"themes": ["dark*", "light", "icons"]})
+    repo_extract, *entries = archive.extracted
+    assert repo_extract[0] == ["dotctl.yaml"]
+    routed = {tuple(names) for names, dest, strip in entries}
+    # dark must not pick up the members of darker
+    assert routed == {
+        tuple(_data("themes", "dark/a.svg", "dark/b.svg")),
+        tuple(_data("themes", "darker/c.svg")),
+        tuple(_data("themes", "light/a.svg")),
+        tuple(_data("themes", "icons/app.png")),
+    }
+    assert {(dest, strip) for names, dest, strip in entries} == {
+        (tmp_path / "themes", f"{__EXPORT_DATA_DIR__}/themes/")
+    }
+
+
+def test_unwritable_entries_are_extracted_with_sudo(tmp_path, monkeypatch):
+    archive = _StubArchive(_data("themes", "dark/a.svg", "light/a.svg"))
+    prompted = _import(
+        tmp_path,
+        monkeypatch,
+        archive,
+        {"themes": ["dark", "light"]},
+        writable=lambda path: path.name != "light",
+        sudo="secret",
+    )
+    assert [names for names, dest, strip in archive.extracted[1:]] == [
+        _data("themes", "dark/a.svg")
+    ]
+    assert prompted == [tmp_path / "themes" / "light"]
+    assert archive.privileged == [
+        (_data("themes", "light/a.svg"), tmp_path / "themes", "secret")
+    ]
+
+
+@pytest.mark.parametrize("sudo", ["secret", None])
+def test_permission_errors_fall_back_to_sudo(tmp_path, monkeypatch, sudo):
+    # is_writable can pass while a file below the entry is still read-only
+    archive = _StubArchive(
+        _data("themes", "dark/a.svg", "light/a.svg"),
+        denied=(f"{__EXPORT_DATA_DIR__}/themes/light/",),
+    )
+    prompted = _import(
+        tmp_path, monkeypatch, archive, {"themes": ["dark", "light"]}, sudo=sudo
+    )
+    assert prompted == [tmp_path / "themes" / "light"]
+    expected = [(_data("themes", "light/a.svg"), tmp_path / "themes", sudo)]
+    assert archive.privileged == (expected if sudo else [])
@@ -0,0 +1,126 @@
+import json
+import os
+from dotctl.actions import saver
+from dotctl.handlers import manifest_handler
+from dotctl.handlers.manifest_handler import MANIFEST_VERSION, SaveManifest
+from dotctl.handlers.sync_handler import section_tasks
+
+
+def _saved(tmp_path, monkeypatch):
+    """Returns tasks for two entries whose system and repo copies match."""
+    (tmp_path / "dotctl.yaml").write_text("save: {}")
+    (tmp_path / "hooks").mkdir()
+    monkeypatch.setattr(manifest_handler, "app_config_file", tmp_path / "dotctl.yaml")
+    monkeypatch.setattr(manifest_handler, "app_hooks_directory", tmp_path / "hooks")
+    source, dest = tmp_path / "home", tmp_path / "repo"
+    (source / "app").mkdir(parents=True)
+    (source / "app" / "app.rc").write_text("color=blue")
+    (source / "kwinrc").write_text("[Windows]")
+    (dest / "app").mkdir(parents=True)
+    (dest / "app" / "app.rc").write_text("color=blue")
+    (dest / "kwinrc").write_text("[Windows]")
+    return section_tasks("configs", ["app", "kwinrc"], source, dest)
+
+
+def _recorded(tmp_path, tasks) -> SaveManifest:
+    manifest = SaveManifest("work", manifest_dir=tmp_path / "manifests")
+    for task in tasks:
+        manifest.record(task)
+    manifest.save()
+    return SaveManifest("work", manifest_dir=tmp_path / "manifests")
+
+
+def test_unknown_entries_are_changed(tmp_path, monkeypatch):
+    tasks = _saved(tmp_path, monkeypatch)
+    manifest = SaveManifest("work", manifest_dir=tmp_path / "manifests")
+    assert manifest.changed_tasks(tasks) == tasks
+    assert not manifest.repo_unchanged()
+
+
+def test_recorded_entries_are_unchanged(tmp_path, monkeypatch):
+    tasks = _saved(tmp_path, monkeypatch)
+    manifest = _recorded(tmp_path, tasks)
+    assert manifest.changed_tasks(tasks) == []
+    assert manifest.repo_unchanged()
+
+
+def test_edits_on_either_side_change_the_entry(tmp_path, monkeypatch):
+    tasks = _saved(tmp_path, monkeypatch)
+    manifest = _recorded(tmp_path, tasks)
+    (tmp_path / "home" / "app" / "app.rc").write_text("color=red!")
+    (tmp_path / "repo" / "kwinrc").write_text("[Desktops]")
+    assert manifest.changed_tasks(tasks) == tasks
+
+
+def test_new_source_file_changes_the_entry(tmp_path, monkeypatch):
+    tasks = _saved(tmp_path, monkeypatch)
+    manifest = _recorded(tmp_path, tasks)
+    (tmp_path / "home" / "app" / "extra.rc").write_text("x")
+    assert manifest.changed_tasks(tasks) == tasks[:1]
+
+
+def test_touched_file_falls_back_to_its_digest(tmp_path, monkeypatch):
+    tasks = _saved(tmp_path, monkeypatch)
+    manifest = _recorded(tmp_path, tasks)
+    app_rc = tmp_path / "home" / "app" / "app.rc"
+    os.utime(app_rc, ns=(0, 10**18))
+    assert manifest.changed_tasks(tasks) == []
+    app_rc.write_text("color=pink")
+    os.utime(app_rc, ns=(0, 10**18))
+    assert manifest.changed_tasks(tasks) == tasks[:1]
+
+
+def test_record_keeps_digests_of_untouched_files(tmp_path, monkeypatch):
+    tasks = _saved(tmp_path, monkeypatch)
+    manifest = _recorded(tmp_path, tasks)
+    hashed = []
+    monkeypatch.setattr(
+        manifest_handler, "file_digest", lambda path: hashed.append(path) or "x"
+    )
+    os.utime(tmp_path / "home" / "kwinrc", ns=(0, 10**18))
+    for task in tasks:
+        manifest.record(task)
+    assert hashed == [tmp_path / "home" / "kwinrc"]
+
+
+def test_repo_file_edits_are_detected(tmp_path, monkeypatch):
+    tasks = _saved(tmp_path, monkeypatch)
+    manifest = _recorded(tmp_path, tasks)
+    (tmp_path / "hooks" / "pre_apply.sh").write_text("echo hi")
+    assert not manifest.repo_unchanged()
+
+
+def test_other_manifest_versions_are_ignored(tmp_path, monkeypatch):
+    tasks = _saved(tmp_path, monkeypatch)
+    manifest = _recorded(tmp_path, tasks)
+    data = json.loads(manifest.path.read_text())
+    manifest.path.write_text(json.dumps({**data, "version": MANIFEST_VERSION + 1}))
+    manifest = SaveManifest("work", manifest_dir=tmp_path / "manifests")
+    assert manifest.changed_tasks(tasks) == tasks
+
+
+def test_unchanged_save_pulls_and_refreshes_the_manifest(tmp_path, monkeypatch):
+    tasks = _saved(tmp_path, monkeypatch)
+    _recorded(tmp_path, tasks)
+    os.utime(tmp_path / "home" / "kwinrc", ns=(0, 10**18))
+    calls = []
+    monkeypatch.setattr(saver, "app_profile_directory", str(tmp_path / "repo"))
+    monkeypatch.setattr(saver, "get_repo", lambda path: None)
+    monkeypatch.setattr(
+        saver, "get_repo_branches", lambda repo: ([], [], "work", ["work"])
+    )
+    monkeypatch.setattr(saver, "get_sparse_sections", lambda repo: None)
+    monkeypatch.setattr(saver, "pull_changes", lambda repo: calls.append("pull"))
+    monkeypatch.setattr(saver, "_save_tasks", lambda *args, **kwargs: tasks)
+    monkeypatch.setattr(
+        saver,
+        "SaveManifest",
+        lambda profile: SaveManifest(profile, manifest_dir=tmp_path / "manifests"),
+    )
+    monkeypatch.setattr(
+        saver, "sync_entries", lambda *args, **kwargs: calls.append("sync")
+    )
+    saver.save(saver.saver_default_props)
+    assert calls == ["pull"]
+    stored = json.loads((tmp_path / "manifests" / "work.json").read_text())
+    assert stored["entries"]["configs/kwinrc"]["source"]["."][1] == 10**18
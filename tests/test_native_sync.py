@@ -0,0 +1,72 @@
+import os
+from dotctl.handlers.fs_handler import native_sync
+
+
+def _tree(root, files: dict[str, str]):
+    for name, text in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    return root
+
+
+def test_mirrors_source_and_deletes_stale_files(tmp_path):
+    source = _tree(tmp_path / "source", {"kwinrc": "a", "plasma/desktop": "b"})
+    dest = _tree(tmp_path / "dest", {"kwinrc": "old", "stale.rc": "", "gone/x": ""})
+    changes = native_sync(source, dest)
+    assert (dest / "kwinrc").read_text() == "a"
+    assert (dest / "plasma" / "desktop").read_text() == "b"
+    assert not (dest / "stale.rc").exists()
+    assert not (dest / "gone").exists()
+    assert f"*deleting {dest / 'gone'}" in changes
+    assert native_sync(source, dest) == []
+
+
+def test_honours_exclude_patterns(tmp_path):
+    source = _tree(
+        tmp_path / "source", {"kwinrc": "a", "cache.pyc": "", ".git/HEAD": ""}
+    )
+    dest = _tree(tmp_path / "dest", {"module.pyc": "kept", ".git/config": "kept"})
+    native_sync(source, dest)
+    assert not (dest / "cache.pyc").exists()
+    assert not (dest / ".git" / "HEAD").exists()
+    # Excluded names are protected from --delete on the receiving side too
+    assert (dest / "module.pyc").read_text() == "kept"
+    assert (dest / ".git" / "config").read_text() == "kept"
+
+
+def test_keeps_symlinks(tmp_path):
+    source = _tree(tmp_path / "source", {"kwinrc": "a"})
+    (source / "link.rc").symlink_to("kwinrc")
+    (source / "dangling.rc").symlink_to("missing.rc")
+    dest = _tree(tmp_path / "dest", {"link.rc": "a regular file"})
+    native_sync(source, dest)
+    assert os.readlink(dest / "link.rc") == "kwinrc"
+    assert os.readlink(dest / "dangling.rc") == "missing.rc"
+
+
+def test_preserves_mode_and_mtime(tmp_path):
+    source = _tree(tmp_path / "source", {"bin/run.sh": "#!/bin/sh"})
+    (source / "bin" / "run.sh").chmod(0o750)
+    os.utime(source / "bin" / "run.sh", ns=(10**18, 10**18))
+    (source / "bin").chmod(0o700)
+    dest = tmp_path / "dest"
+    native_sync(source, dest)
+    copied = (dest / "bin" / "run.sh").stat()
+    assert copied.st_mode & 0o777 == 0o750
+    assert copied.st_mtime_ns == 10**18
+    assert (dest / "bin").stat().st_mode & 0o777 == 0o700
+
+
+def test_file_and_directory_replace_each_other(tmp_path):
+    source = _tree(tmp_path / "source", {"was_dir": "file", "was_file/inner": "dir"})
+    dest = _tree(tmp_path / "dest", {"was_dir/inner": "", "was_file": "file"})
+    native_sync(source, dest)
+    assert (dest / "was_dir").read_text() == "file"
+    assert (dest / "was_file" / "inner").read_text() == "dir"
+
+    # A single-file entry over a directory, and the other way around
+    native_sync(source / "was_dir", tmp_path / "dest" / "was_file")
+    assert (dest / "was_file").read_text() == "file"
+    native_sync(source / "was_file", tmp_path / "dest" / "was_dir")
+    assert (dest / "was_dir" / "inner").read_text() == "dir"
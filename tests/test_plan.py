@@ -0,0 +1,95 @@
+import json
+import os
+from dotctl.handlers import plan_handler
+from dotctl.handlers.plan_handler import build_plan, plan_entry, planned_tasks
+from dotctl.handlers.sync_handler import section_tasks
+
+
+def _tree(root, files):
+    for rel, content in files.items():
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel).write_text(content)
+
+
+def _tasks(tmp_path, entries):
+    source, dest = tmp_path / "home", tmp_path / "repo"
+    source.mkdir(exist_ok=True)
+    dest.mkdir(exist_ok=True)
+    return section_tasks("configs", entries, source, dest)
+
+
+def test_plan_lists_created_updated_and_deleted_files(tmp_path):
+    _tree(
+        tmp_path / "home",
+        {"app/new.rc": "new", "app/same.rc": "same", "app/edit.rc": "edited"},
+    )
+    _tree(
+        tmp_path / "repo",
+        {
+            "app/same.rc": "same",
+            "app/edit.rc": "old",
+            "app/gone.rc": "x",
+            "app/old/a.rc": "x",
+            "app/old/b.rc": "x",
+        },
+    )
+    os.utime(tmp_path / "home/app/same.rc", ns=(0, 10**18))
+    os.utime(tmp_path / "repo/app/same.rc", ns=(0, 10**18))
+    (task,) = _tasks(tmp_path, ["app"])
+    plan = plan_entry(task)
+    assert plan.added == ["app/new.rc"]
+    assert plan.modified == ["app/edit.rc"]
+    # A removed directory is reported once, not file by file
+    assert plan.deleted == ["app/gone.rc", "app/old"]
+    assert plan.transfer_bytes == len("new") + len("edited")
+    assert plan.changed
+
+
+def test_plan_of_an_unchanged_entry_is_empty(tmp_path):
+    _tree(tmp_path / "home", {"kwinrc": "[Windows]"})
+    _tree(tmp_path / "repo", {"kwinrc": "[Windows]"})
+    os.utime(tmp_path / "home/kwinrc", ns=(0, 10**18))
+    os.utime(tmp_path / "repo/kwinrc", ns=(0, 10**18))
+    (task,) = _tasks(tmp_path, ["kwinrc"])
+    plan = plan_entry(task)
+    assert (plan.added, plan.modified, plan.deleted) == ([], [], [])
+    assert not plan.changed
+
+
+def test_plan_compares_symlink_targets(tmp_path):
+    (tmp_path / "home").mkdir()
+    (tmp_path / "repo").mkdir()
+    (tmp_path / "home/theme").symlink_to("dark")
+    (tmp_path / "repo/theme").symlink_to("light")
+    (task,) = _tasks(tmp_path, ["theme"])
+    assert plan_entry(task).modified == ["theme"]
+
+
+def test_plan_skips_missing_sources(tmp_path):
+    _tree(tmp_path / "repo", {"app/app.rc": "x"})
+    (task,) = _tasks(tmp_path, ["app"])
+    assert not plan_entry(task).changed
+
+
+def test_plan_flags_unreadable_entries(tmp_path, monkeypatch):
+    def denied(path):
+        raise PermissionError(path)
+
+    monkeypatch.setattr(plan_handler, "scan_tree", denied)
+    (task,) = _tasks(tmp_path, ["app"])
+    plan = plan_entry(task)
+    assert plan.requires_sudo and plan.changed
+
+
+def test_build_plan_keeps_only_changed_tasks(tmp_path):
+    _tree(tmp_path / "home", {"kwinrc": "[Windows]", "app/app.rc": "x"})
+    _tree(tmp_path / "repo", {"kwinrc": "[Windows]"})
+    os.utime(tmp_path / "home/kwinrc", ns=(0, 10**18))
+    os.utime(tmp_path / "repo/kwinrc", ns=(0, 10**18))
+    tasks = _tasks(tmp_path, ["kwinrc", "app"])
+    plan = build_plan("save", tasks)
+    assert [entry.entry for entry in plan.changed_entries] == ["app"]
+    assert planned_tasks(plan, tasks) == tasks[1:]
+    data = json.loads(plan.to_json())
+    assert [entry["entry"] for entry in data["entries"]] == ["app"]
+    assert data["summary"]["added"] == 1
@@ -0,0 +1,103 @@
+import subprocess
+from pathlib import Path
+import pytest
+from dotctl.handlers import data_handler
+from dotctl.handlers.data_handler import (
+    REMOTE_TRANSFER,
+    _match_entry,
+    get_transfer_profile,
+    rsync_batch,
+)
+
+ROOT, DEST = Path("/profile/configs"), Path("/home/u/.config")
+ENTRIES = ["kde", "kde/plasma", "kwinrc"]
+
+
+def _stub(monkeypatch, returncode, stdout="", stderr=""):
+    calls = []
+
+    def run_rsync(command, sudo_pass=None):
+        calls.append((command, sudo_pass))
+        return returncode, stdout, stderr, command
+
+    monkeypatch.setattr(data_handler, "_run_rsync", run_rsync)
+    return calls
+
+
+def test_match_entry_prefers_the_longest_entry():
+    assert _match_entry("kde/plasma/desktop", ENTRIES) == "kde/plasma"
+    assert _match_entry("kde/plasmarc", ENTRIES) == "kde"
+    assert _match_entry("kwinrc", ENTRIES) == "kwinrc"
+    assert _match_entry("kwinrc.bak", ENTRIES) is None
+    assert _match_entry("kde/plasma/.desktop.a1B2c3", ENTRIES) == "kde/plasma"
+    assert _match_entry(".kwinrc.a1B2c3", ENTRIES) == "kwinrc"
+
+
+def test_changes_are_charged_to_their_entry(monkeypatch):
+    stdout = "\n".join(
+        [
+            ">f+++++++++ kde/plasma/desktop",
+            ">f.st...... kde/kdeglobals",
+            "*deleting   kwinrc",
+            "cd+++++++++ kde/",
+            "sent 1,234 bytes  received 56 bytes",
+        ]
+    )
+    calls = _stub(monkeypatch, 0, stdout)
+    report = rsync_batch(ROOT, DEST, ENTRIES, sudo_pass="secret")
+    assert report.changes == {
+        "kde/plasma": [">f+++++++++ kde/plasma/desktop"],
+        "kde": [">f.st...... kde/kdeglobals", "cd+++++++++ kde/"],
+        "kwinrc": ["*deleting   kwinrc"],
+    }
+    assert report.errors == {}
+    assert calls[0][1] == "secret"
+    assert "--delete" in calls[0][0]
+
+
+@pytest.mark.parametrize("returncode", [23, 24])
+def test_partial_transfer_errors(monkeypatch, returncode):
+    stderr = "\n".join(
+        [
+            'rsync: [sender] send_files failed to open "/profile/configs/kde/plasma/'
+            'desktop": Permission denied (13)',
+            'rsync: [receiver] mkstemp "/home/u/.config/.kwinrc.Qx81mZ" failed: '
+            "Permission denied (13)",
+            'rsync: link_stat "kwinrc" failed: No such file or directory (2)',
+            "rsync: connection unexpectedly closed",
+            "rsync error: some files could not be transferred (code 23)",
+        ]
+    )
+    _stub(monkeypatch, returncode, stderr=stderr)
+    report = rsync_batch(ROOT, DEST, ENTRIES)
+    assert len(report.errors["kde/plasma"]) == 1
+    # The temporary file rsync writes kwinrc to is charged to kwinrc
+    assert len(report.errors["kwinrc"]) == 2
+    assert [line.split(":")[1] for line in report.errors[""]] == [
+        " connection unexpectedly closed"
+    ]
+
+
+def test_unattributed_failure_is_kept(monkeypatch):
+    _stub(monkeypatch, 23, stderr="some files vanished\n")
+    assert rsync_batch(ROOT, DEST, ENTRIES).errors == {"": ["some files vanished"]}
+
+
+def test_fatal_errors_raise(monkeypatch):
+    _stub(monkeypatch, 13, stderr="rsync: opendir failed\n")
+    with pytest.raises(PermissionError):
+        rsync_batch(ROOT, DEST, ENTRIES)
+    _stub(monkeypatch, 11, stderr='rsync: open "x": Permission denied (13)\n')
+    with pytest.raises(PermissionError):
+        rsync_batch(ROOT, DEST, ENTRIES)
+    _stub(monkeypatch, 12, stderr="rsync: protocol data stream error\n")
+    with pytest.raises(subprocess.CalledProcessError):
+        rsync_batch(ROOT, DEST, ENTRIES)
+
+
+def test_inplace_only_for_local_transfers(monkeypatch):
+    calls = _stub(monkeypatch, 0)
+    rsync_batch(ROOT, DEST, ENTRIES, inplace=True)
+    rsync_batch(ROOT, DEST, ENTRIES)
+    assert ["--inplace" in command for command, _ in calls] == [True, False]
+    assert get_transfer_profile("host:dots", DEST, inplace=True) == REMOTE_TRANSFER
@@ -0,0 +1,80 @@
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from dotctl.arg_manager import get_parser
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+# One command line per subcommand, see test_every_subcommand_is_covered
+COMMANDS = [
+    ["init"],
+    ["ls"],
+    ["switch", "work"],
+    ["pull"],
+    ["save"],
+    ["apply"],
+    ["create", "work"],
+    ["rm", "work"],
+    ["export"],
+    ["import", "work.dtsv"],
+    ["fleet", "h"],
+    ["sparse", "kde"],
+    ["wipe"],
+    ["--version"],
+]
+
+
+def _import_times(code: str) -> dict[str, int]:
+    """Cumulative import time in µs per module, from `python -X importtime`."""
+    env = {**os.environ, "PYTHONPATH": str(SRC)}
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in process.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.removeprefix("import time:").split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_every_subcommand_is_covered():
+    (subparsers,) = [
+        action
+        for action in get_parser()._actions
+        if isinstance(action, argparse._SubParsersAction)
+    ]
+    # Aliases share their parser, so compare parsers instead of names
+    covered = {id(subparsers.choices[argv[0]]) for argv in COMMANDS[:-1]}
+    assert covered == {id(parser) for parser in subparsers.choices.values()}
+
+
+@pytest.mark.parametrize("argv", COMMANDS, ids=lambda argv: argv[0])
+def test_cli_startup_stays_lazy(argv):
+    # Parsing any subcommand must not pull in the actions or their dependencies
+    modules = _import_times(
+        "from dotctl.main import Action, DotCtl\n"
+        "from dotctl.arg_manager import get_parser\n"
+        f"get_parser().parse_args({argv!r})\n"
+    )
+    assert "dotctl.main" in modules
+    assert not {name for name in modules if name.startswith("dotctl.actions.")}
+    assert not {name for name in modules if name == "git" or name.startswith("git.")}
+    assert "yaml" not in modules
+    assert "zipfile" not in modules
+    assert "importlib.metadata" not in modules
+
+
+def test_cli_startup_budget():
+    # Importing the CLI must cost less than GitPython alone; an eager import
+    # of the actions pays for both, whatever the speed of the machine
+    times = _import_times("import dotctl.main\nimport git\n")
+    assert times["dotctl.main"] < times.get("git", 0)
@@ -0,0 +1,149 @@
+import threading
+import time
+from dotctl.handlers import sync_handler
+from dotctl.handlers.fs_handler import list_directory
+from dotctl.handlers.sync_handler import section_tasks, sync_entries, sync_sections
+
+
+def _section(tmp_path, names, section="configs"):
+    source, dest = tmp_path / "profile" / section, tmp_path / "home" / section
+    source.mkdir(parents=True)
+    dest.mkdir(parents=True)
+    for name in names:
+        (source / name).write_text(name)
+    return section_tasks(section, names, source, dest)
+
+
+def _slow_native_sync(monkeypatch) -> list[int]:
+    """Makes every native copy take 0.2s; returns [running, peak] counters."""
+    counters = [0, 0]
+    lock = threading.Lock()
+
+    def slow_sync(source, dest, checksum=False, hashes=None):
+        with lock:
+            counters[0] += 1
+            counters[1] = max(counters[1], counters[0])
+        time.sleep(0.2)
+        with lock:
+            counters[0] -= 1
+        return []
+
+    monkeypatch.setattr(sync_handler, "native_sync", slow_sync)
+    return counters
+
+
+def test_native_entries_of_a_section_overlap(tmp_path, monkeypatch):
+    counters = _slow_native_sync(monkeypatch)
+    tasks = _section(tmp_path, [f"entry{i}" for i in range(4)])
+    result = sync_entries(tasks, jobs=4)
+    assert len(result.synced) == 4
+    assert counters[1] == 4
+
+
+def test_section_pipeline_entries_overlap(tmp_path, monkeypatch):
+    counters = _slow_native_sync(monkeypatch)
+    tasks = _section(tmp_path, [f"entry{i}" for i in range(3)])
+    tasks += _section(tmp_path, ["kwinrc"], section="kde")
+    steps = []
+    result = sync_sections(
+        tasks,
+        before=lambda section: steps.append(("before", section)),
+        after=lambda section: steps.append(("after", section)),
+        jobs=4,
+        sections=["configs", "kde", "empty"],
+    )
+    assert len(result.synced) == 4
+    assert counters[1] == 4
+    # A section without entries still runs both steps
+    assert steps.index(("before", "empty")) < steps.index(("after", "empty"))
+    assert sorted(steps) == sorted(
+        (step, section)
+        for step in ("before", "after")
+        for section in ("configs", "kde", "empty")
+    )
+
+
+def _privileged(monkeypatch, answers):
+    """Makes every destination need sudo and answers prompts from a list."""
+    events = []
+
+    def get_sudo_pass(path):
+        events.append(("prompt", path.name))
+        return answers.pop(0) if len(answers) > 1 else answers[0]
+
+    def run_batch(batch, *args):
+        events.append(("run", [task.entry for task in batch]))
+        return [(task, None) for task in batch]
+
+    monkeypatch.setattr(sync_handler, "is_writable", lambda path: False)
+    monkeypatch.setattr(sync_handler, "get_sudo_pass", get_sudo_pass)
+    monkeypatch.setattr(sync_handler, "_run_batch", run_batch)
+    return events
+
+
+def test_prompts_happen_before_workers_start(tmp_path, monkeypatch):
+    # A one-off password is asked again for every entry
+    events = _privileged(monkeypatch, [("once", None, False)])
+    tasks = _section(tmp_path, ["kwinrc", "kdeglobals", "plasmarc"])
+    result = sync_entries(tasks, jobs=4)
+    kinds = [kind for kind, _ in events]
+    assert kinds[:3] == ["prompt"] * 3
+    assert "prompt" not in kinds[3:]
+    assert [task.sudo_pass for task in result.synced] == ["once"] * 3
+
+
+def test_recurring_password_is_reused(tmp_path, monkeypatch):
+    events = _privileged(monkeypatch, [(None, "secret", False)])
+    tasks = _section(tmp_path, ["kwinrc", "kdeglobals", "plasmarc"])
+    result = sync_entries(tasks, jobs=4)
+    assert [kind for kind, _ in events].count("prompt") == 1
+    assert result.sudo_pass == "secret"
+    assert {task.sudo_pass for task in result.synced} == {"secret"}
+    # Entries sharing a password and section root go through one rsync
+    assert events[1:] == [("run", ["kwinrc", "kdeglobals", "plasmarc"])]
+
+
+def test_skip_all_is_honoured(tmp_path, monkeypatch):
+    events = _privileged(monkeypatch, [(None, None, True)])
+    tasks = _section(tmp_path, ["kwinrc", "kdeglobals"])
+    result = sync_entries(tasks, jobs=4)
+    assert events == [("prompt", "kwinrc")]
+    assert result.skip_sudo
+    assert [task.entry for task in result.skipped] == ["kwinrc", "kdeglobals"]
+    assert result.synced == []
+
+
+def test_denied_at_run_time_is_retried_serially(tmp_path, monkeypatch):
+    retried = []
+
+    def run_batch(batch, *args):
+        return [(task, PermissionError("denied")) for task in batch]
+
+    def run_task(task, **options):
+        retried.append((task.entry, task.sudo_pass, threading.current_thread()))
+
+    prompts = []
+    monkeypatch.setattr(sync_handler, "_run_batch", run_batch)
+    monkeypatch.setattr(sync_handler, "_run_task", run_task)
+    monkeypatch.setattr(
+        sync_handler,
+        "get_sudo_pass",
+        lambda path: prompts.append(path) or (None, "secret", False),
+    )
+    tasks = _section(tmp_path, ["kwinrc", "kdeglobals"])
+    result = sync_entries(tasks, jobs=4)
+    assert len(prompts) == 1
+    assert sorted(entry for entry, _, _ in retried) == ["kdeglobals", "kwinrc"]
+    assert {(password, thread) for _, password, thread in retried} == {
+        ("secret", threading.main_thread())
+    }
+    assert sorted(task.entry for task in result.synced) == ["kdeglobals", "kwinrc"]
+
+
+def test_patterns_see_entries_written_by_a_sync(tmp_path):
+    tasks = _section(tmp_path, ["kwinrc"])
+    dest = tmp_path / "home" / "configs"
+    assert list_directory(dest) == ()
+    sync_entries(tasks, jobs=1)
+    # Expanding the destination in the same run sees the copied entry
+    assert section_tasks("configs", ["kwin*"], dest, tmp_path)[0].entry == "kwinrc"